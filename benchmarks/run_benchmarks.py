@@ -0,0 +1,242 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import warnings
+import contextlib
+import tempfile
+import tracemalloc
+import subprocess
+import importlib.util
+from datetime import datetime, timezone
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(REPO_DIR, "training_scripts"))
+
+from data_processing import build_features
+from evaluate_model import evaluate_model
+from feature_registry import DEFAULT_FEATURES
+from inference import input_fn, model_fn, predict_fn
+from synthetic_market import TRADING_DAYS, generate_bars
+from train_model import train_model
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = os.path.join(BENCHMARK_DIR, "history.jsonl")
+BASELINE_FILE = os.path.join(BENCHMARK_DIR, "baseline.json")
+
+# name -> (number of series, trading days per series, bar frequency)
+SCENARIOS = {
+    "daily_10y": (1, 10 * TRADING_DAYS, "1d"),
+    "daily_30y": (1, 30 * TRADING_DAYS, "1d"),
+    "tickers_100": (100, 10 * TRADING_DAYS, "1d"),
+    "minute_1y": (1, TRADING_DAYS, "1m"),
+}
+
+
+def load_inference_processing():
+    """Imports inference_scripts/data_processing.py, whose module name clashes with training's."""
+    path = os.path.join(REPO_DIR, "inference_scripts", "data_processing.py")
+    spec = importlib.util.spec_from_file_location("inference_data_processing", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(function, repeat):
+    """Runs `function` `repeat` times and returns its best time and peak traced memory.
+
+    Memory is the peak of Python and NumPy allocations seen by tracemalloc
+    during one extra run; XGBoost's native allocations are not included.
+
+    Returns:
+        float: Fastest wall-clock time in seconds.
+        float: Peak traced memory in MiB.
+        object: Return value of the last run.
+    """
+    # Stages print progress and warnings that would drown the report
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = function()
+            times.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return min(times), peak / 1024 / 1024, result
+
+
+def run_scenario(name, n_series, n_sessions, repeat, frequency="1d"):
+    """Times every pipeline stage on one synthetic dataset.
+
+    Returns:
+        dict: Stage name -> {"seconds": ..., "peak_mb": ...}.
+    """
+    inference_processing = load_inference_processing()
+    # Date column plus the yfinance OHLCV columns, as the stages read them
+    series = [
+        generate_bars(n_sessions, frequency, seed=seed).reset_index()
+        for seed in range(n_series)
+    ]
+    features = list(DEFAULT_FEATURES)
+    results = {}
+
+    def record(stage, function):
+        seconds, peak_mb, result = measure(function, repeat)
+        results[stage] = {"seconds": seconds, "peak_mb": peak_mb}
+        print(f"{name:>12} {stage:<18} {seconds:9.4f}s {peak_mb:9.1f} MiB")
+        return result
+
+    frames = record(
+        "add_features", lambda: [build_features(bars, features) for bars in series]
+    )
+    record(
+        "inference_process",
+        lambda: [
+            inference_processing.process_data(bars, features=features)
+            for bars in series
+        ],
+    )
+
+    # Series are stacked into one panel for training and evaluation
+    data = pd.concat(frames).dropna()
+    with tempfile.TemporaryDirectory() as model_dir:
+        record("train_model", lambda: train_model(data, features, model_dir))
+        model = record("model_fn_load", lambda: model_fn(model_dir))
+        record("evaluate_model", lambda: evaluate_model(data, features, model))
+
+        payload = data[features].to_csv(index=False, header=False).encode()
+        record(
+            "model_fn_predict", lambda: predict_fn(input_fn(payload, "text/csv"), model)
+        )
+    return results
+
+
+def git_commit():
+    """Returns the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def append_history(results, history_path):
+    """Appends one JSON line per scenario and stage to the benchmark history."""
+    run = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+    with open(history_path, "a") as f:
+        for scenario, stages in results.items():
+            for stage, metrics in stages.items():
+                f.write(
+                    json.dumps(dict(run, scenario=scenario, stage=stage, **metrics))
+                    + "\n"
+                )
+
+
+def find_regressions(results, baseline, tolerance, min_delta=0.005):
+    """Compares stage times against the baseline.
+
+    Args:
+        results (dict): Scenario -> stage -> metrics of this run.
+        baseline (dict): Same structure, from a previous run.
+        tolerance (float): Allowed relative slowdown, e.g. 0.25 for 25%.
+        min_delta (float): Slowdowns below this many seconds are timer noise
+            and never reported.
+
+    Returns:
+        list: (scenario, stage, baseline seconds, seconds) for every stage
+            slower than the baseline by more than `tolerance` and `min_delta`.
+    """
+    regressions = []
+    for scenario, stages in results.items():
+        for stage, metrics in stages.items():
+            reference = baseline.get(scenario, {}).get(stage)
+            if reference is None:
+                continue
+            slowdown = metrics["seconds"] - reference["seconds"]
+            if slowdown > reference["seconds"] * tolerance and slowdown > min_delta:
+                regressions.append(
+                    (scenario, stage, reference["seconds"], metrics["seconds"])
+                )
+    return regressions
+
+
+def main():
+    """Main function to run the benchmarks, record them and check for regressions."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the pipeline stages on synthetic data."
+    )
+    parser.add_argument(
+        "--scenarios",
+        type=str,
+        default=",".join(SCENARIOS),
+        help=f"Comma-separated scenarios out of {', '.join(SCENARIOS)}.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage.")
+    parser.add_argument("--history", type=str, default=HISTORY_FILE)
+    parser.add_argument("--baseline", type=str, default=BASELINE_FILE)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown over the baseline reported as a regression.",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store this run as the new baseline instead of comparing against it.",
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.scenarios.split(","):
+        if name not in SCENARIOS:
+            parser.error(f"Unknown scenario '{name}'")
+        n_series, n_sessions, frequency = SCENARIOS[name]
+        results[name] = run_scenario(name, n_series, n_sessions, args.repeat, frequency)
+    append_history(results, args.history)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+    if not os.path.exists(args.baseline):
+        print(
+            f"No baseline at {args.baseline}; run with --update-baseline to create one."
+        )
+        return
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for scenario, stage, reference, seconds in regressions:
+        print(
+            f"REGRESSION {scenario}/{stage}: {seconds:.4f}s vs baseline {reference:.4f}s"
+        )
+    if regressions:
+        sys.exit(1)
+    print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,52 @@ import sys
 from curl_cffi import requests
 import yfinance as yf
 
-
-def fetch_data(years_to_filter: int, output_dir: str) -> None:
+# Shared modules live in training_scripts/ and are shipped to
+# /opt/ml/processing/input/lib by the SageMaker processing steps
+sys.path.append("/opt/ml/processing/input/lib")
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training_scripts")
+)
+
+from artifact_io import ARTIFACT_FORMATS, artifact_path, write_frame
+from instrumentation import DISABLED_METRICS, StageMetrics
+from ohlcv_store import (
+    INTERVALS,
+    INTRADAY_PERIODS,
+    OHLCVStore,
+    store_key,
+    update_history,
+)
+from resampling import compact_bars
+from universe_ingestion import fetch_universe, read_symbols
+
+SYMBOL = "^GSPC"
+
+
+def fetch_data(
+    years_to_filter: int,
+    output_dir: str,
+    store_dir: str = None,
+    file_format: str = "csv",
+    metrics: StageMetrics = DISABLED_METRICS,
+    interval: str = "1d",
+) -> None:
     """
     Fetch historical S&P 500 market data, filter it based on the specified number of years,
-    and save the data as a CSV file to the specified output directory.
+    and save the data as a CSV or Parquet file to the specified output directory.
+
+    When `store_dir` is given, only the bars after the store's high-water mark are
+    downloaded and upserted, and the filtered window is read back from the store.
 
     Args:
         years_to_filter (int): Number of years of historical data to filter.
         output_dir (str): Directory where the filtered S&P 500 data will be saved.
+        store_dir (str, optional): Directory of the persistent OHLCV history store.
+        file_format (str): Output format, "csv" or "parquet".
+        metrics (StageMetrics): Collector for the fetch and save phases.
+        interval (str): Bar interval, "1d" or an intraday interval such as "5m";
+            intraday bars cover the longest period Yahoo Finance serves and are
+            saved with float32 prices.
 
     Raises:
         ValueError: If `years_to_filter` is not a positive integer.
@@ -25,26 +62,48 @@ def fetch_data(years_to_filter: int, output_dir: str) -> None:
     try:
         # To prevent rate limit error
         session = requests.Session(impersonate="chrome")
-        ticker = yf.Ticker("...", session=session)
-
-        print("Fetching historical data for the S&P 500...")
-        sp500 = yf.Ticker("^GSPC").history(period="max")
 
         # Calculate the date range
         end_date = datetime.today()
         start_date = end_date - timedelta(days=int(years_to_filter) * 365)
-        print(f"Filtering data from {start_date.date()} to {end_date.date()}...")
 
-        # Filter data
-        filtered_data = sp500.loc[start_date.strftime("%Y-%m-%d") :]
+        with metrics.phase("fetch") as phase:
+            if store_dir:
+                # Only fetch bars newer than what is already stored
+                store = OHLCVStore(store_dir)
+                update_history(store, SYMBOL, session=session, interval=interval)
+                print(
+                    f"Filtering data from {start_date.date()} to {end_date.date()}..."
+                )
+                filtered_data = store.load(
+                    store_key(SYMBOL, interval), start=start_date.strftime("%Y-%m-%d")
+                )
+            else:
+                print("Fetching historical data for the S&P 500...")
+                ticker = yf.Ticker(SYMBOL, session=session)
+                if interval == "1d":
+                    sp500 = ticker.history(period="max")
+                else:
+                    sp500 = ticker.history(
+                        period=INTRADAY_PERIODS[interval], interval=interval
+                    )
+                print(
+                    f"Filtering data from {start_date.date()} to {end_date.date()}..."
+                )
+
+                # Filter data
+                filtered_data = sp500.loc[start_date.strftime("%Y-%m-%d") :]
+            phase.record(rows_out=len(filtered_data))
+        if interval != "1d":
+            filtered_data = compact_bars(filtered_data)
 
         # Ensure output directory exists
         os.makedirs(output_dir, exist_ok=True)
 
-        # Save data to CSV
-        filename = "sp500_input.csv"
-        output_path = os.path.join(output_dir, filename)
-        filtered_data.to_csv(output_path, index=True)
+        # Save data to CSV or Parquet
+        output_path = artifact_path(output_dir, "sp500_input", file_format)
+        with metrics.phase("save"):
+            write_frame(filtered_data, output_path, index=True)
         print(f"Data saved successfully to: {output_path}")
 
     except Exception as e:
@@ -68,13 +127,93 @@ def main():
         required=True,
         help="Number of historical years to filter.",
     )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="/opt/ml/processing/output",
+        help="Directory to write the ingested data to.",
+    )
+    parser.add_argument(
+        "--store-dir",
+        type=str,
+        default=None,
+        help="Directory of the persistent OHLCV store; enables incremental fetching.",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=sorted(ARTIFACT_FORMATS),
+        help="Output file format.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=str,
+        default="1d",
+        choices=INTERVALS,
+        help="Bar interval; intraday history is limited by what Yahoo Finance serves.",
+    )
+    parser.add_argument(
+        "--symbols",
+        type=str,
+        default=None,
+        help="Comma-separated tickers to ingest concurrently instead of the S&P 500.",
+    )
+    parser.add_argument(
+        "--symbols-file",
+        type=str,
+        default=None,
+        help="File with one ticker per line to ingest concurrently.",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=8,
+        help="Maximum number of concurrent downloads in multi-symbol mode.",
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=2.0,
+        help="Download rate shared by all workers in multi-symbol mode.",
+    )
     args = parser.parse_args()
 
-    # Define output directory
-    output_dir = "/opt/ml/processing/output"
+    output_dir = args.output_dir
 
-    # Fetch and save S&P 500 data
-    fetch_data(args.years_to_filter, output_dir)
+    metrics = StageMetrics("data_ingestion")
+    try:
+        with metrics.phase("total") as phase:
+            symbols = read_symbols(args.symbols, args.symbols_file)
+            if symbols:
+                # Fetch and save every symbol of the universe; fail only if none succeeded
+                summary = fetch_universe(
+                    symbols,
+                    args.years_to_filter,
+                    output_dir,
+                    store_dir=args.store_dir,
+                    max_workers=args.max_workers,
+                    requests_per_second=args.requests_per_second,
+                    file_format=args.format,
+                    interval=args.interval,
+                )
+                phase.record(
+                    symbols=len(symbols), rows_out=sum(summary["succeeded"].values())
+                )
+                if not summary["succeeded"]:
+                    sys.exit(1)
+            else:
+                # Fetch and save S&P 500 data
+                fetch_data(
+                    args.years_to_filter,
+                    output_dir,
+                    args.store_dir,
+                    args.format,
+                    metrics,
+                    args.interval,
+                )
+    finally:
+        metrics.save(output_dir)
 
 
 if __name__ == "__main__":
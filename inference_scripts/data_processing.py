@@ -2,49 +2,111 @@ import pandas as pd
 import numpy as np
 import argparse
 import os
+import sys
 
+# Shared modules live in training_scripts/ and are shipped to
+# /opt/ml/processing/input/lib by the SageMaker processing steps
+sys.path.append("/opt/ml/processing/input/lib")
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "training_scripts")
+)
 
-def process_data(sp500):
+from artifact_io import find_artifact, read_frame
+from drift_detector import DRIFT_WINDOW, detect_drift, load_baseline, write_report
+from feature_cache import DEFAULT_MAX_BYTES, FeatureCache, cached_features
+from feature_engine import add_target
+from feature_registry import add_selected_features, max_lookback, parse_feature_list
+from feature_state import resume_state
+from instrumentation import StageMetrics
+from panel_features import SYMBOL_COLUMN, latest_panel_rows, load_panel, sort_panel
+from resampling import INTERVAL_SIZES, SESSIONS, resample_frame
+
+
+def build_features(sp500, features):
+    """Adds the target column and the features to a copy of the SP500 data."""
+    sp500 = add_target(sp500.set_index("Date"))
+    return add_selected_features(sp500, features)
+
+
+def process_data(sp500, cache=None, features=None, rows=1):
     """Processes the SP500 data to extract features for prediction.
 
     Args:
         sp500 (pd.DataFrame): DataFrame containing SP500 stock data .
+        cache (FeatureCache, optional): Feature cache shared with training; a
+            hit skips feature generation. Without it only the bars within
+            the longest lookback are processed.
+        features (list, optional): Feature names consumed by the model, in
+            model order; defaults to the ratio and trend features of every horizon.
+        rows (int): Number of latest bars to return features for.
 
     Returns:
         pd.DataFrame: DataFrame containing the processed features for prediction.
     """
+    if features is None:
+        features = parse_feature_list(None)
+
+    if cache is None:
+        # Only the bars within the longest lookback affect the latest rows
+        sp500 = sp500.tail(max_lookback(features) + rows - 1)
+
+    # Extract features for prediction, unless cached for the same input.
+    # Entries hold the features of the whole input, keyed on it, as the
+    # training pipeline stores them, so either pipeline reuses the other's
+    sp500 = cached_features(
+        cache, sp500, features, lambda: build_features(sp500, features)
+    )
 
-    # Extract features for prediction
-    sp500.set_index("Date", inplace=True)
-    sp500["Tomorrow"] = sp500["Close"].shift(-1)
-    sp500["Target"] = (sp500["Tomorrow"] > sp500["Close"]).astype(int)
+    # Drop rows with NaN features; the latest bar is kept even though its
+    # Tomorrow value is unknown, since it is the bar we predict from
+    data = sp500[features].dropna()
 
-    horizons = [2, 5, 60, 250, 1000]
-    new_predictors = []
+    # Return only the last rows
+    return data.tail(rows)
 
-    for horizon in horizons:
-        rolling_averages = sp500.rolling(horizon).mean()
 
-        ratio_column = f"Close_Ratio_{horizon}"
-        sp500[ratio_column] = sp500["Close"] / rolling_averages["Close"]
+def process_data_incremental(sp500, state_path, features=None, rows=1):
+    """Computes the latest features from a persisted rolling state.
 
-        trend_column = f"Trend_{horizon}"
-        sp500[trend_column] = sp500.shift(1).rolling(horizon).sum()["Target"]
+    Only the bars after the state's last bar are applied, so a daily run
+    costs O(#horizons) per new bar instead of a full rolling recompute.
+    The updated state is written back to `state_path`. For more than one
+    row, the state keeps the features of the latest `rows` bars.
 
-        new_predictors += [ratio_column, trend_column]
+    Args:
+        sp500 (pd.DataFrame): DataFrame containing SP500 stock data.
+        state_path (str): Path of the persisted feature state JSON file.
+        features (list, optional): Feature names consumed by the model, in
+            model order; defaults to the ratio and trend features of every horizon.
+        rows (int): Number of latest bars to return features for.
 
-    sp500data = sp500.dropna()  # Drop rows with NaN values
-    features = sp500data.columns[-10:].to_list()
-    data = sp500data[features]
+    Returns:
+        pd.DataFrame: DataFrame containing the features of the latest bars.
+    """
+    if features is None:
+        features = parse_feature_list(None)
 
-    # Return only the last row
-    return data.tail(1)
+    # The state tracks one window per horizon used by the requested features
+    horizons = sorted({int(name.rsplit("_", 1)[1]) for name in features})
+    history_rows = rows if rows > 1 else 0
+    state = resume_state(
+        state_path, sp500["Date"], sp500["Close"], horizons, history_rows
+    )
+    state.save(state_path)
+    if rows == 1:
+        return state.to_frame()[features].reset_index(drop=True)
+    # Drop rows with NaN features, as process_data does
+    data = state.history_frame()[features].dropna()
+    return data.tail(rows).reset_index(drop=True)
 
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument(
-        "--input_dir", type=str, required=True, help="Path to the input CSV file."
+        "--input_dir",
+        type=str,
+        required=True,
+        help="Directory containing sp500_input.csv or sp500_input.parquet.",
     )
     parser.add_argument(
         "--output_dir",
@@ -52,16 +114,153 @@ def main():
         required=True,
         help="Directory to save processed data.",
     )
+    parser.add_argument(
+        "--state_path",
+        type=str,
+        default=None,
+        help="Persisted feature state; enables incremental next-bar updates.",
+    )
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Comma-separated feature names in model order; must match the model's features.json.",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory of the local feature cache; disabled when omitted.",
+    )
+    parser.add_argument(
+        "--cache_max_bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="Size limit of the feature cache before LRU eviction.",
+    )
+    parser.add_argument(
+        "--panel",
+        action="store_true",
+        help="Input is a multi-symbol ingestion directory; predict every symbol's latest bar.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=str,
+        default="1d",
+        choices=list(INTERVAL_SIZES),
+        help="Bar interval of the model; selects the default feature horizons.",
+    )
+    parser.add_argument(
+        "--resample",
+        action="store_true",
+        help="Aggregate finer input bars to --interval bars first; must match training.",
+    )
+    parser.add_argument(
+        "--session",
+        type=str,
+        default="regular",
+        choices=sorted(SESSIONS),
+        help="Trading session the resampled bars are taken from.",
+    )
+    parser.add_argument(
+        "--baseline_statistics",
+        type=str,
+        default=None,
+        help="Baseline statistics.json (or its directory) of the approved model; enables drift checks.",
+    )
+    parser.add_argument(
+        "--baseline_constraints",
+        type=str,
+        default=None,
+        help="Baseline constraints.json (or its directory) of the approved model.",
+    )
+    parser.add_argument(
+        "--violations_dir",
+        type=str,
+        default=None,
+        help="Directory of the constraint_violations.json report; defaults to --output_dir/../monitoring.",
+    )
+    parser.add_argument(
+        "--drift_window",
+        type=int,
+        default=DRIFT_WINDOW,
+        help="Latest bars whose features are compared to the baseline for a single series.",
+    )
     args = parser.parse_args()
 
-    input_path = os.path.join(args.input_dir, "sp500_input.csv")
+    # The ingested data may be Parquet; the output stays CSV for batch transform
     output_path = os.path.join(args.output_dir, "sp500_processed.csv")
 
-    data = pd.read_csv(input_path)
-    processed_data = process_data(data)
+    metrics = StageMetrics("inference_processing")
+    try:
+        with metrics.phase("total"):
+            with metrics.phase("load") as phase:
+                if args.panel:
+                    data = load_panel(args.input_dir)
+                else:
+                    data = read_frame(find_artifact(args.input_dir, "sp500_input"))
+                if args.resample:
+                    data = resample_frame(
+                        sort_panel(data) if args.panel else data,
+                        args.interval,
+                        args.session,
+                        by=SYMBOL_COLUMN if args.panel else None,
+                    )
+                phase.record(rows_out=len(data))
+
+            features = parse_feature_list(args.features, args.interval)
+            # A single series' drift sample is its latest bars, computed with
+            # the bar we predict from
+            rows = args.drift_window if args.baseline_statistics else 1
+            with metrics.phase("features") as phase:
+                if args.panel:
+                    processed_data = latest_panel_rows(data, features)
+                    # Batch transform output lines follow this symbol order
+                    symbols = processed_data.pop(SYMBOL_COLUMN)
+                    sample = processed_data
+                else:
+                    if args.state_path:
+                        sample = process_data_incremental(
+                            data, args.state_path, features, rows
+                        )
+                    else:
+                        cache = (
+                            FeatureCache(args.cache_dir, args.cache_max_bytes)
+                            if args.cache_dir
+                            else None
+                        )
+                        sample = process_data(data, cache, features, rows)
+                    processed_data = sample.tail(1)
+                phase.record(rows_in=len(data), rows_out=len(processed_data))
+
+            with metrics.phase("save"):
+                os.makedirs(args.output_dir, exist_ok=True)
+                processed_data.to_csv(output_path, index=False, header=False)
+                if args.panel:
+                    symbols.to_csv(
+                        os.path.join(args.output_dir, "symbols.csv"),
+                        index=False,
+                        header=False,
+                    )
 
-    os.makedirs(args.output_dir, exist_ok=True)
-    processed_data.to_csv(output_path, index=False, header=False)
+            if args.baseline_statistics:
+                with metrics.phase("drift") as phase:
+                    baseline = load_baseline(
+                        args.baseline_statistics, args.baseline_constraints
+                    )
+                    # Every symbol's latest bar, or the latest bars of the series
+                    violations, scores = detect_drift(
+                        sample, baseline, time_ordered=not args.panel
+                    )
+                    write_report(
+                        violations,
+                        scores,
+                        args.violations_dir
+                        or os.path.join(args.output_dir, "..", "monitoring"),
+                    )
+                    phase.record(rows_in=len(sample), rows_out=len(violations))
+    finally:
+        metrics.save(args.output_dir)
 
 
 if __name__ == "__main__":
@@ -1,16 +1,46 @@
+import os
+import re
+import codecs
 import boto3
 import json
+from collections import Counter
 
 sm_client = boto3.client("sagemaker")
 s3_client = boto3.client("s3")
 sns_client = boto3.client("sns")
 
+# Bytes read from S3 at a time; the report is never held in memory whole
+CHUNK_SIZE = 64 * 1024
+
+# Weight of one violation of each check type in the severity score; check
+# types missing here weigh DEFAULT_WEIGHT. Override with the SEVERITY_WEIGHTS
+# environment variable (JSON) or the event's "severity_weights".
+SEVERITY_WEIGHTS = {
+    "baseline_drift_check": 1.0,
+    "data_type_check": 1.0,
+    "completeness_check": 1.0,
+    "missing_column_check": 1.0,
+    "extra_column_check": 1.0,
+    "categorical_values_check": 1.0,
+}
+DEFAULT_WEIGHT = 1.0
+# Retraining starts once the severity score reaches this value; with the
+# default weights, any violation triggers it
+MIN_SEVERITY = 1.0
+
+# Features listed in the notification, most violated first
+TOP_FEATURES = 10
+
+_VIOLATIONS_START = re.compile(r'"violations"\s*:\s*\[')
+_SEPARATORS = re.compile(r"[\s,]*")
+
 
 def lambda_handler(event, context):
     print("Lambda function triggered by SageMaker Pipeline.")
 
     pipeline_name = event["sagemaker_pipeline_name"]
     sns_topic_arn = event["SNS_topic_arn"]
+    weights, min_severity = severity_settings(event)
 
     # S3 path to the constraint violations file
     bucket = "aws-portfolio-projects"
@@ -18,24 +48,140 @@ def lambda_handler(event, context):
 
     try:
         response = s3_client.get_object(Bucket=bucket, Key=key)
-        violation_data = json.loads(response["Body"].read().decode("utf-8"))
+        violations = iter_violations(response["Body"].iter_chunks(CHUNK_SIZE))
+        summary = summarize_violations(violations, weights)
+        print(f"Violation summary: {json.dumps(summary)}")
 
-        if violation_data.get("violations", []):
+        if summary["severity"] >= min_severity:
             print("🚨 Data drift detected! Triggering retraining...")
-            send_sns_notification(sns_topic_arn)
+            send_sns_notification(sns_topic_arn, summary)
             trigger_retraining(pipeline_name)
+        elif summary["total"]:
+            print(
+                f"⚠️ {summary['total']} violations below the retraining severity "
+                f"{min_severity}. No retraining needed."
+            )
         else:
             print("✅ No data drift detected. No retraining needed.")
+        return summary
     except s3_client.exceptions.NoSuchKey:
+        # The drift check writes the report on every run, so it must exist
         print("❌ constraint_violations.json not found.")
+        raise
     except Exception as e:
+        # Fail the pipeline step rather than report a clean run
         print(f"❌ Error checking violations: {e}")
+        raise
+
+
+def severity_settings(event):
+    """Returns the severity weights and threshold, from the event, the environment or the defaults."""
+    weights = dict(SEVERITY_WEIGHTS)
+    weights.update(json.loads(os.getenv("SEVERITY_WEIGHTS", "{}")))
+    weights.update(event.get("severity_weights", {}))
+    min_severity = float(
+        event.get("min_severity", os.getenv("MIN_SEVERITY", MIN_SEVERITY))
+    )
+    return weights, min_severity
+
+
+def iter_violations(chunks):
+    """Yields the entries of a constraint_violations.json report one at a time.
+
+    The report is decoded incrementally from its byte chunks, and only the
+    entry being parsed is buffered, so memory stays bounded by the chunk
+    size and the largest entry rather than the size of the report.
 
+    Args:
+        chunks (iterable): Byte chunks of the report, e.g. a StreamingBody's
+            iter_chunks().
 
-def send_sns_notification(sns_topic_arn):
+    Yields:
+        The decoded entries of the "violations" list.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_list = False
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        if not in_list:
+            match = _VIOLATIONS_START.search(buffer)
+            if match is None:
+                # Keep a tail long enough to hold a split key
+                buffer = buffer[-64:]
+                continue
+            buffer = buffer[match.end() :]
+            in_list = True
+
+        position = 0
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+            if position < len(buffer) and buffer[position] == "]":
+                return
+            try:
+                entry, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            if end == len(buffer):
+                # A number may continue in the next chunk
+                break
+            yield entry
+            position = end
+        buffer = buffer[position:]
+
+    if in_list:
+        raise ValueError("Truncated constraint violations report.")
+
+
+def summarize_violations(violations, weights=None):
+    """Aggregates violations per check type and per feature.
+
+    Args:
+        violations (iterable): Violation entries with "feature_name" and
+            "constraint_check_type" keys, as written by Model Monitor.
+        weights (dict, optional): Check type -> weight of one violation in
+            the severity score. Defaults to SEVERITY_WEIGHTS.
+
+    Returns:
+        dict: Total count, severity score, counts per check type and the
+            TOP_FEATURES most violated features.
+    """
+    weights = SEVERITY_WEIGHTS if weights is None else weights
+    by_check = Counter()
+    by_feature = Counter()
+    for violation in violations:
+        if not isinstance(violation, dict):
+            violation = {"description": str(violation)}
+        by_check[violation.get("constraint_check_type", "unknown")] += 1
+        by_feature[violation.get("feature_name", "unknown")] += 1
+    return {
+        "total": sum(by_check.values()),
+        "severity": sum(
+            count * weights.get(check, DEFAULT_WEIGHT)
+            for check, count in by_check.items()
+        ),
+        "features_violated": len(by_feature),
+        "by_check": dict(by_check.most_common()),
+        "top_features": dict(by_feature.most_common(TOP_FEATURES)),
+    }
+
+
+def send_sns_notification(sns_topic_arn, summary):
+    checks = ", ".join(f"{check}: {n}" for check, n in summary["by_check"].items())
+    features = ", ".join(
+        f"{feature} ({n})" for feature, n in summary["top_features"].items()
+    )
     message = {
         "Subject": "🚨 Data Drift Alert - Retraining Initiated 🚀",
-        "Message": "SageMaker Model Monitor detected data drift. A retraining job has been triggered.",
+        "Message": (
+            "The data quality check of the inference features detected data drift. "
+            "A retraining job has been triggered. "
+            f"{summary['total']} violations over {summary['features_violated']} features "
+            f"(severity {summary['severity']:g}). By check: {checks}. "
+            f"Most violated features: {features}."
+        ),
+        "Summary": summary,
     }
 
     sns_client.publish(
@@ -6,13 +6,17 @@ The output includes:
 (4) S3 URI for constraints baseline
 The output is then used as input into the next step in the pipeline that
 performs batch monitoring and scoring using the latest approved model.
+
+The registry is resolved with one list and one describe call, and the result
+is cached at module level, so warm invocations within REGISTRY_CACHE_TTL
+seconds make no SageMaker calls at all.
 """
 
 import logging
 import os
+import time
 
 import boto3
-import botocore
 import json
 from botocore.exceptions import ClientError
 
@@ -20,6 +24,12 @@ from botocore.exceptions import ClientError
 s3 = boto3.client("s3")
 sm_client = boto3.client("sagemaker")
 
+# Seconds a resolved model stays cached across warm invocations; 0 disables
+REGISTRY_CACHE_TTL = float(os.getenv("REGISTRY_CACHE_TTL", "300"))
+
+# Model package group name -> (expiry on the monotonic clock, handler output)
+_registry_cache = {}
+
 
 def lambda_handler(event, context):
     logger = logging.getLogger()
@@ -32,37 +42,31 @@ def lambda_handler(event, context):
     print(model_package_group_name)
     print(execution_role_arn)
 
-    try:
-
-        model_name = latest_model_name(model_package_group_name)
-        create_model(model_package_group_name, model_name, execution_role_arn)
-        model_package_arn = get_latest_model_version_arn(model_package_group_name)
-
-        s3_baseline_uri_response = sm_client.describe_model_package(
-            ModelPackageName=model_package_arn
-        )
+    cached = cached_resolution(model_package_group_name)
+    if cached is not None:
+        logger.info(f"Using the cached model package: {cached['modelArn']}")
+        return cached
 
-        s3_baseline_uri_statistics = s3_baseline_uri_response["ModelMetrics"][
-            "ModelDataQuality"
-        ]["Statistics"]["S3Uri"]
-        s3_baseline_uri_constraints = s3_baseline_uri_response["ModelMetrics"][
-            "ModelDataQuality"
-        ]["Constraints"]["S3Uri"]
+    try:
+        resolved = resolve_latest_model(model_package_group_name)
+        create_model(resolved, execution_role_arn)
 
         logger.info(
-            f"Identified the latest data quality baseline statistics for approved model package: {s3_baseline_uri_statistics}"
+            f"Identified the latest data quality baseline statistics for approved model package: {resolved['s3uriStatistics']}"
         )
         logger.info(
-            f"Identified the latest data quality baseline constraints for approved model package: {s3_baseline_uri_constraints}"
+            f"Identified the latest data quality baseline constraints for approved model package: {resolved['s3uriConstraints']}"
         )
 
-        return {
+        result = {
             "statusCode": 200,
-            "modelArn": model_package_arn,
-            "s3uriConstraints": s3_baseline_uri_constraints,
-            "s3uriStatistics": s3_baseline_uri_statistics,
-            "modelName": model_name,
+            "modelArn": resolved["modelArn"],
+            "s3uriConstraints": resolved["s3uriConstraints"],
+            "s3uriStatistics": resolved["s3uriStatistics"],
+            "modelName": resolved["modelName"],
         }
+        cache_resolution(model_package_group_name, result)
+        return result
 
     except ClientError as e:
         error_message = e.response["Error"]["Message"]
@@ -78,15 +82,38 @@ TAGS = [
 ]
 
 
-def latest_model_name(model_package_group_name):
+def cached_resolution(model_package_group_name, now=None):
+    """Returns the cached handler output of a group, or None when missing or expired."""
+    entry = _registry_cache.get(model_package_group_name)
+    now = time.monotonic() if now is None else now
+    if entry is None or entry[0] <= now:
+        return None
+    return dict(entry[1])
+
+
+def cache_resolution(model_package_group_name, result, now=None):
+    """Caches the handler output of a group for REGISTRY_CACHE_TTL seconds."""
+    if REGISTRY_CACHE_TTL <= 0:
+        return
+    now = time.monotonic() if now is None else now
+    _registry_cache[model_package_group_name] = (
+        now + REGISTRY_CACHE_TTL,
+        dict(result),
+    )
+
+
+def clear_cache():
+    """Forgets every cached resolution, e.g. after approving a new model version."""
+    _registry_cache.clear()
+
+
+def latest_model_name(model_package_arn):
     """
     Determines the latest model name to be used by batch transform.
     Extracts the model package group name and version from the ARN.
     """
-    model_package_group_arn = get_latest_model_version_arn(model_package_group_name)
-    print(model_package_group_arn)
     # Split the ARN to extract components
-    arn_parts = model_package_group_arn.split(":")
+    arn_parts = model_package_arn.split(":")
     if len(arn_parts) < 6:
         raise ValueError("Invalid model package group ARN format.")
 
@@ -104,42 +131,82 @@ def latest_model_name(model_package_group_name):
 
 
 def get_latest_model_version_arn(model_package_group_name):
-    """Fetches the latest model package ARN from a model package group."""
+    """Fetches the latest approved model package ARN from a model package group."""
     response = sm_client.list_model_packages(
         ModelPackageGroupName=model_package_group_name,
         ModelApprovalStatus="Approved",
         SortBy="CreationTime",
+        SortOrder="Descending",
+        MaxResults=1,
     )
+    if not response["ModelPackageSummaryList"]:
+        raise ValueError(
+            f"No approved model package in group '{model_package_group_name}'."
+        )
     return response["ModelPackageSummaryList"][0]["ModelPackageArn"]
 
 
-def create_model(model_package_group_name, model_name, execution_role_arn):
-    """Creates a SageMaker model with error handling for duplicate models."""
-    latest_model_arn = get_latest_model_version_arn(model_package_group_name)
-    model_details = sm_client.describe_model_package(ModelPackageName=latest_model_arn)
+def resolve_latest_model(model_package_group_name):
+    """Collects everything the pipeline needs about the latest approved model.
+
+    Args:
+        model_package_group_name (str): Model package group to query.
 
+    Returns:
+        dict: Model package ARN, model name, container image, model data URL,
+            container environment and the S3 URIs of the data quality baselines.
+    """
+    model_package_arn = get_latest_model_version_arn(model_package_group_name)
+    model_details = sm_client.describe_model_package(ModelPackageName=model_package_arn)
+    container = model_details["InferenceSpecification"]["Containers"][0]
+    data_quality = model_details["ModelMetrics"]["ModelDataQuality"]
+    return {
+        "modelArn": model_package_arn,
+        "modelName": latest_model_name(model_package_arn),
+        "image": container["Image"],
+        "modelDataUrl": container["ModelDataUrl"],
+        # SAGEMAKER_PROGRAM and SAGEMAKER_SUBMIT_DIRECTORY load inference.py
+        "environment": container.get("Environment", {}),
+        "s3uriStatistics": data_quality["Statistics"]["S3Uri"],
+        "s3uriConstraints": data_quality["Constraints"]["S3Uri"],
+    }
+
+
+def model_exists(model_name):
+    """Checks whether a SageMaker model with exactly this name exists."""
     try:
-        response = sm_client.create_model(
-            ModelName=model_name,
-            PrimaryContainer={
-                "Image": model_details["InferenceSpecification"]["Containers"][0][
-                    "Image"
-                ],
-                "ModelDataUrl": model_details["InferenceSpecification"]["Containers"][
-                    0
-                ]["ModelDataUrl"],
-            },
-            ExecutionRoleArn=execution_role_arn,
-            Tags=TAGS,
-        )
-        print(f"Created model: {model_name}")
-        return response
+        sm_client.describe_model(ModelName=model_name)
+    except ClientError as e:
+        if "Could not find model" in e.response["Error"]["Message"]:
+            return False
+        raise
+    return True
+
 
-    except botocore.exceptions.ClientError as e:
-        if e.response["Error"]["Code"] == "ValidationException":
-            print(f"Model '{model_name}' already exists. Using existing model.")
-        else:
-            print(f"An error occurred: {e}")
-            raise  # Re-raise unexpected errors
+def create_model(resolved, execution_role_arn):
+    """Creates the SageMaker model of a resolved model package unless it exists.
 
-    return None
+    Args:
+        resolved (dict): Output of `resolve_latest_model`.
+        execution_role_arn (str): Role the model runs under.
+
+    Returns:
+        dict: The create_model response, or None when the model already exists.
+    """
+    model_name = resolved["modelName"]
+    if model_exists(model_name):
+        print(f"Model '{model_name}' already exists. Using existing model.")
+        return None
+
+    response = sm_client.create_model(
+        ModelName=model_name,
+        PrimaryContainer={
+            "Image": resolved["image"],
+            "ModelDataUrl": resolved["modelDataUrl"],
+            "Environment": resolved["environment"],
+        },
+        ExecutionRoleArn=execution_role_arn,
+        Tags=TAGS,
+    )
+    print(f"Created model: {model_name}")
+    return response
@@ -1,15 +1,18 @@
 import os
 import sys
+import importlib.util
 import pytest
 import pandas as pd
 from datetime import datetime, timedelta
+from unittest.mock import patch
 
 # Set up path to import script
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.join(current_dir, "..", "inference_scripts")
 sys.path.append(parent_dir)
 
-from data_processing import process_data
+from data_processing import process_data, process_data_incremental
+from feature_cache import FeatureCache
 
 
 @pytest.fixture
@@ -56,3 +59,56 @@ def test_process_data_nan_free(sample_sp500_data):
     assert (
         not processed.isnull().values.any()
     ), "Processed data should not contain NaN values"
+
+
+def test_process_data_incremental_matches_full_recompute(sample_sp500_data, tmp_path):
+    state_path = str(tmp_path / "feature_state.json")
+
+    # First run builds the state, the next run only applies the new bar
+    process_data_incremental(sample_sp500_data.iloc[:-1].copy(), state_path)
+    incremental = process_data_incremental(sample_sp500_data.copy(), state_path)
+
+    expected = process_data(sample_sp500_data.copy()).reset_index(drop=True)
+    pd.testing.assert_frame_equal(incremental, expected, check_exact=True)
+
+
+def test_process_data_returns_the_latest_rows(sample_sp500_data):
+    latest = process_data(sample_sp500_data.copy())
+    window = process_data(sample_sp500_data.copy(), rows=30)
+
+    assert window.shape == (30, latest.shape[1])
+    pd.testing.assert_frame_equal(window.tail(1), latest)
+
+
+def test_process_data_incremental_returns_the_latest_rows(sample_sp500_data, tmp_path):
+    state_path = str(tmp_path / "feature_state.json")
+
+    process_data_incremental(sample_sp500_data.iloc[:-1].copy(), state_path, rows=30)
+    window = process_data_incremental(sample_sp500_data.copy(), state_path, rows=30)
+
+    expected = process_data(sample_sp500_data.copy(), rows=30).reset_index(drop=True)
+    pd.testing.assert_frame_equal(window, expected, check_exact=True)
+
+
+def test_process_data_reuses_the_training_cache_entry(sample_sp500_data, tmp_path):
+    # Both scripts are named data_processing, so load training's under another name
+    spec = importlib.util.spec_from_file_location(
+        "training_data_processing",
+        os.path.join(current_dir, "..", "training_scripts", "data_processing.py"),
+    )
+    training = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(training)
+    input_path = tmp_path / "sp500_input.csv"
+    sample_sp500_data.to_csv(input_path, index=False)
+    raw = pd.read_csv(input_path)
+    cache = FeatureCache(str(tmp_path / "cache"))
+
+    training.process_data(
+        str(input_path), str(tmp_path / "train"), training.HORIZONS, cache=cache
+    )
+    with patch("data_processing.build_features", side_effect=AssertionError):
+        cached = process_data(raw.copy(), cache, rows=30)
+
+    expected = process_data(raw.copy(), rows=30)
+    pd.testing.assert_frame_equal(cached, expected, check_exact=True)
+    assert len(os.listdir(tmp_path / "cache")) == 1
@@ -1,6 +1,9 @@
+import io
 import os
 import sys
+import json
 import pytest
+from botocore.response import StreamingBody
 from unittest.mock import patch, MagicMock
 
 # Set up path to import script
@@ -11,6 +14,19 @@ sys.path.append(parent_dir)
 from lambda_detectviolation import *
 
 
+def report_body(violations):
+    data = json.dumps({"violations": violations}).encode("utf-8")
+    return StreamingBody(io.BytesIO(data), len(data))
+
+
+def violation(feature, check="baseline_drift_check"):
+    return {
+        "feature_name": feature,
+        "constraint_check_type": check,
+        "description": f"{feature} drifted",
+    }
+
+
 @pytest.fixture
 def fake_event():
     return {
@@ -26,13 +42,13 @@ def test_data_drift_triggers_retraining(
     mock_trigger, mock_notify, mock_get_object, fake_event
 ):
     # Mock S3 to return a JSON with violations
-    mock_get_object.return_value = {
-        "Body": MagicMock(read=lambda: b'{"violations": ["example_violation"]}')
-    }
+    mock_get_object.return_value = {"Body": report_body([violation("Close")])}
 
     lambda_handler(fake_event, None)
 
-    mock_notify.assert_called_once_with(fake_event["SNS_topic_arn"])
+    mock_notify.assert_called_once()
+    assert mock_notify.call_args.args[0] == fake_event["SNS_topic_arn"]
+    assert mock_notify.call_args.args[1]["top_features"] == {"Close": 1}
     mock_trigger.assert_called_once_with(fake_event["sagemaker_pipeline_name"])
 
 
@@ -43,11 +59,103 @@ def test_no_data_drift_does_not_trigger(
     fake_trigger, fake_notify, mock_get_object, fake_event
 ):
     # Mock S3 to return a JSON with no violations
-    mock_get_object.return_value = {
-        "Body": MagicMock(read=lambda: b'{"violations": []}')
-    }
+    mock_get_object.return_value = {"Body": report_body([])}
 
     lambda_handler(fake_event, None)
 
     fake_notify.assert_not_called()
     fake_trigger.assert_not_called()
+
+
+def test_violations_are_parsed_across_any_chunk_boundary():
+    violations = [violation(f"Feature_{i}", "data_type_check") for i in range(5)]
+    report = json.dumps({"violations": violations}, indent=2).encode("utf-8")
+
+    for size in [1, 7, 64, len(report)]:
+        chunks = [report[i : i + size] for i in range(0, len(report), size)]
+        assert list(iter_violations(chunks)) == violations
+
+
+def test_truncated_report_is_rejected():
+    report = json.dumps({"violations": [violation("Close")] * 3}).encode("utf-8")
+    with pytest.raises(ValueError):
+        list(iter_violations([report[:-20]]))
+
+
+def test_summary_counts_per_check_and_feature():
+    violations = [
+        violation("Close"),
+        violation("Close", "data_type_check"),
+        violation("Volume"),
+    ]
+
+    summary = summarize_violations(violations, {"data_type_check": 3.0})
+
+    assert summary["total"] == 3
+    assert summary["severity"] == 5.0
+    assert summary["features_violated"] == 2
+    assert summary["by_check"] == {"baseline_drift_check": 2, "data_type_check": 1}
+    assert summary["top_features"] == {"Close": 2, "Volume": 1}
+
+
+@patch("lambda_detectviolation.s3_client.get_object")
+@patch("lambda_detectviolation.send_sns_notification")
+@patch("lambda_detectviolation.trigger_retraining")
+def test_violations_below_the_severity_threshold_do_not_trigger(
+    mock_trigger, mock_notify, mock_get_object, fake_event
+):
+    mock_get_object.return_value = {
+        "Body": report_body([violation("Close", "extra_column_check")])
+    }
+    fake_event["severity_weights"] = {"extra_column_check": 0.2}
+
+    summary = lambda_handler(fake_event, None)
+
+    assert summary["severity"] == pytest.approx(0.2)
+    mock_notify.assert_not_called()
+    mock_trigger.assert_not_called()
+
+
+@patch("lambda_detectviolation.sns_client")
+def test_notification_includes_the_summary(mock_sns):
+    summary = summarize_violations([violation("Close"), violation("Volume")])
+
+    send_sns_notification("arn:aws:sns:us-east-1:123456789012:MyTopic", summary)
+
+    message = json.loads(mock_sns.publish.call_args.kwargs["Message"])
+    assert message["Summary"] == summary
+    assert "Close (1)" in message["Message"]
+    assert "Model Monitor" not in message["Message"]
+
+
+@patch("lambda_detectviolation.s3_client.get_object")
+@patch("lambda_detectviolation.send_sns_notification")
+@patch("lambda_detectviolation.trigger_retraining")
+def test_missing_report_fails_the_step(
+    mock_trigger, mock_notify, mock_get_object, fake_event
+):
+    mock_get_object.side_effect = s3_client.exceptions.NoSuchKey(
+        {"Error": {"Code": "NoSuchKey", "Message": "Not Found"}}, "GetObject"
+    )
+
+    with pytest.raises(s3_client.exceptions.NoSuchKey):
+        lambda_handler(fake_event, None)
+    mock_notify.assert_not_called()
+    mock_trigger.assert_not_called()
+
+
+@patch("lambda_detectviolation.s3_client.get_object")
+@patch("lambda_detectviolation.send_sns_notification")
+@patch("lambda_detectviolation.trigger_retraining")
+def test_unreadable_report_fails_the_step(
+    mock_trigger, mock_notify, mock_get_object, fake_event
+):
+    report = json.dumps({"violations": [violation("Close")] * 3}).encode("utf-8")
+    mock_get_object.return_value = {
+        "Body": StreamingBody(io.BytesIO(report[:-20]), len(report) - 20)
+    }
+
+    with pytest.raises(ValueError):
+        lambda_handler(fake_event, None)
+    mock_notify.assert_not_called()
+    mock_trigger.assert_not_called()
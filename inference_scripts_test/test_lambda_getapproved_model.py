@@ -1,6 +1,9 @@
 import os
 import sys
+import boto3
 import pytest
+from botocore.exceptions import ClientError
+from botocore.stub import Stubber
 from unittest.mock import patch, MagicMock
 
 # Set up path to import script
@@ -9,6 +12,113 @@ parent_dir = os.path.join(current_dir, "..", "inference_scripts")
 sys.path.append(parent_dir)
 
 from lambda_getapproved_model import *
+import lambda_getapproved_model
+
+GROUP = "my-model-group"
+PACKAGE_ARN = "arn:aws:sagemaker:us-east-1:123456789012:model-package/my-model-group/5"
+ROLE_ARN = "arn:aws:iam::123456789012:role/SageMakerRole"
+ENVIRONMENT = {
+    "SAGEMAKER_PROGRAM": "inference.py",
+    "SAGEMAKER_SUBMIT_DIRECTORY": "s3://my-bucket/sourcedir.tar.gz",
+}
+
+PACKAGE_DETAILS = {
+    "ModelPackageName": "my-model-group",
+    "ModelPackageArn": PACKAGE_ARN,
+    "CreationTime": "2024-01-01T00:00:00Z",
+    "ModelPackageStatus": "Completed",
+    "ModelPackageStatusDetails": {"ValidationStatuses": []},
+    "InferenceSpecification": {
+        "Containers": [
+            {
+                "Image": "123456789012.dkr.ecr.us-east-1.amazonaws.com/my-image",
+                "ModelDataUrl": "s3://my-bucket/model.tar.gz",
+                "Environment": ENVIRONMENT,
+            }
+        ],
+        "SupportedContentTypes": ["text/csv"],
+        "SupportedResponseMIMETypes": ["text/csv"],
+    },
+    "ModelMetrics": {
+        "ModelDataQuality": {
+            "Statistics": {
+                "ContentType": "application/json",
+                "S3Uri": "s3://my-bucket/statistics.json",
+            },
+            "Constraints": {
+                "ContentType": "application/json",
+                "S3Uri": "s3://my-bucket/constraints.json",
+            },
+        }
+    },
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    clear_cache()
+    yield
+    clear_cache()
+
+
+@pytest.fixture
+def stubbed_client():
+    client = boto3.client("sagemaker", region_name="us-east-1")
+    with Stubber(client) as stubber, patch.object(
+        lambda_getapproved_model, "sm_client", client
+    ):
+        yield stubber
+        stubber.assert_no_pending_responses()
+
+
+def expect_registry_lookup(stubber):
+    stubber.add_response(
+        "list_model_packages",
+        {
+            "ModelPackageSummaryList": [
+                {
+                    "ModelPackageGroupName": GROUP,
+                    "ModelPackageArn": PACKAGE_ARN,
+                    "CreationTime": "2024-01-01T00:00:00Z",
+                    "ModelPackageStatus": "Completed",
+                }
+            ]
+        },
+        {
+            "ModelPackageGroupName": GROUP,
+            "ModelApprovalStatus": "Approved",
+            "SortBy": "CreationTime",
+            "SortOrder": "Descending",
+            "MaxResults": 1,
+        },
+    )
+    stubber.add_response(
+        "describe_model_package",
+        PACKAGE_DETAILS,
+        {"ModelPackageName": PACKAGE_ARN},
+    )
+
+
+def expect_model_lookup(stubber, exists):
+    if exists:
+        stubber.add_response(
+            "describe_model",
+            {
+                "ModelName": "my-model-group-5",
+                "ModelArn": "arn:aws:sagemaker:us-east-1:123456789012:model/my-model-group-5",
+                "CreationTime": "2024-01-01T00:00:00Z",
+            },
+            {"ModelName": "my-model-group-5"},
+        )
+    else:
+        stubber.add_client_error(
+            "describe_model",
+            service_error_code="ValidationException",
+            service_message="Could not find model "
+            '"arn:aws:sagemaker:us-east-1:123456789012:model/my-model-group-5".',
+            http_status_code=400,
+            expected_params={"ModelName": "my-model-group-5"},
+        )
 
 
 @pytest.fixture
@@ -62,3 +172,79 @@ def test_lambda_handler_success(mock_sm_client, mock_event):
     assert "s3uriStatistics" in response
     assert "modelName" in response
     assert response["modelName"] == "my-model-group-5"
+
+
+def test_one_list_and_one_describe_call_create_a_missing_model(
+    stubbed_client, mock_event
+):
+    expect_registry_lookup(stubbed_client)
+    expect_model_lookup(stubbed_client, exists=False)
+    stubbed_client.add_response(
+        "create_model",
+        {"ModelArn": "arn:aws:sagemaker:us-east-1:123456789012:model/my-model"},
+        {
+            "ModelName": "my-model-group-5",
+            "PrimaryContainer": {
+                "Image": "123456789012.dkr.ecr.us-east-1.amazonaws.com/my-image",
+                "ModelDataUrl": "s3://my-bucket/model.tar.gz",
+                # The inference.py handlers registered with the package
+                "Environment": ENVIRONMENT,
+            },
+            "ExecutionRoleArn": ROLE_ARN,
+            "Tags": TAGS,
+        },
+    )
+
+    response = lambda_handler(mock_event, None)
+
+    assert response == {
+        "statusCode": 200,
+        "modelArn": PACKAGE_ARN,
+        "s3uriConstraints": "s3://my-bucket/constraints.json",
+        "s3uriStatistics": "s3://my-bucket/statistics.json",
+        "modelName": "my-model-group-5",
+    }
+
+
+def test_existing_model_is_not_created_again(stubbed_client, mock_event):
+    expect_registry_lookup(stubbed_client)
+    expect_model_lookup(stubbed_client, exists=True)
+
+    assert lambda_handler(mock_event, None)["modelName"] == "my-model-group-5"
+
+
+def test_warm_invocations_reuse_the_resolution(stubbed_client, mock_event):
+    expect_registry_lookup(stubbed_client)
+    expect_model_lookup(stubbed_client, exists=True)
+
+    first = lambda_handler(mock_event, None)
+    # The stubber fails on any call without a queued response
+    second = lambda_handler(mock_event, None)
+
+    assert second == first
+
+
+def test_other_model_lookup_errors_are_raised(stubbed_client):
+    stubbed_client.add_client_error(
+        "describe_model", service_error_code="ThrottlingException"
+    )
+
+    with pytest.raises(ClientError):
+        model_exists("my-model-group-5")
+
+
+def test_cached_resolution_expires(mock_event):
+    cache_resolution(GROUP, {"modelArn": PACKAGE_ARN}, now=0.0)
+
+    assert cached_resolution(GROUP, now=1.0) == {"modelArn": PACKAGE_ARN}
+    assert cached_resolution(GROUP, now=REGISTRY_CACHE_TTL) is None
+    assert cached_resolution("other-group", now=1.0) is None
+
+
+def test_group_without_approved_models_is_rejected(stubbed_client):
+    stubbed_client.add_response(
+        "list_model_packages", {"ModelPackageSummaryList": []}, None
+    )
+
+    with pytest.raises(ValueError):
+        resolve_latest_model(GROUP)
@@ -0,0 +1,632 @@
+import os
+import sys
+import json
+import shutil
+import hashlib
+import inspect
+import logging
+import argparse
+import tarfile
+import subprocess
+from datetime import datetime, timezone
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TRAINING_SCRIPTS = os.path.join(REPO_DIR, "training_scripts")
+INFERENCE_SCRIPTS = os.path.join(REPO_DIR, "inference_scripts")
+sys.path.append(TRAINING_SCRIPTS)
+
+# Same registration threshold, holdout and model package group as the
+# SageMaker pipelines
+PRECISION_THRESHOLD = 0.52
+HOLDOUT_ROWS = 1000
+MODEL_PACKAGE_GROUP = "StockPredictionModels"
+
+SUCCESS_FILE = "_SUCCESS"
+LOG_FILE = "step.log"
+
+
+def setup_logging():
+    """Sets up logging configuration."""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+
+
+class Output:
+    """Reference to a path inside the output directory of a step.
+
+    Resolved when the pipeline runs; `Output()` refers to the step's own
+    output directory.
+
+    Args:
+        step (str, optional): Name of the producing step.
+        path (str): Path relative to that step's output directory.
+    """
+
+    def __init__(self, step=None, path=""):
+        self.step = step
+        self.path = path
+
+
+class ConditionNotMet(Exception):
+    """Raised by a condition step to stop its dependents, like a FailStep."""
+
+
+class Step:
+    """A pipeline step run as a local subprocess or an in-process function.
+
+    Steps are cached by the content hash of their code, their arguments
+    and environment, the keys of the steps they read from and the content
+    of their external input files; a step with an unchanged hash reuses
+    its previous output instead of running again. An uncached step, such
+    as a fetch of new data, always runs, and its dependents are keyed on
+    the content of its output.
+
+    Args:
+        name (str): Unique step name.
+        script (str, optional): Python script run with `args`.
+        function (callable, optional): Called as function(output_dir, *args).
+        args (list): Arguments; Output references are replaced by paths.
+        env (dict, optional): Extra environment variables for scripts.
+        inputs (list): External files or directories whose content is hashed.
+        depends_on (list): Extra step names to wait for.
+        cache (bool): Whether a previous output may be reused.
+    """
+
+    def __init__(
+        self,
+        name,
+        script=None,
+        function=None,
+        args=(),
+        env=None,
+        inputs=(),
+        depends_on=(),
+        cache=True,
+    ):
+        if (script is None) == (function is None):
+            raise ValueError(f"Step {name} needs exactly one of script or function.")
+        self.name = name
+        self.script = script
+        self.function = function
+        self.args = list(args)
+        self.env = dict(env or {})
+        self.inputs = list(inputs)
+        self.cache = cache
+        references = [
+            value.step
+            for value in self.args + list(self.env.values())
+            if isinstance(value, Output) and value.step is not None
+        ]
+        self.depends_on = list(dict.fromkeys(references + list(depends_on)))
+
+
+def hash_path(digest, path):
+    """Adds the content of a file, or of every file under a directory, to `digest`."""
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                hash_path(digest, file_path)
+    else:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+
+def code_digest(step):
+    """Returns the hash of the code a step runs.
+
+    Every step may import the shared modules in training_scripts/, so
+    those are part of every step's code, together with the script or, for
+    function steps, the function's source.
+    """
+    digest = hashlib.sha256()
+    if step.script:
+        hash_path(digest, step.script)
+    else:
+        digest.update(inspect.getsource(step.function).encode())
+    for name in sorted(os.listdir(TRAINING_SCRIPTS)):
+        if name.endswith(".py"):
+            hash_path(digest, os.path.join(TRAINING_SCRIPTS, name))
+    return digest.hexdigest()
+
+
+def output_digest(output_dir):
+    """Returns the hash of the files a step published, without its log."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(output_dir)):
+        if name not in (LOG_FILE, SUCCESS_FILE):
+            digest.update(name.encode())
+            hash_path(digest, os.path.join(output_dir, name))
+    return digest.hexdigest()
+
+
+class LocalPipeline:
+    """Runs a step graph locally with content-hash caching and parallel steps.
+
+    Each step writes to work_dir/steps/<name>-<key>, where the key hashes
+    everything the step depends on. Downstream keys include upstream keys,
+    or the output hash of an uncached upstream step, so a change anywhere
+    re-runs exactly the affected steps.
+
+    Args:
+        steps (list): Steps of the graph.
+        work_dir (str): Directory holding step outputs and logs.
+        max_workers (int): Steps allowed to run at the same time.
+    """
+
+    def __init__(self, steps, work_dir, max_workers=4):
+        self.steps = {step.name: step for step in steps}
+        self.work_dir = work_dir
+        self.max_workers = max_workers
+        self.keys = {}
+        # Step name -> what its dependents' keys hash: its own key, or the
+        # hash of its output when it is not cached
+        self.upstream_keys = {}
+        for step in steps:
+            for dependency in step.depends_on:
+                if dependency not in self.steps:
+                    raise ValueError(
+                        f"Step {step.name} depends on unknown step {dependency}"
+                    )
+
+    def output_dir(self, name):
+        """Returns the output directory of a step whose key is known."""
+        return os.path.join(self.work_dir, "steps", f"{name}-{self.keys[name][:16]}")
+
+    def _resolve(self, step, value, own_dir):
+        if not isinstance(value, Output):
+            return str(value)
+        base = own_dir if value.step is None else self.output_dir(value.step)
+        return os.path.join(base, value.path) if value.path else base
+
+    def step_key(self, step):
+        """Hashes the step's code, arguments, environment, upstream keys and inputs."""
+        digest = hashlib.sha256(code_digest(step).encode())
+        for value in step.args + sorted(step.env.items()):
+            if isinstance(value, tuple):
+                digest.update(value[0].encode())
+                value = value[1]
+            if isinstance(value, Output):
+                upstream = self.upstream_keys[value.step] if value.step else "self"
+                digest.update(f"<{upstream}>/{value.path}".encode())
+            else:
+                digest.update(repr(value).encode())
+        for dependency in step.depends_on:
+            digest.update(self.upstream_keys[dependency].encode())
+        for path in step.inputs:
+            hash_path(digest, path)
+        return digest.hexdigest()
+
+    def _execute(self, step):
+        """Runs one step into a fresh directory and publishes it on success."""
+        final_dir = self.output_dir(step.name)
+        self.upstream_keys[step.name] = self.keys[step.name]
+        if step.cache and os.path.exists(os.path.join(final_dir, SUCCESS_FILE)):
+            return "cached"
+
+        # The step writes to a temporary directory renamed on success, so an
+        # interrupted step never looks complete
+        tmp_dir = final_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        args = [self._resolve(step, value, tmp_dir) for value in step.args]
+        env = {
+            name: self._resolve(step, value, tmp_dir)
+            for name, value in step.env.items()
+        }
+
+        if step.script:
+            log_path = os.path.join(tmp_dir, LOG_FILE)
+            with open(log_path, "w") as log:
+                result = subprocess.run(
+                    [sys.executable, step.script] + args,
+                    cwd=REPO_DIR,
+                    env=dict(os.environ, **env),
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+            if result.returncode != 0:
+                raise RuntimeError(
+                    f"exited with status {result.returncode}, see {log_path}"
+                )
+        else:
+            step.function(tmp_dir, *args)
+
+        open(os.path.join(tmp_dir, SUCCESS_FILE), "w").close()
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(tmp_dir, final_dir)
+        if not step.cache:
+            # Its key is unchanged when it fetches new data, so its
+            # dependents are keyed on what it wrote
+            self.upstream_keys[step.name] = output_digest(final_dir)
+        return "ran"
+
+    def run(self):
+        """Runs every step whose dependencies succeeded, independent steps in parallel.
+
+        Returns:
+            dict: Step name -> "ran", "cached", "failed", "stopped" or "skipped".
+        """
+        status = {}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(status) < len(self.steps):
+                progressed = False
+                for name, step in self.steps.items():
+                    if name in status or name in running.values():
+                        continue
+                    upstream = [status.get(d) for d in step.depends_on]
+                    if any(s in ("failed", "stopped", "skipped") for s in upstream):
+                        status[name] = "skipped"
+                        logging.info(f"[{name}] skipped")
+                        progressed = True
+                    elif all(s in ("ran", "cached") for s in upstream):
+                        self.keys[name] = self.step_key(step)
+                        logging.info(f"[{name}] started ({self.keys[name][:12]})")
+                        running[executor.submit(self._execute, step)] = name
+                        progressed = True
+
+                if not running:
+                    if not progressed:
+                        raise ValueError("The step graph contains a cycle.")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        status[name] = future.result()
+                    except ConditionNotMet as e:
+                        status[name] = "stopped"
+                        logging.warning(f"[{name}] condition not met: {e}")
+                        continue
+                    except Exception as e:
+                        status[name] = "failed"
+                        logging.error(f"[{name}] failed: {e}")
+                        continue
+                    logging.info(f"[{name}] {status[name]} -> {self.output_dir(name)}")
+        return status
+
+
+######################### Local model registry #########################
+
+
+def registry_dir(work_dir):
+    """Returns the directory of the local model package group."""
+    return os.path.join(work_dir, "registry", MODEL_PACKAGE_GROUP)
+
+
+def register_model(output_dir, registry, model_dir, evaluation_dir):
+    """Registers model.tar.gz as a new approved version unless it is already registered.
+
+    Args:
+        output_dir (str): Step output directory; receives registration.json.
+        registry (str): Directory of the local model package group.
+        model_dir (str): Directory containing model.tar.gz.
+        evaluation_dir (str): Directory containing evaluation.json.
+
+    Returns:
+        str: Directory of the registered version.
+    """
+    archive = os.path.join(model_dir, "model.tar.gz")
+    digest = hashlib.sha256()
+    hash_path(digest, archive)
+    model_hash = digest.hexdigest()
+
+    os.makedirs(registry, exist_ok=True)
+    versions = sorted(int(name) for name in os.listdir(registry) if name.isdigit())
+    for version in versions:
+        with open(os.path.join(registry, str(version), "metadata.json")) as f:
+            if json.load(f)["model_hash"] == model_hash:
+                logging.info(f"Model already registered as version {version}")
+                break
+    else:
+        version = (versions[-1] + 1) if versions else 1
+        publish_version(registry, version, archive, evaluation_dir, model_hash)
+
+    with open(os.path.join(output_dir, "registration.json"), "w") as f:
+        json.dump({"version": version, "model_hash": model_hash}, f)
+    return os.path.join(registry, str(version))
+
+
+def publish_version(registry, version, archive, evaluation_dir, model_hash):
+    """Writes a new approved version directory atomically."""
+    version_dir = os.path.join(registry, str(version))
+    tmp_dir = version_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    shutil.copy(archive, tmp_dir)
+    shutil.copy(os.path.join(evaluation_dir, "evaluation.json"), tmp_dir)
+    with open(os.path.join(tmp_dir, "metadata.json"), "w") as f:
+        json.dump(
+            {
+                "version": version,
+                "approval_status": "Approved",
+                "model_hash": model_hash,
+                "created": datetime.now(timezone.utc).isoformat(),
+            },
+            f,
+            indent=2,
+        )
+    os.replace(tmp_dir, version_dir)
+    logging.info(f"Registered model version {version}")
+
+
+def latest_approved_model(registry):
+    """Returns the directory of the newest approved version, or None."""
+    if not os.path.isdir(registry):
+        return None
+    for version in sorted(
+        (int(name) for name in os.listdir(registry) if name.isdigit()), reverse=True
+    ):
+        version_dir = os.path.join(registry, str(version))
+        with open(os.path.join(version_dir, "metadata.json")) as f:
+            if json.load(f)["approval_status"] == "Approved":
+                return version_dir
+    return None
+
+
+######################### Function steps #########################
+
+
+def copy_input(output_dir, input_path, file_format):
+    """Stands in for ingestion by copying a local OHLCV file."""
+    from artifact_io import artifact_path, read_frame, write_frame
+
+    write_frame(
+        read_frame(input_path), artifact_path(output_dir, "sp500_input", file_format)
+    )
+
+
+def package_model(output_dir, model_dir):
+    """Packs the model directory into model.tar.gz, as SageMaker does after training."""
+    with tarfile.open(os.path.join(output_dir, "model.tar.gz"), "w:gz") as tar:
+        for name in sorted(os.listdir(model_dir)):
+            tar.add(os.path.join(model_dir, name), arcname=name)
+
+
+def check_precision(output_dir, evaluation_dir, threshold):
+    """Passes only if the evaluated precision reaches the registration threshold."""
+    with open(os.path.join(evaluation_dir, "evaluation.json")) as f:
+        precision = json.load(f)["precision"]
+    if precision < float(threshold):
+        raise ConditionNotMet(f"precision {precision:.4f} is below {threshold}")
+
+
+def batch_transform(output_dir, model_dir, input_path):
+    """Scores the processed rows with the serving handlers of inference.py."""
+    from inference import input_fn, output_fn, predict_fn
+    from model_archive import load_model_archive
+
+    model, _ = load_model_archive(os.path.join(model_dir, "model.tar.gz"))
+    with open(input_path, "rb") as f:
+        body, _ = output_fn(
+            predict_fn(input_fn(f.read(), "text/csv"), model), "text/csv"
+        )
+    with open(os.path.join(output_dir, "predictions.csv"), "w") as f:
+        f.write(body)
+
+
+######################### Step graphs #########################
+
+
+def ingestion_step(scripts_dir, args):
+    """Fetches market data, or copies `args.input_path` or generates synthetic data when asked."""
+    if args.synthetic_seed is not None:
+        # Seeded and deterministic, so the generated data can be reused
+        return Step(
+            "DataIngestion",
+            script=os.path.join(TRAINING_SCRIPTS, "synthetic_market.py"),
+            args=[
+                "--years-to-filter",
+                args.years,
+                "--output-dir",
+                Output(),
+                "--format",
+                args.format,
+                "--seed",
+                args.synthetic_seed,
+            ],
+        )
+    if args.input_path:
+        return Step(
+            "DataIngestion",
+            function=copy_input,
+            args=[args.input_path, args.format],
+            inputs=[args.input_path],
+        )
+    return Step(
+        "DataIngestion",
+        script=os.path.join(scripts_dir, "data_ingestion.py"),
+        args=[
+            "--years-to-filter",
+            args.years,
+            "--output-dir",
+            Output(),
+            "--format",
+            args.format,
+        ],
+        # Market data changes daily, so a fetch is never reused
+        cache=False,
+    )
+
+
+def training_steps(args):
+    """Builds the local equivalent of sagemaker_training_pipeline.py."""
+    train_path = Output("DataProcessing", f"train.{args.format}")
+    steps = [
+        ingestion_step(TRAINING_SCRIPTS, args),
+        Step(
+            "DataProcessing",
+            script=os.path.join(TRAINING_SCRIPTS, "data_processing.py"),
+            args=[
+                "--input_path",
+                Output("DataIngestion", f"sp500_input.{args.format}"),
+                "--output_dir",
+                Output(),
+                "--format",
+                args.format,
+            ],
+        ),
+        Step(
+            "ModelTraining",
+            script=os.path.join(TRAINING_SCRIPTS, "train_model.py"),
+            args=["--holdout-rows", str(HOLDOUT_ROWS)],
+            env={
+                "SM_MODEL_DIR": Output(),
+                "SM_CHANNEL_TRAIN": Output("DataProcessing"),
+            },
+        ),
+        Step("ModelPackaging", function=package_model, args=[Output("ModelTraining")]),
+        Step(
+            "ModelEvaluation",
+            script=os.path.join(TRAINING_SCRIPTS, "evaluate_model.py"),
+            args=[
+                "--input-path",
+                train_path,
+                "--model-path",
+                Output("ModelPackaging"),
+                "--output-path",
+                Output(),
+                "--holdout-rows",
+                str(HOLDOUT_ROWS),
+            ],
+        ),
+        Step(
+            "CheckPrecision",
+            function=check_precision,
+            args=[Output("ModelEvaluation"), PRECISION_THRESHOLD],
+        ),
+        Step(
+            "StockRegisterModel",
+            function=register_model,
+            args=[
+                registry_dir(args.work_dir),
+                Output("ModelPackaging"),
+                Output("ModelEvaluation"),
+            ],
+            depends_on=["CheckPrecision"],
+            # Registration changes the registry, so it always runs
+            cache=False,
+        ),
+    ]
+    if args.backtest:
+        # Independent of training, so it runs alongside it
+        steps.append(
+            Step(
+                "Backtest",
+                script=os.path.join(TRAINING_SCRIPTS, "backtest.py"),
+                args=[
+                    "--input-path",
+                    train_path,
+                    "--output-path",
+                    Output(),
+                    "--start",
+                    args.backtest_start,
+                    "--step",
+                    args.backtest_step,
+                ],
+            )
+        )
+    return steps
+
+
+def inference_steps(args):
+    """Builds the local equivalent of sagemaker_inference_pipeline.py."""
+    model_dir = latest_approved_model(registry_dir(args.work_dir))
+    if model_dir is None:
+        raise ValueError(
+            "No approved model in the local registry; run the training pipeline first."
+        )
+    logging.info(f"Using approved model {model_dir}")
+
+    state_path = os.path.join(args.work_dir, "state", "feature_state.json")
+    return [
+        ingestion_step(INFERENCE_SCRIPTS, args),
+        Step(
+            "DataPreprocessing",
+            script=os.path.join(INFERENCE_SCRIPTS, "data_processing.py"),
+            args=[
+                "--input_dir",
+                Output("DataIngestion"),
+                "--output_dir",
+                Output(),
+                "--state_path",
+                state_path,
+            ],
+            # Updates the persisted feature state
+            cache=False,
+        ),
+        Step(
+            "BatchTransform",
+            function=batch_transform,
+            args=[model_dir, Output("DataPreprocessing", "sp500_processed.csv")],
+            inputs=[model_dir],
+        ),
+    ]
+
+
+def main():
+    """Main function to run a pipeline locally."""
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Run the training or inference pipeline locally without AWS."
+    )
+    parser.add_argument("pipeline", choices=["training", "inference"])
+    parser.add_argument(
+        "--work-dir",
+        type=str,
+        default=".local_pipeline",
+        help="Directory for step outputs, the step cache and the local model registry.",
+    )
+    parser.add_argument(
+        "--input-path",
+        type=str,
+        default=None,
+        help="Local OHLCV CSV or Parquet file used instead of downloading data.",
+    )
+    parser.add_argument(
+        "--years", type=int, default=30, help="Years of history to fetch."
+    )
+    parser.add_argument(
+        "--synthetic-seed",
+        type=int,
+        default=None,
+        help="Generate synthetic market data with this seed instead of fetching.",
+    )
+    parser.add_argument("--format", type=str, default="csv", choices=["csv", "parquet"])
+    parser.add_argument(
+        "--backtest", action="store_true", help="Also run the walk-forward backtest."
+    )
+    parser.add_argument(
+        "--backtest-start", type=int, default=2500, help="First backtest test row."
+    )
+    parser.add_argument(
+        "--backtest-step", type=int, default=250, help="Rows between backtest refits."
+    )
+    parser.add_argument(
+        "--max-workers", type=int, default=4, help="Steps allowed to run in parallel."
+    )
+    args = parser.parse_args()
+    args.work_dir = os.path.abspath(args.work_dir)
+    if args.input_path:
+        args.input_path = os.path.abspath(args.input_path)
+
+    steps = (
+        training_steps(args) if args.pipeline == "training" else inference_steps(args)
+    )
+    status = LocalPipeline(steps, args.work_dir, args.max_workers).run()
+    for name, result in status.items():
+        print(f"{name}: {result}")
+    if any(result in ("failed", "stopped") for result in status.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -15,13 +15,6 @@ from sagemaker.workflow.lambda_step import (
     LambdaOutput,
     LambdaOutputTypeEnum,
 )
-from sagemaker.workflow.monitor_batch_transform_step import MonitorBatchTransformStep
-from sagemaker.workflow.check_job_config import CheckJobConfig
-from sagemaker.workflow.quality_check_step import (
-    DataQualityCheckConfig,
-    QualityCheckStep,
-)
-from sagemaker.model_monitor import DatasetFormat
 
 ############################### Set up session and role ###############################
 region = "us-east-2"
@@ -36,6 +29,8 @@ role = f"arn:aws:iam::{account}:role/service-role/AmazonSageMakerServiceCatalogP
 years_to_filter = ParameterString(name="Historical_Years", default_value="10")
 instance_type = ParameterString(name="InstanceType", default_value="ml.m4.xlarge")
 instance_count = ParameterInteger(name="InstanceCount", default_value=1)
+# "csv" or "parquet" for the ingested data; batch transform input stays CSV
+artifact_format = ParameterString(name="ArtifactFormat", default_value="csv")
 input_data = ParameterString(
     name="InputData",
     default_value="s3://aws-portfolio-projects/snp500-data/inference_data/processed/sp500_processed.csv",
@@ -48,6 +43,19 @@ output_data = ParameterString(
 # Enable step caching to avoid reprocessing unchanged steps
 cache_config = CacheConfig(enable_caching=True, expire_after="T3h")
 
+# Shared modules imported by the processing scripts
+shared_code_input = sagemaker.processing.ProcessingInput(
+    input_name="lib",
+    source="training_scripts",
+    destination="/opt/ml/processing/input/lib",
+)
+# Persistent OHLCV history store, shared with the training pipeline
+ohlcv_store_uri = "s3://aws-portfolio-projects/snp500-data/ohlcv_store/"
+# Rolling feature state, resumed by each daily preprocessing run
+feature_state_uri = (
+    "s3://aws-portfolio-projects/snp500-data/inference_data/feature_state/"
+)
+
 ######################### Step 1: Data Ingestion #########################
 image_uri = "930627915954.dkr.ecr.us-east-2.amazonaws.com/stockmodel-image:latest"
 data_ingestion_processor = ScriptProcessor(
@@ -61,53 +69,39 @@ data_ingestion_processor = ScriptProcessor(
 ingestion_step = ProcessingStep(
     name="DataIngestion",
     processor=data_ingestion_processor,
-    inputs=[],
+    inputs=[
+        shared_code_input,
+        sagemaker.processing.ProcessingInput(
+            input_name="ohlcv_store",
+            source=ohlcv_store_uri,
+            destination="/opt/ml/processing/store",
+        ),
+    ],
     outputs=[
         sagemaker.processing.ProcessingOutput(
             output_name="ingested",
             source="/opt/ml/processing/output",
             destination="s3://aws-portfolio-projects/snp500-data/inference_data/input/",
-        )
-    ],
-    code="inference_scripts/data_ingestion.py",
-    cache_config=cache_config,
-    job_arguments=["--years-to-filter", years_to_filter],
-)
-
-######################### Step 2: Data Preprocessing #########################
-data_preprocessor = SKLearnProcessor(
-    framework_version="1.0-1", role=role, instance_type="ml.m5.large", instance_count=1
-)
-
-processing_step = ProcessingStep(
-    name="DataPreprocessing",
-    processor=data_preprocessor,
-    inputs=[
-        sagemaker.processing.ProcessingInput(
-            source=ingestion_step.properties.ProcessingOutputConfig.Outputs[
-                "ingested"
-            ].S3Output.S3Uri,
-            destination="/opt/ml/processing/input",
-        )
-    ],
-    outputs=[
+        ),
         sagemaker.processing.ProcessingOutput(
-            output_name="processed",
-            source="/opt/ml/processing/output/train",
-            destination="s3://aws-portfolio-projects/snp500-data/inference_data/processed/",
-        )
+            output_name="ohlcv_store",
+            source="/opt/ml/processing/store",
+            destination=ohlcv_store_uri,
+        ),
     ],
-    code="inference_scripts/data_processing.py",
+    code="inference_scripts/data_ingestion.py",
     cache_config=cache_config,
     job_arguments=[
-        "--input_dir",
-        "/opt/ml/processing/input/",
-        "--output_dir",
-        "/opt/ml/processing/output/train",
+        "--years-to-filter",
+        years_to_filter,
+        "--store-dir",
+        "/opt/ml/processing/store",
+        "--format",
+        artifact_format,
     ],
 )
 
-######################### Step 3: Fetch Approved Model from Lambda #########################
+######################### Step 2: Fetch Approved Model from Lambda #########################
 lambda_role = "arn:aws:iam::930627915954:role/sagemaker-pipeline-lambda-role"
 function_name = "getapprovedmodelname-sagemaker-step"
 model_package_group_name = "StockPredictionModels"
@@ -154,14 +148,93 @@ lambda_getmodel_step = LambdaStep(
     ],
 )
 
-######################### Step 4: Batch Transform with Monitoring #########################
+######################### Step 3: Data Preprocessing and Drift Detection #########################
+# Drift is checked against the approved model's baseline inside this step,
+# which writes constraint_violations.json where Model Monitor used to
+monitoring_reports_uri = "s3://aws-portfolio-projects/snp500-data/monitoring_artifacts/data-quality-monitor-reports/"
+
+data_preprocessor = SKLearnProcessor(
+    framework_version="1.0-1", role=role, instance_type="ml.m5.large", instance_count=1
+)
+
+processing_step = ProcessingStep(
+    name="DataPreprocessing",
+    processor=data_preprocessor,
+    inputs=[
+        shared_code_input,
+        sagemaker.processing.ProcessingInput(
+            source=ingestion_step.properties.ProcessingOutputConfig.Outputs[
+                "ingested"
+            ].S3Output.S3Uri,
+            destination="/opt/ml/processing/input",
+        ),
+        sagemaker.processing.ProcessingInput(
+            input_name="feature_state",
+            source=feature_state_uri,
+            destination="/opt/ml/processing/state",
+        ),
+        # Data quality baseline registered with the approved model
+        sagemaker.processing.ProcessingInput(
+            input_name="baseline_statistics",
+            source=lambda_getmodel_step.properties.Outputs["s3uriStatistics"],
+            destination="/opt/ml/processing/baseline/statistics",
+        ),
+        sagemaker.processing.ProcessingInput(
+            input_name="baseline_constraints",
+            source=lambda_getmodel_step.properties.Outputs["s3uriConstraints"],
+            destination="/opt/ml/processing/baseline/constraints",
+        ),
+    ],
+    outputs=[
+        sagemaker.processing.ProcessingOutput(
+            output_name="processed",
+            source="/opt/ml/processing/output/train",
+            destination="s3://aws-portfolio-projects/snp500-data/inference_data/processed/",
+        ),
+        sagemaker.processing.ProcessingOutput(
+            output_name="feature_state",
+            source="/opt/ml/processing/state",
+            destination=feature_state_uri,
+        ),
+        # Read by the retraining trigger in Step 5
+        sagemaker.processing.ProcessingOutput(
+            output_name="monitoring",
+            source="/opt/ml/processing/monitoring",
+            destination=monitoring_reports_uri,
+        ),
+    ],
+    code="inference_scripts/data_processing.py",
+    cache_config=cache_config,
+    job_arguments=[
+        "--input_dir",
+        "/opt/ml/processing/input/",
+        "--output_dir",
+        "/opt/ml/processing/output/train",
+        # The feature state makes each run O(new bars), cheaper than a hit
+        # in the training pipeline's feature cache, which is therefore not mounted
+        "--state_path",
+        "/opt/ml/processing/state/feature_state.json",
+        "--baseline_statistics",
+        "/opt/ml/processing/baseline/statistics",
+        "--baseline_constraints",
+        "/opt/ml/processing/baseline/constraints",
+        "--violations_dir",
+        "/opt/ml/processing/monitoring",
+    ],
+)
+
+######################### Step 4: Batch Transform #########################
 transformer = Transformer(
     model_name=lambda_getmodel_step.properties.Outputs["modelName"],
     instance_count=instance_count.default_value,
     instance_type=instance_type.default_value,
     output_path=output_data.default_value,
     sagemaker_session=pipeline_session,
-    strategy="SingleRecord",
+    # Each request carries up to max_payload MB of CSV lines (a feature row is
+    # ~200 bytes, so tens of thousands of rows) that inference.input_fn parses
+    # into one matrix and predict_fn scores in a single call
+    strategy="MultiRecord",
+    max_payload=6,
     assemble_with="Line",
 )
 
@@ -169,30 +242,11 @@ transform_arg = transformer.transform(
     input_data.default_value, content_type="text/csv", split_type="Line"
 )
 
-batch_monitor_reports_output_path = "s3://aws-portfolio-projects/snp500-data/monitoring_artifacts/data-quality-monitor-reports/"
-
-job_config = CheckJobConfig(role=role)
-data_quality_config = DataQualityCheckConfig(
-    baseline_dataset=processing_step.properties.ProcessingOutputConfig.Outputs[
-        "processed"
-    ].S3Output.S3Uri,
-    dataset_format=DatasetFormat.csv(header=False),
-    output_s3_uri=batch_monitor_reports_output_path,
-)
-
-transform_and_monitor_step = MonitorBatchTransformStep(
-    name="MonitorStockDataQuality",
-    transform_step_args=transform_arg,
-    monitor_configuration=data_quality_config,
-    check_job_configuration=job_config,
-    monitor_before_transform=True,
-    fail_on_violation=False,
-    supplied_baseline_statistics=lambda_getmodel_step.properties.Outputs[
-        "s3uriStatistics"
-    ],
-    supplied_baseline_constraints=lambda_getmodel_step.properties.Outputs[
-        "s3uriConstraints"
-    ],
+transform_step = TransformStep(
+    name="StockBatchTransform",
+    step_args=transform_arg,
+    # The input is the processed file written by the preprocessing step
+    depends_on=["DataPreprocessing"],
 )
 
 ######################### Step 5: Trigger Retraining if Violation Detected #########################
@@ -216,7 +270,7 @@ lambda_retrainmodel_step = LambdaStep(
         "sagemaker_pipeline_name": training_pipeline_name,
         "SNS_topic_arn": topic_arn,
     },
-    depends_on=["MonitorStockDataQuality"],
+    depends_on=["DataPreprocessing"],
 )
 
 ######################### Execute Pipeline #########################
@@ -228,12 +282,13 @@ pipeline = Pipeline(
         instance_count,
         input_data,
         output_data,
+        artifact_format,
     ],
     steps=[
         ingestion_step,
-        processing_step,
         lambda_getmodel_step,
-        transform_and_monitor_step,
+        processing_step,
+        transform_step,
         lambda_retrainmodel_step,
     ],
 )
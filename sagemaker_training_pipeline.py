@@ -7,12 +7,6 @@ from sagemaker.workflow.pipeline_context import PipelineSession
 from sagemaker.workflow.parameters import ParameterString, ParameterFloat
 from sagemaker.workflow.steps import ProcessingStep, TrainingStep, CacheConfig
 from sagemaker.sklearn.processing import SKLearnProcessor, ScriptProcessor
-from sagemaker.workflow.quality_check_step import (
-    DataQualityCheckConfig,
-    QualityCheckStep,
-)
-from sagemaker.workflow.check_job_config import CheckJobConfig
-from sagemaker.model_monitor import DatasetFormat
 from sagemaker.workflow.functions import Join
 from sagemaker.workflow.execution_variables import ExecutionVariables
 from sagemaker.model_metrics import ModelMetrics, MetricsSource
@@ -43,8 +37,32 @@ train_instance_type = ParameterString(
 model_approval_status = ParameterString(
     name="ModelApprovalStatus", default_value="Approved"
 )
+# "csv" or "parquet"; Parquet needs pyarrow in the processing and training images
+artifact_format = ParameterString(name="ArtifactFormat", default_value="csv")
+# "standard" or "hist"; training_metrics.json in the model artifact records
+# the time and peak memory of each run for instance right-sizing
+training_mode = ParameterString(name="TrainingMode", default_value="standard")
+# Most recent rows left out of training and scored by the evaluation step;
+# 1000 fills every trailing window of evaluation.json
+holdout_rows = ParameterString(name="HoldoutRows", default_value="1000")
+# Most recent fraction of the training rows used for early stopping (0
+# disables it), and XGBoost threads (0 uses every core)
+validation_fraction = ParameterString(name="ValidationFraction", default_value="0.0")
+training_threads = ParameterString(name="TrainingThreads", default_value="0")
 cache_config = CacheConfig(enable_caching=True, expire_after="T3h")
 
+# Shared modules imported by the processing scripts
+shared_code_input = sagemaker.processing.ProcessingInput(
+    input_name="lib",
+    source="training_scripts",
+    destination="/opt/ml/processing/input/lib",
+)
+# Persistent OHLCV history store, updated incrementally by data ingestion
+ohlcv_store_uri = "s3://aws-portfolio-projects/snp500-data/ohlcv_store/"
+# Persistent feature cache; processing containers start empty, so entries are
+# downloaded before and uploaded after each preprocessing job
+feature_cache_uri = "s3://aws-portfolio-projects/snp500-data/feature_cache/"
+
 ######################### Step 1: Data Ingestion ######################################
 image_uri = "930627915954.dkr.ecr.us-east-2.amazonaws.com/stockmodel-image:latest"
 data_ingestion_processor = ScriptProcessor(
@@ -57,17 +75,36 @@ data_ingestion_processor = ScriptProcessor(
 step_data_ingestion = ProcessingStep(
     name="DataIngestion",
     processor=data_ingestion_processor,
-    inputs=[],
+    inputs=[
+        shared_code_input,
+        sagemaker.processing.ProcessingInput(
+            input_name="ohlcv_store",
+            source=ohlcv_store_uri,
+            destination="/opt/ml/processing/store",
+        ),
+    ],
     outputs=[
         sagemaker.processing.ProcessingOutput(
             output_name="snp500",
             source="/opt/ml/processing/output",
             destination="s3://aws-portfolio-projects/snp500-data/input_data/",
         ),
+        sagemaker.processing.ProcessingOutput(
+            output_name="ohlcv_store",
+            source="/opt/ml/processing/store",
+            destination=ohlcv_store_uri,
+        ),
     ],
     code="training_scripts/data_ingestion.py",
     cache_config=cache_config,
-    job_arguments=["--years-to-filter", years_to_filter],
+    job_arguments=[
+        "--years-to-filter",
+        years_to_filter,
+        "--store-dir",
+        "/opt/ml/processing/store",
+        "--format",
+        artifact_format,
+    ],
 )
 
 ######################### Step 2: Data Preprocessing ####################################
@@ -78,41 +115,72 @@ step_data_processing = ProcessingStep(
     name="DataPreprocessing",
     processor=preprocessor,
     inputs=[
+        shared_code_input,
         sagemaker.processing.ProcessingInput(
             source=step_data_ingestion.properties.ProcessingOutputConfig.Outputs[
                 "snp500"
             ].S3Output.S3Uri,
             destination="/opt/ml/processing/input",
-        )
+        ),
+        sagemaker.processing.ProcessingInput(
+            input_name="feature_cache",
+            source=feature_cache_uri,
+            destination="/opt/ml/processing/cache",
+        ),
     ],
     outputs=[
         sagemaker.processing.ProcessingOutput(
             output_name="train_data",
             source="/opt/ml/processing/output/train",
             destination="s3://aws-portfolio-projects/snp500-data/train_data/",
-        )
+        ),
+        # Data quality baseline of the features, computed while writing them
+        sagemaker.processing.ProcessingOutput(
+            output_name="baseline",
+            source="/opt/ml/processing/output/baseline",
+            destination="s3://aws-portfolio-projects/snp500-data/monitoring_artifacts/baseline/",
+        ),
+        sagemaker.processing.ProcessingOutput(
+            output_name="feature_cache",
+            source="/opt/ml/processing/cache",
+            destination=feature_cache_uri,
+        ),
     ],
     code="training_scripts/data_processing.py",
     cache_config=cache_config,
     job_arguments=[
         "--input_path",
-        "/opt/ml/processing/input/snp500.csv",
+        Join(on=".", values=["/opt/ml/processing/input/sp500_input", artifact_format]),
         "--output_dir",
         "/opt/ml/processing/output/train",
+        "--format",
+        artifact_format,
+        "--baseline_dir",
+        "/opt/ml/processing/output/baseline",
+        "--cache_dir",
+        "/opt/ml/processing/cache",
     ],
 )
 
 ######################### Step 3: Model Training #####################################
 xgboost_estimator = XGBoost(
-    entry_point="training_scripts/train_model.py",
+    entry_point="train_model.py",
+    source_dir="training_scripts",
     role=role,
     instance_count=1,
-    instance_type="ml.m5.large",
-    framework_version="1.5-1",
+    instance_type=train_instance_type,
+    # 1.7 is the first release with the QuantileDMatrix used by hist mode
+    framework_version="1.7-1",
     py_version="py3",
     output_path="s3://aws-portfolio-projects/snp500-data/model_artifacts/",
     base_job_name="xgboost-stockmarket-training-job",
     disable_profiler=True,
+    hyperparameters={
+        "mode": training_mode,
+        "holdout-rows": holdout_rows,
+        "validation-fraction": validation_fraction,
+        "nthread": training_threads,
+    },
 )
 step_train = TrainingStep(
     name="ModelTrainingStep",
@@ -131,7 +199,7 @@ step_train = TrainingStep(
 ######################### Step 4: Model Evaluation ######################################
 evaluation_processor = EvalScriptProcessor(
     image_uri=sagemaker.image_uris.retrieve(
-        framework="xgboost", region=sagemaker_session.boto_region_name, version="1.5-1"
+        framework="xgboost", region=sagemaker_session.boto_region_name, version="1.7-1"
     ),
     command=["python3"],
     instance_type="ml.m5.large",
@@ -147,6 +215,7 @@ step_evaluation = ProcessingStep(
     name="ModelEvaluation",
     processor=evaluation_processor,
     inputs=[
+        shared_code_input,
         sagemaker.processing.ProcessingInput(
             source=step_train.properties.ModelArtifacts.S3ModelArtifacts,
             destination="/opt/ml/processing/model",
@@ -170,44 +239,24 @@ step_evaluation = ProcessingStep(
     cache_config=cache_config,
     job_arguments=[
         "--input-path",
-        "/opt/ml/processing/input/train.csv",
+        Join(on=".", values=["/opt/ml/processing/input/train", artifact_format]),
         "--model-path",
         "/opt/ml/processing/model",
         "--output-path",
         "/opt/ml/processing/evaluation",
+        "--holdout-rows",
+        holdout_rows,
     ],
 )
 
 ######################### Step 5: Data quality baseline for drift detection ##########################
-check_job_config = CheckJobConfig(
-    role=role,
-    instance_count=1,
-    instance_type="ml.c5.xlarge",
-    volume_size_in_gb=120,
-    sagemaker_session=sagemaker_session,
-)
-data_quality_check_config = DataQualityCheckConfig(
-    baseline_dataset="s3://aws-portfolio-projects/snp500-data/train_data/features.csv",
-    dataset_format=DatasetFormat.csv(header=True),
-    output_s3_uri=Join(
-        on="/",
-        values=[
-            "s3:/",
-            "aws-portfolio-projects",
-            "snp500-data/monitoring_artifacts",
-            "data-quality-monitor-reports",
-        ],
-    ),
-)
-baseline_model_data_step = QualityCheckStep(
-    name="DataQualityCheckStep",
-    skip_check=True,
-    register_new_baseline=True,
-    quality_check_config=data_quality_check_config,
-    check_job_config=check_job_config,
-    model_package_group_name="StockPredictionModels",
-    depends_on=["ModelEvaluation"],
-)
+# statistics.json and constraints.json are written by the preprocessing step
+# in the same pass as features.csv, so no separate baselining job runs
+baseline_uri = step_data_processing.properties.ProcessingOutputConfig.Outputs[
+    "baseline"
+].S3Output.S3Uri
+baseline_statistics_uri = Join(on="/", values=[baseline_uri, "statistics.json"])
+baseline_constraints_uri = Join(on="/", values=[baseline_uri, "constraints.json"])
 
 ######################### Step 6: Conditional model registration based on evaluation ##########################
 model_metrics = ModelMetrics(
@@ -216,21 +265,21 @@ model_metrics = ModelMetrics(
         content_type="application/json",
     ),
     model_data_statistics=MetricsSource(
-        s3_uri=baseline_model_data_step.properties.CalculatedBaselineStatistics,
+        s3_uri=baseline_statistics_uri,
         content_type="application/json",
     ),
     model_data_constraints=MetricsSource(
-        s3_uri=baseline_model_data_step.properties.CalculatedBaselineConstraints,
+        s3_uri=baseline_constraints_uri,
         content_type="application/json",
     ),
 )
 drift_check_baselines = DriftCheckBaselines(
     model_data_statistics=MetricsSource(
-        s3_uri=baseline_model_data_step.properties.BaselineUsedForDriftCheckStatistics,
+        s3_uri=baseline_statistics_uri,
         content_type="application/json",
     ),
     model_data_constraints=MetricsSource(
-        s3_uri=baseline_model_data_step.properties.BaselineUsedForDriftCheckConstraints,
+        s3_uri=baseline_constraints_uri,
         content_type="application/json",
     ),
 )
@@ -238,6 +287,10 @@ step_register = RegisterModel(
     name="StockRegisterModel",
     estimator=xgboost_estimator,
     model_data=step_train.properties.ModelArtifacts.S3ModelArtifacts,
+    # Serve with the vectorized handlers in inference.py instead of the
+    # training entry point
+    entry_point="inference.py",
+    source_dir="training_scripts",
     content_types=["text/csv"],
     response_types=["text/csv"],
     inference_instances=["ml.m5.large"],
@@ -248,11 +301,15 @@ step_register = RegisterModel(
     drift_check_baselines=drift_check_baselines,
 )
 
-# Define precision threshold condition
+# Define precision threshold condition. Any metric of evaluation.json can be
+# gated on, e.g. "windows.last_250.f1" or "rolling.precision.min"
+evaluation_metric = "precision"
 precision_threshold = 0.52
 condition = ConditionGreaterThanOrEqualTo(
     left=JsonGet(
-        step=step_evaluation, property_file=evaluation_report, json_path="precision"
+        step=step_evaluation,
+        property_file=evaluation_report,
+        json_path=evaluation_metric,
     ),
     right=precision_threshold,
 )
@@ -260,7 +317,12 @@ step_fail = FailStep(
     name="StockModelFail",
     error_message=Join(
         on=" ",
-        values=["Execution failed due to Precision score <", str(precision_threshold)],
+        values=[
+            "Execution failed due to",
+            evaluation_metric,
+            "<",
+            str(precision_threshold),
+        ],
     ),
 )
 step_conditional_register = ConditionStep(
@@ -274,7 +336,16 @@ step_conditional_register = ConditionStep(
 ################################################ Execute Pipeline ##################################
 pipeline = Pipeline(
     name="StockTrainingPipeline",
-    parameters=[years_to_filter, train_instance_type, model_approval_status],
+    parameters=[
+        years_to_filter,
+        train_instance_type,
+        model_approval_status,
+        artifact_format,
+        training_mode,
+        holdout_rows,
+        validation_fraction,
+        training_threads,
+    ],
     steps=[
         step_data_ingestion,
         step_data_processing,
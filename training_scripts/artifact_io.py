@@ -0,0 +1,171 @@
+import os
+import logging
+import pandas as pd
+
+# Supported formats for data handed between pipeline stages, mapped to file extensions
+ARTIFACT_FORMATS = {"csv": ".csv", "parquet": ".parquet"}
+PARQUET_COMPRESSION = "zstd"
+
+
+def artifact_format(path):
+    """Infers the artifact format from a file extension, defaulting to CSV."""
+    if path.endswith(ARTIFACT_FORMATS["parquet"]):
+        return "parquet"
+    return "csv"
+
+
+def artifact_path(directory, name, file_format="csv"):
+    """Builds the path of an artifact, e.g. ("out", "train", "parquet") -> out/train.parquet."""
+    if file_format not in ARTIFACT_FORMATS:
+        raise ValueError(
+            f"Unsupported artifact format '{file_format}'. "
+            f"Expected one of {sorted(ARTIFACT_FORMATS)}."
+        )
+    return os.path.join(directory, name + ARTIFACT_FORMATS[file_format])
+
+
+def find_artifact(directory, name):
+    """Returns the path of an existing artifact, preferring the columnar format.
+
+    Args:
+        directory (str): Directory to look in.
+        name (str): Artifact name without extension, e.g. "train".
+
+    Returns:
+        str: Path of the Parquet file if present, otherwise of the CSV file.
+    """
+    parquet_path = artifact_path(directory, name, "parquet")
+    if os.path.exists(parquet_path):
+        return parquet_path
+    return artifact_path(directory, name, "csv")
+
+
+def write_frame(data, path, index=False):
+    """Writes a dataframe as CSV or compressed Parquet depending on the extension.
+
+    Parquet keeps column dtypes (including tz-aware dates), so readers skip
+    float-to-text round trips and date re-parsing. A named index that should
+    be kept is stored as a regular column so both formats read back alike.
+
+    Args:
+        data (pd.DataFrame): Dataframe to write.
+        path (str): Destination file path.
+        index (bool): Whether to write the index as a column.
+    """
+    logging.info(f"Writing {len(data)} rows to {path}")
+    if artifact_format(path) == "parquet":
+        frame = data.reset_index() if index else data
+        frame.to_parquet(path, index=False, compression=PARQUET_COMPRESSION)
+    else:
+        data.to_csv(path, index=index)
+
+
+def read_frame(path, columns=None):
+    """Reads a CSV or Parquet artifact, loading only `columns` when given.
+
+    Args:
+        path (str): Path of the artifact.
+        columns (list, optional): Columns to load (column projection).
+
+    Returns:
+        pd.DataFrame: Loaded dataframe.
+    """
+    if artifact_format(path) == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns, parse_dates=True)
+
+
+def read_columns(path):
+    """Returns the column names of an artifact without loading its rows."""
+    if artifact_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_schema(path).names
+    return pd.read_csv(path, nrows=0).columns.to_list()
+
+
+def iter_frames(path, chunk_rows, columns=None):
+    """Reads a CSV or Parquet artifact in consecutive chunks of about `chunk_rows` rows.
+
+    Only one chunk is held in memory at a time. Chunks have the same columns
+    and dtypes as `read_frame` would return.
+
+    Args:
+        path (str): Path of the artifact.
+        chunk_rows (int): Rows per chunk.
+        columns (list, optional): Columns to load (column projection).
+
+    Yields:
+        pd.DataFrame: The next chunk, in file order.
+    """
+    if artifact_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(
+            path, usecols=columns, parse_dates=True, chunksize=chunk_rows
+        )
+
+
+class FrameWriter:
+    """Writes a dataframe chunk by chunk to one CSV or Parquet artifact.
+
+    CSV chunks are appended below a single header; Parquet chunks become
+    row groups of one file. Every chunk must have the columns and dtypes
+    of the first. Empty chunks are skipped, unless all of them are empty.
+
+    Args:
+        path (str): Destination file path.
+        header (bool): Whether CSV output starts with a header line.
+    """
+
+    def __init__(self, path, header=True):
+        self.path = path
+        self.header = header
+        self.rows = 0
+        self._parquet_writer = None
+        self._empty = None
+
+    def write(self, data):
+        """Appends `data` to the artifact."""
+        if data.empty:
+            # Columns of empty object chunks have no Parquet type yet
+            self._empty = data
+            return
+        if artifact_format(self.path) == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(data, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(
+                    self.path, table.schema, compression=PARQUET_COMPRESSION
+                )
+            self._parquet_writer.write_table(table)
+        else:
+            data.to_csv(
+                self.path,
+                index=False,
+                mode="w" if self.rows == 0 else "a",
+                header=self.header and self.rows == 0,
+            )
+        self.rows += len(data)
+
+    def close(self):
+        """Finishes the file; returns the number of rows written."""
+        if self.rows == 0 and self._empty is not None:
+            write_frame(self._empty, self.path)
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        logging.info(f"Wrote {self.rows} rows to {self.path}")
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
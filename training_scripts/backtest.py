@@ -0,0 +1,255 @@
+import os
+import sys
+import json
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import precision_score
+
+# Shared modules are shipped to this directory by the SageMaker processing steps
+sys.path.append("/opt/ml/processing/input/lib")
+
+from artifact_io import read_frame
+from feature_registry import parse_feature_list
+from shared_data import get_shared, open_shared, shared_arrays, split_threads
+from train_model import NUM_BOOST_ROUND, XGB_PARAMS
+
+
+def setup_logging():
+    """Sets up logging configuration."""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+
+
+def walk_forward_folds(n_rows, start, step, window=None):
+    """Splits `n_rows` time-ordered rows into walk-forward folds.
+
+    Each fold trains on the rows before its test block and predicts the
+    next `step` rows. With `window` set, only the last `window` rows are
+    used for training; otherwise the training set expands from row 0.
+
+    Args:
+        n_rows (int): Number of rows in the dataset.
+        start (int): Index of the first test row.
+        step (int): Rows predicted per fold, i.e. the refit interval.
+        window (int, optional): Rolling training window length in rows.
+
+    Returns:
+        list: (train_start, test_start, test_end) row indices per fold.
+    """
+    if start < 1 or step < 1:
+        raise ValueError("start and step must be positive.")
+    if window is not None and window < 1:
+        raise ValueError("window must be positive.")
+
+    folds = []
+    for test_start in range(start, n_rows, step):
+        train_start = 0 if window is None else max(0, test_start - window)
+        folds.append((train_start, test_start, min(test_start + step, n_rows)))
+    return folds
+
+
+def _run_fold(fold, feature_names, params, num_boost_round):
+    """Retrains on the fold's training rows and predicts its test block."""
+    train_start, test_start, test_end = fold
+    x, y, nthread = get_shared()
+    dtrain = xgb.DMatrix(
+        x[train_start:test_start],
+        label=y[train_start:test_start],
+        feature_names=feature_names,
+        nthread=nthread,
+    )
+    model = xgb.train(
+        dict(params, nthread=nthread), dtrain, num_boost_round=num_boost_round
+    )
+    dtest = xgb.DMatrix(
+        x[test_start:test_end], feature_names=feature_names, nthread=nthread
+    )
+    return (model.predict(dtest) >= 0.5).astype(int)
+
+
+def backtest(
+    data,
+    features,
+    start=2500,
+    step=250,
+    window=None,
+    max_workers=None,
+    params=XGB_PARAMS,
+    num_boost_round=NUM_BOOST_ROUND,
+):
+    """Runs a walk-forward backtest, retraining the model for every fold.
+
+    The feature matrix is written once to a temporary .npy file that every
+    worker memory-maps read-only (see `shared_data`), so folds only ship
+    their row bounds to the process pool. Boosting threads are split
+    between the workers to avoid oversubscribing the CPUs.
+
+    Args:
+        data (pd.DataFrame): Time-ordered data containing features and target.
+        features (list): List of feature column names.
+        start (int): Index of the first test row.
+        step (int): Rows predicted per fold, i.e. the refit interval.
+        window (int, optional): Rolling training window length in rows;
+            the training set expands when omitted.
+        max_workers (int, optional): Worker processes; defaults to the CPU count.
+        params (dict): XGBoost training parameters.
+        num_boost_round (int): Number of boosting rounds per fold.
+
+    Returns:
+        pd.DataFrame: Target and Predictions for every tested row, with the fold number.
+        dict: Per-fold and aggregate precision.
+    """
+    folds = walk_forward_folds(len(data), start, step, window)
+    if not folds:
+        raise ValueError(f"start={start} leaves no rows to test in {len(data)} rows.")
+
+    max_workers, nthread = split_threads(max_workers, len(folds))
+    logging.info(
+        f"Backtesting {len(folds)} folds on {max_workers} workers "
+        f"with {nthread} threads each"
+    )
+
+    with shared_arrays(data, features) as (features_path, target_path):
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=open_shared,
+            initargs=(features_path, target_path, nthread),
+        ) as executor:
+            fold_predictions = list(
+                executor.map(
+                    _run_fold,
+                    folds,
+                    [features] * len(folds),
+                    [params] * len(folds),
+                    [num_boost_round] * len(folds),
+                )
+            )
+
+    test_start = folds[0][1]
+    predictions = pd.DataFrame(
+        {
+            "Target": data["Target"].iloc[test_start:].to_numpy(dtype=int),
+            "Predictions": np.concatenate(fold_predictions),
+            "Fold": np.concatenate(
+                [
+                    np.full(test_end - fold_start, i)
+                    for i, (_, fold_start, test_end) in enumerate(folds)
+                ]
+            ),
+        },
+        index=data.index[test_start:],
+    )
+    return predictions, summarize(predictions, folds)
+
+
+def summarize(predictions, folds):
+    """Computes per-fold and aggregate precision of the backtest predictions.
+
+    Args:
+        predictions (pd.DataFrame): Output of `backtest`.
+        folds (list): Folds as returned by `walk_forward_folds`.
+
+    Returns:
+        dict: {"folds": [...], "aggregate": {...}}.
+    """
+    fold_metrics = []
+    for i, (train_start, test_start, test_end) in enumerate(folds):
+        fold = predictions[predictions["Fold"] == i]
+        fold_metrics.append(
+            {
+                "fold": i,
+                "train_start": train_start,
+                "test_start": test_start,
+                "test_end": test_end,
+                "predicted_up": int(fold["Predictions"].sum()),
+                "precision": precision_score(
+                    fold["Target"], fold["Predictions"], zero_division=0
+                ),
+            }
+        )
+
+    return {
+        "folds": fold_metrics,
+        "aggregate": {
+            "folds": len(folds),
+            "rows": len(predictions),
+            "predicted_up": int(predictions["Predictions"].sum()),
+            "precision": precision_score(
+                predictions["Target"], predictions["Predictions"], zero_division=0
+            ),
+            "mean_fold_precision": float(
+                np.mean([fold["precision"] for fold in fold_metrics])
+            ),
+        },
+    }
+
+
+def save_results(predictions, metrics, output_dir):
+    """Saves the backtest predictions and metrics to the output directory."""
+    os.makedirs(output_dir, exist_ok=True)
+    predictions.to_csv(os.path.join(output_dir, "backtest_predictions.csv"))
+    results_path = os.path.join(output_dir, "backtest.json")
+    with open(results_path, "w") as f:
+        json.dump(metrics, f, indent=2)
+    logging.info(f"Backtest results saved to {results_path}")
+
+
+def main():
+    """Main function to load the training data, run the backtest and save the results."""
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Walk-forward backtest of the XGBoost model."
+    )
+    parser.add_argument(
+        "--input-path", type=str, required=True, help="Path to the training data."
+    )
+    parser.add_argument(
+        "--output-path", type=str, required=True, help="Directory to save results."
+    )
+    parser.add_argument(
+        "--start", type=int, default=2500, help="Index of the first test row."
+    )
+    parser.add_argument(
+        "--step", type=int, default=250, help="Rows predicted between refits."
+    )
+    parser.add_argument(
+        "--window",
+        type=int,
+        default=None,
+        help="Rolling training window in rows; expanding when omitted.",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Worker processes; defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Comma-separated feature names; defaults to all horizon features.",
+    )
+    args = parser.parse_args()
+
+    features = parse_feature_list(args.features)
+    data = read_frame(args.input_path, columns=features + ["Target"])
+    predictions, metrics = backtest(
+        data, features, args.start, args.step, args.window, args.max_workers
+    )
+
+    aggregate = metrics["aggregate"]
+    logging.info(
+        f"Precision over {aggregate['folds']} folds: {aggregate['precision']:.4f}"
+    )
+    save_results(predictions, metrics, args.output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+import os
+import json
+import logging
+import numpy as np
+
+from drift_detector import CONSTRAINTS_FILE, STATISTICS_FILE
+
+# Items kept per level of a quantile sketch; the rank error is about
+# log2(n / k) / k, under 0.5% for a billion values
+SKETCH_SIZE = 2048
+
+# Equal-width buckets of the distribution in statistics.json, as written by
+# the Model Monitor baselining job
+NUM_BUCKETS = 10
+
+# Distribution comparison threshold written to constraints.json
+COMPARISON_THRESHOLD = 0.1
+
+
+class QuantileSketch:
+    """Mergeable KLL-style quantile sketch.
+
+    Values enter level 0. When a level holds more than `k` items it is
+    sorted and every other item, from a random offset, is promoted to the
+    next level with twice the weight; an odd item out, the smallest or the
+    largest at random so quantiles are not biased either way, stays
+    behind, so the total weight always equals the number of values. Memory is
+    O(k log(n / k)), and two sketches merge by concatenating their levels.
+
+    Args:
+        k (int): Capacity of each level.
+        seed (int): Seed of the compaction offsets.
+    """
+
+    def __init__(self, k=SKETCH_SIZE, seed=0):
+        self.k = k
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Adds an array of values."""
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compact()
+
+    def merge(self, other):
+        """Adds every value summarized by another sketch."""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self._compact()
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self.k:
+                items = np.sort(items)
+                # An odd item out keeps its weight at this level
+                if len(items) % 2 == 0:
+                    kept, pairs = items[:0], items
+                elif self._rng.integers(2):
+                    kept, pairs = items[-1:], items[:-1]
+                else:
+                    kept, pairs = items[:1], items[1:]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], pairs[self._rng.integers(2) :: 2]]
+                )
+                self.levels[level] = kept
+            level += 1
+
+    def weighted_items(self):
+        """Returns the sorted items and their weights."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(level_items), 2.0**level)
+                for level, level_items in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(items, kind="stable")
+        return items[order], weights[order]
+
+    def quantile(self, q):
+        """Returns the approximate q-quantiles, q in [0, 1]."""
+        items, weights = self.weighted_items()
+        ranks = np.cumsum(weights) - weights / 2
+        return np.interp(np.asarray(q) * weights.sum(), ranks, items)
+
+    def histogram(self, edges):
+        """Returns the approximate number of values in each bucket of `edges`."""
+        items, weights = self.weighted_items()
+        return np.histogram(items, bins=edges, weights=weights)[0]
+
+
+def lag_moments(previous, current):
+    """Returns the co-moments of (previous, current) value pairs, per column.
+
+    Args:
+        previous (np.ndarray): Values of each row's previous row.
+        current (np.ndarray): Values of the rows, same shape.
+
+    Returns:
+        np.ndarray: (6, n_columns) count, means, sums of squared deviations
+            and co-moment of the pairs where both values are present.
+    """
+    both = ~(np.isnan(previous) | np.isnan(current))
+    count = both.sum(axis=0).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_a = np.nan_to_num(np.where(both, previous, 0.0).sum(axis=0) / count)
+        mean_b = np.nan_to_num(np.where(both, current, 0.0).sum(axis=0) / count)
+    delta_a = np.where(both, previous - mean_a, 0.0)
+    delta_b = np.where(both, current - mean_b, 0.0)
+    return np.array(
+        [
+            count,
+            mean_a,
+            mean_b,
+            (delta_a**2).sum(axis=0),
+            (delta_b**2).sum(axis=0),
+            (delta_a * delta_b).sum(axis=0),
+        ]
+    )
+
+
+class BaselineSummary:
+    """One-pass, mergeable data quality baseline of feature columns.
+
+    Holds per feature the present and missing counts, min, max, and the
+    Welford mean and sum of squared deviations, updated a chunk at a time
+    with Chan's parallel formula, plus a QuantileSketch of the values. The
+    summaries of separate chunks or partitions merge into the summary of
+    their union, and `statistics`/`constraints` render the Model Monitor
+    baseline files QualityCheckStep would have computed from features.csv.
+
+    For a single time-ordered series the lag-1 autocorrelation of each
+    feature is kept as well, from the co-moments of consecutive present
+    values; the drift detector uses it to size the noise of a window of
+    consecutive bars. Chunks must then arrive in time order, and a merged
+    summary must cover the rows right after this one's.
+
+    Args:
+        names (list): Feature names, in column order.
+        k (int): Capacity of each level of the quantile sketches.
+        seed (int): Seed of the quantile sketches.
+        time_ordered (bool): Whether the rows are consecutive bars of one
+            series; pooled panel rows are not.
+    """
+
+    def __init__(self, names, k=SKETCH_SIZE, seed=0, time_ordered=True):
+        self.names = list(names)
+        size = len(self.names)
+        self.rows = 0
+        self.present = np.zeros(size)
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.minimum = np.full(size, np.inf)
+        self.maximum = np.full(size, -np.inf)
+        self.integral = np.ones(size, dtype=bool)
+        self.sketches = [QuantileSketch(k, seed + i) for i in range(size)]
+        self.time_ordered = time_ordered
+        # Count, means, sums of squared deviations and co-moment of the
+        # (previous, current) value pairs, one column per feature
+        self.lag_moments = np.zeros((6, size))
+        self.first_row = self.last_row = None
+
+    def _combine(self, present, mean, m2):
+        """Merges partial moments into the running ones with Chan's formula."""
+        total = self.present + present
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = mean - self.mean
+            share = np.where(total > 0, present / total, 0.0)
+            self.m2 = self.m2 + m2 + delta**2 * self.present * share
+            self.mean = self.mean + delta * share
+        self.present = total
+
+    def _combine_lag(self, moments):
+        """Merges partial lag-pair co-moments into the running ones with Chan's formula."""
+        count, mean_a, mean_b, m2_a, m2_b, comoment = self.lag_moments
+        other_count, other_a, other_b, other_m2_a, other_m2_b, other_comoment = moments
+        total = count + other_count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = np.where(total > 0, other_count / total, 0.0)
+        delta_a, delta_b = other_a - mean_a, other_b - mean_b
+        weight = count * share
+        self.lag_moments = np.array(
+            [
+                total,
+                mean_a + delta_a * share,
+                mean_b + delta_b * share,
+                m2_a + other_m2_a + delta_a**2 * weight,
+                m2_b + other_m2_b + delta_b**2 * weight,
+                comoment + other_comoment + delta_a * delta_b * weight,
+            ]
+        )
+
+    def _update_lag(self, values):
+        """Adds the consecutive value pairs of time-ordered rows."""
+        if self.last_row is None:
+            self.first_row = values[0]
+        else:
+            values = np.vstack([self.last_row, values])
+        self.last_row = values[-1]
+        self._combine_lag(lag_moments(values[:-1], values[1:]))
+
+    def update(self, frame):
+        """Adds the rows of a DataFrame holding the feature columns."""
+        frame = frame[self.names]
+        self.integral &= np.array(
+            [np.issubdtype(dtype, np.integer) for dtype in frame.dtypes]
+        )
+        values = frame.to_numpy(dtype=float)
+        self.rows += len(values)
+        if not len(values):
+            return
+        mask = ~np.isnan(values)
+        present = mask.sum(axis=0).astype(float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(mask, values, 0.0).sum(axis=0) / present
+            m2 = np.where(mask, (values - mean) ** 2, 0.0).sum(axis=0)
+        mean = np.nan_to_num(mean)
+        self._combine(present, mean, m2)
+        self.minimum = np.fmin(self.minimum, np.nanmin(values, axis=0, initial=np.inf))
+        self.maximum = np.fmax(self.maximum, np.nanmax(values, axis=0, initial=-np.inf))
+        for column, sketch in enumerate(self.sketches):
+            sketch.update(values[mask[:, column], column])
+        if self.time_ordered:
+            self._update_lag(values)
+
+    def merge(self, other):
+        """Adds the rows summarized by another summary of the same features."""
+        if other.names != self.names:
+            raise ValueError("Only summaries of the same features can be merged.")
+        self.rows += other.rows
+        self._combine(other.present, other.mean, other.m2)
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+        self.integral &= other.integral
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        self.time_ordered &= other.time_ordered
+        if self.time_ordered and other.first_row is not None:
+            if self.last_row is None:
+                self.first_row = other.first_row
+            else:
+                # The pair spanning the two summaries
+                self._combine_lag(
+                    lag_moments(self.last_row[None, :], other.first_row[None, :])
+                )
+            self._combine_lag(other.lag_moments)
+            self.last_row = other.last_row
+
+    def autocorrelation(self):
+        """Returns the lag-1 autocorrelation of each feature, NaN where undefined."""
+        count, _, _, m2_a, m2_b, comoment = self.lag_moments
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rho = comoment / np.sqrt(m2_a * m2_b)
+        return np.where((count > 1) & (m2_a > 0) & (m2_b > 0), rho, np.nan)
+
+    def _inferred_type(self, column):
+        return "Integral" if self.integral[column] else "Fractional"
+
+    def statistics(self):
+        """Returns the statistics.json content, in the Model Monitor schema.
+
+        Time-ordered summaries add a "lag_1_autocorrelation" to the
+        numerical statistics of each feature where it is defined.
+        """
+        autocorrelation = self.autocorrelation()
+        features = []
+        for column, name in enumerate(self.names):
+            present = self.present[column]
+            feature = {"name": name, "inferred_type": self._inferred_type(column)}
+            common = {
+                "num_present": int(present),
+                "num_missing": int(self.rows - present),
+            }
+            if not present:
+                feature["numerical_statistics"] = {"common": common}
+                features.append(feature)
+                continue
+            sketch = self.sketches[column]
+            if self.maximum[column] > self.minimum[column]:
+                edges = np.linspace(
+                    self.minimum[column], self.maximum[column], NUM_BUCKETS + 1
+                )
+                counts = sketch.histogram(edges)
+            else:
+                # A constant feature gets one zero-width bucket of every value
+                edges = np.array([self.minimum[column], self.maximum[column]])
+                counts = np.array([present], dtype=float)
+            feature["numerical_statistics"] = {
+                "common": common,
+                "mean": float(self.mean[column]),
+                "sum": float(self.mean[column] * present),
+                "std_dev": float(np.sqrt(self.m2[column] / present)),
+                "min": float(self.minimum[column]),
+                "max": float(self.maximum[column]),
+                "distribution": {
+                    "kll": {
+                        "buckets": [
+                            {
+                                "lower_bound": float(lower),
+                                "upper_bound": float(upper),
+                                "count": float(count),
+                            }
+                            for lower, upper, count in zip(
+                                edges[:-1], edges[1:], counts
+                            )
+                        ],
+                        "sketch": {
+                            "parameters": {"c": 1.0, "k": float(sketch.k)},
+                            "data": [level.tolist() for level in sketch.levels],
+                        },
+                    }
+                },
+            }
+            if self.time_ordered and not np.isnan(autocorrelation[column]):
+                feature["numerical_statistics"]["lag_1_autocorrelation"] = float(
+                    autocorrelation[column]
+                )
+            features.append(feature)
+        return {
+            "version": 0.0,
+            "dataset": {"item_count": self.rows},
+            "features": features,
+        }
+
+    def constraints(self, comparison_threshold=COMPARISON_THRESHOLD):
+        """Returns the constraints.json content, in the Model Monitor schema."""
+        features = []
+        for column, name in enumerate(self.names):
+            feature = {
+                "name": name,
+                "inferred_type": self._inferred_type(column),
+                "completeness": (
+                    float(self.present[column] / self.rows) if self.rows else 0.0
+                ),
+            }
+            if self.present[column]:
+                feature["num_constraints"] = {
+                    "is_non_negative": bool(self.minimum[column] >= 0)
+                }
+            features.append(feature)
+        return {
+            "version": 0.0,
+            "features": features,
+            "monitoring_config": {
+                "evaluate_constraints": "Enabled",
+                "emit_metrics": "Enabled",
+                "datatype_check_threshold": 1.0,
+                "domain_content_threshold": 1.0,
+                "distribution_constraints": {
+                    "perform_comparison": "Enabled",
+                    "comparison_threshold": comparison_threshold,
+                    "comparison_method": "Robust",
+                },
+            },
+        }
+
+    def save(self, output_dir):
+        """Writes statistics.json and constraints.json to `output_dir`.
+
+        Returns:
+            tuple: Paths of the statistics and constraints files.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        statistics_path = os.path.join(output_dir, STATISTICS_FILE)
+        constraints_path = os.path.join(output_dir, CONSTRAINTS_FILE)
+        with open(statistics_path, "w") as f:
+            json.dump(self.statistics(), f)
+        with open(constraints_path, "w") as f:
+            json.dump(self.constraints(), f, indent=2)
+        logging.info(
+            f"Saved the data quality baseline of {self.rows} rows to {output_dir}"
+        )
+        return statistics_path, constraints_path
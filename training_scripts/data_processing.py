@@ -1,21 +1,45 @@
 import os
+import sys
 import argparse
 import logging
+import numpy as np
 import pandas as pd
 
+# Shared modules are shipped to this directory by the SageMaker processing steps
+sys.path.append("/opt/ml/processing/input/lib")
+
+from baseline_statistics import BaselineSummary
+from artifact_io import (
+    ARTIFACT_FORMATS,
+    FrameWriter,
+    artifact_path,
+    iter_frames,
+    read_frame,
+    write_frame,
+)
+from feature_cache import DEFAULT_MAX_BYTES, FeatureCache, cached_features
+from feature_engine import HORIZONS, add_target, feature_names
+from feature_registry import add_selected_features, max_lookback, parse_feature_list
+from instrumentation import DISABLED_METRICS, StageMetrics
+from panel_features import SYMBOL_COLUMN, build_panel_features, load_panel, sort_panel
+from resampling import INTERVAL_SIZES, SESSIONS, resample_frame
+
+# Marks the rows of a chunked-processing buffer that are written out
+READY_COLUMN = "_ready"
+
 
 def load_data(input_path):
     """Loads the raw data from the input path.
 
     Args:
-        input_path (str): Path to the input CSV file.
+        input_path (str): Path to the input CSV or Parquet file.
 
     Returns:
         pd.DataFrame: Loaded dataframe.
     """
     logging.info(f"Loading data from {input_path}")
     try:
-        return pd.read_csv(input_path, parse_dates=True)
+        return read_frame(input_path)
     except Exception as e:
         logging.error(f"Failed to load data: {e}")
         raise
@@ -31,81 +55,267 @@ def add_target_column(data):
         pd.DataFrame: Dataframe with the target column added.
     """
     logging.info("Adding target column")
-    data["Tomorrow"] = data["Close"].shift(-1)
-    data["Target"] = (data["Tomorrow"] > data["Close"]).astype(int)
-    return data
+    return add_target(data)
 
 
-def add_features(data, horizons):
+def add_features(data, horizons, features=None):
     """Adds rolling averages and trends as new features.
 
+    Only the requested features and their dependencies are computed.
+
     Args:
         data (pd.DataFrame): Input dataframe.
         horizons (list): List of horizons for feature generation.
+        features (list, optional): Feature names to compute; defaults to
+            the ratio and trend features of every horizon.
 
     Returns:
         pd.DataFrame: Dataframe with new features added.
+        pd.DataFrame: The feature columns only.
     """
-    logging.info("Adding new features")
-    new_predictors = []
+    if features is None:
+        features = feature_names(horizons)
+    logging.info(f"Adding new features: {features}")
     data.set_index("Date", inplace=True)
-    for horizon in horizons:
-        logging.info(f"Processing horizon: {horizon}")
-        rolling_averages = data.rolling(horizon).mean()
-
-        ratio_column = f"Close_Ratio_{horizon}"
-        trend_column = f"Trend_{horizon}"
+    data = add_selected_features(data, features)
 
-        data[ratio_column] = data["Close"] / rolling_averages["Close"]
-        data[trend_column] = data.shift(1).rolling(horizon).sum()["Target"]
-
-        new_predictors.extend([ratio_column, trend_column])
-        features = data.columns[-10:].to_list()
-        feature_data = data[features]
+    feature_data = data[features]
 
     return data, feature_data
 
 
-def save_data(data, feature_data, output_dir):
+def save_data(data, feature_data, output_dir, file_format="csv"):
     """Saves the processed data to the output directory.
 
     Args:
         data (pd.DataFrame): Processed dataframe.
+        feature_data (pd.DataFrame): Feature columns used for model monitoring.
         output_dir (str): Directory to save the output.
+        file_format (str): Format of the training data, "csv" or "parquet".
     """
     os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, "train.csv")
+    output_file = artifact_path(output_dir, "train", file_format)
     output_feature = os.path.join(output_dir, "features.csv")
     logging.info(f"Saving processed data to {output_file}")
-    data.to_csv(output_file, index=False)
-    feature_data.to_csv(
-        output_feature, index=False
-    )  # this to be used for model monitoring
+    write_frame(data, output_file)
+    # Model Monitor baselines require CSV, so features stay in that format
+    feature_data.to_csv(output_feature, index=False)
+
+
+def resample_data(data, bar_size, session="regular", panel=False):
+    """Aggregates the raw bars into bars of `bar_size` within the trading session.
+
+    Args:
+        data (pd.DataFrame): Raw input data with a Date column.
+        bar_size (str): Bar size, e.g. "1h" or "15min".
+        session (str): Trading session, e.g. "regular".
+        panel (bool): Whether the data is long-format (symbol, date) data.
+
+    Returns:
+        pd.DataFrame: Resampled data with a Date column.
+    """
+    logging.info(f"Resampling {len(data)} bars to {bar_size} ({session} session)")
+    if panel:
+        return resample_frame(sort_panel(data), bar_size, session, by=SYMBOL_COLUMN)
+    return resample_frame(data, bar_size, session)
 
 
-def process_data(input_path, output_dir, horizons):
+def build_features(data, features):
+    """Adds the target column and the features to a copy of the raw data.
+
+    Args:
+        data (pd.DataFrame): Raw input data.
+        features (list): Feature names to compute.
+
+    Returns:
+        pd.DataFrame: Dataframe indexed by Date with target and features.
+    """
+    data = add_target_column(data.copy())
+    data, _ = add_features(data, None, features)
+    return data
+
+
+def process_data(
+    input_path,
+    output_dir,
+    horizons,
+    file_format="csv",
+    cache=None,
+    features=None,
+    metrics=DISABLED_METRICS,
+    panel=False,
+    bar_size=None,
+    session="regular",
+    baseline_dir=None,
+):
     """Processes the raw data and saves it in the specified output directory.
 
+    In panel mode the input holds many symbols in long format and the
+    output is one pooled feature matrix, ordered by date, with a Symbol column.
+
     Args:
-        input_path (str): Path to the input CSV file.
+        input_path (str): Path to the input CSV or Parquet file, or in panel
+            mode also a multi-symbol ingestion output directory.
         output_dir (str): Directory to save the processed data.
         horizons (list): List of horizons for feature generation.
+        file_format (str): Format of the training data, "csv" or "parquet".
+        cache (FeatureCache, optional): Feature cache; a hit skips feature generation.
+        features (list, optional): Feature names consumed by the model;
+            defaults to the ratio and trend features of every horizon.
+        metrics (StageMetrics): Collector for the load, feature, clean and save phases.
+        panel (bool): Whether the input is long-format (symbol, date) data.
+        bar_size (str, optional): Resample the raw bars to this size first,
+            e.g. "1h" for minute bars.
+        session (str): Trading session the resampled bars are taken from.
+        baseline_dir (str, optional): Directory to write the data quality
+            baseline of the feature columns to.
     """
-    # Load the data
-    data = load_data(input_path)
+    if features is None:
+        features = feature_names(horizons)
 
-    # Add target column
-    data = add_target_column(data)
-
-    # Add new features
-    data, feature_data = add_features(data, horizons)
+    # Load the data
+    with metrics.phase("load") as phase:
+        data = load_panel(input_path) if panel else load_data(input_path)
+        if bar_size:
+            data = resample_data(data, bar_size, session, panel)
+        phase.record(rows_out=len(data))
+
+    # Add target column and new features, unless cached for the same input
+    build = build_panel_features if panel else build_features
+    with metrics.phase("features") as phase:
+        data = cached_features(cache, data, features, lambda: build(data, features))
+        phase.record(rows_in=len(data), rows_out=len(data))
+    feature_data = data[features]
 
     # Drop rows with missing values
-    data = data.dropna()
+    with metrics.phase("clean") as phase:
+        rows_in = len(data)
+        data = data.dropna()
+        phase.record(rows_in=rows_in, rows_out=len(data))
     logging.info(f"Data after cleaning: {data.shape[0]} rows")
 
     # Save the processed data
-    save_data(data, feature_data, output_dir)
+    with metrics.phase("save") as phase:
+        save_data(data, feature_data, output_dir, file_format)
+        phase.record(rows_in=len(data))
+
+    # Baseline the same rows as features.csv
+    if baseline_dir:
+        with metrics.phase("baseline") as phase:
+            baseline = BaselineSummary(features, time_ordered=not panel)
+            baseline.update(feature_data)
+            baseline.save(baseline_dir)
+            phase.record(rows_in=len(feature_data))
+
+
+def _carry_rows(data, lookback, panel):
+    """Returns the unwritten rows of every series, with the `lookback` rows before them."""
+    series = data[SYMBOL_COLUMN] if panel else np.zeros(len(data))
+    started = data[READY_COLUMN].astype(int).groupby(series, sort=False).cummax()
+    keep = started.groupby(series, sort=False).shift(-lookback, fill_value=1)
+    return data[keep.to_numpy() == 1].copy()
+
+
+def _last_of_series(data, panel):
+    """Flags the last row of the series, or of every symbol in panel mode."""
+    if panel:
+        return ~data.duplicated(SYMBOL_COLUMN, keep="last").to_numpy()
+    return np.arange(len(data)) == len(data) - 1
+
+
+def process_data_chunked(
+    input_path,
+    output_dir,
+    features,
+    chunk_rows,
+    file_format="csv",
+    metrics=DISABLED_METRICS,
+    panel=False,
+    baseline_dir=None,
+):
+    """Processes a time-ordered input in chunks, writing the output as it goes.
+
+    Each chunk is processed together with the rows carried over from the
+    previous one: the longest feature lookback of every series, plus its
+    last row, whose Target needs the next close and is therefore written
+    with the next chunk. Peak memory is bounded by the chunk size plus the
+    carried rows instead of the dataset size, and the output holds the
+    same rows and features as `process_data`, in the same order. In panel
+    mode the rows dated on or after the earliest pending last row of a
+    symbol are carried too, so the output stays in date order; a symbol
+    that stops before the end of the input keeps the later rows carried.
+
+    Args:
+        input_path (str): Path to the input CSV or Parquet file, in time
+            order; in panel mode one long-format file sorted by date.
+        output_dir (str): Directory to save the processed data.
+        features (list): Feature names to compute.
+        chunk_rows (int): Input rows read per chunk.
+        file_format (str): Format of the training data, "csv" or "parquet".
+        metrics (StageMetrics): Collector for the streaming phase.
+        panel (bool): Whether the input is long-format (symbol, date) data.
+        baseline_dir (str, optional): Directory to write the data quality
+            baseline of the feature columns to, accumulated chunk by chunk.
+
+    Raises:
+        ValueError: If the input is not in time order.
+    """
+    if panel and os.path.isdir(input_path):
+        raise ValueError(
+            "Chunked panel processing needs one long-format file sorted by date."
+        )
+    build = build_panel_features if panel else build_features
+    lookback = max_lookback(features)
+    os.makedirs(output_dir, exist_ok=True)
+
+    baseline = (
+        BaselineSummary(features, time_ordered=not panel) if baseline_dir else None
+    )
+
+    def write(buffer):
+        data = build(buffer, features)
+        data = data[data[READY_COLUMN]].drop(columns=READY_COLUMN)
+        feature_writer.write(data[features])
+        train_writer.write(data.dropna())
+        if baseline is not None:
+            baseline.update(data[features])
+
+    carry, last_date, chunks, rows_in = None, None, 0, 0
+    train_writer = FrameWriter(artifact_path(output_dir, "train", file_format))
+    feature_writer = FrameWriter(os.path.join(output_dir, "features.csv"))
+    with metrics.phase("stream") as phase, train_writer, feature_writer:
+        logging.info(f"Processing {input_path} in chunks of {chunk_rows} rows")
+        for chunk in iter_frames(input_path, chunk_rows):
+            if last_date is not None and chunk["Date"].min() < last_date:
+                raise ValueError(f"{input_path} is not sorted by date.")
+            last_date = chunk["Date"].max()
+            chunks += 1
+            rows_in += len(chunk)
+
+            # Carried rows were written with an earlier chunk, except each
+            # series' last one; the new last rows wait for the next chunk
+            chunk[READY_COLUMN] = True
+            buffer = pd.concat([carry, chunk], ignore_index=True)
+            if panel:
+                buffer = sort_panel(buffer)
+            unwritten = buffer[READY_COLUMN].to_numpy()
+            pending = _last_of_series(buffer, panel)
+            ready = unwritten & ~pending
+            if panel:
+                # Later dates wait for the earliest pending row of any symbol
+                ready &= (buffer["Date"] < buffer["Date"][pending].min()).to_numpy()
+            buffer[READY_COLUMN] = ready
+            write(buffer)
+
+            buffer[READY_COLUMN] = unwritten & ~ready
+            carry = _carry_rows(buffer, lookback, panel)
+        if carry is not None:
+            # The last rows of the input, whose Target stays 0 as in process_data
+            write(carry)
+        phase.record(chunks=chunks, rows_in=rows_in, rows_out=train_writer.rows)
+    logging.info(f"Data after cleaning: {train_writer.rows} rows")
+    if baseline is not None:
+        baseline.save(baseline_dir)
 
 
 def main():
@@ -118,7 +328,10 @@ def main():
         description="Train and backtest a RandomForest model."
     )
     parser.add_argument(
-        "--input_path", type=str, required=True, help="Path to the input CSV file."
+        "--input_path",
+        type=str,
+        required=True,
+        help="Path to the input CSV or Parquet file.",
     )
     parser.add_argument(
         "--output_dir",
@@ -126,13 +339,107 @@ def main():
         required=True,
         help="Directory to save processed data.",
     )
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=sorted(ARTIFACT_FORMATS),
+        help="File format of the training data.",
+    )
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Comma-separated feature names to compute; defaults to all horizon features.",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory of the local feature cache; disabled when omitted.",
+    )
+    parser.add_argument(
+        "--cache_max_bytes",
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help="Size limit of the feature cache before LRU eviction.",
+    )
+    parser.add_argument(
+        "--panel",
+        action="store_true",
+        help="Input is long-format multi-symbol data, or a multi-symbol ingestion directory.",
+    )
+    parser.add_argument(
+        "--interval",
+        type=str,
+        default="1d",
+        choices=list(INTERVAL_SIZES),
+        help="Bar interval of the model; selects the default feature horizons.",
+    )
+    parser.add_argument(
+        "--resample",
+        action="store_true",
+        help="Aggregate finer input bars to --interval bars first.",
+    )
+    parser.add_argument(
+        "--session",
+        type=str,
+        default="regular",
+        choices=sorted(SESSIONS),
+        help="Trading session the resampled bars are taken from.",
+    )
+    parser.add_argument(
+        "--chunk_rows",
+        type=int,
+        default=None,
+        help="Process the input in chunks of this many rows instead of loading it whole.",
+    )
+    parser.add_argument(
+        "--baseline_dir",
+        type=str,
+        default=None,
+        help="Write the Model Monitor statistics.json and constraints.json of the features here.",
+    )
     args = parser.parse_args()
+    if args.resample and args.chunk_rows:
+        parser.error("--resample cannot be combined with --chunk_rows")
+    features = parse_feature_list(args.features, args.interval)
 
-    # List of horizons for feature generation
-    horizons = [2, 5, 60, 250, 1000]
+    cache = (
+        FeatureCache(args.cache_dir, args.cache_max_bytes) if args.cache_dir else None
+    )
 
     # Process the data
-    process_data(args.input_path, args.output_dir, horizons)
+    metrics = StageMetrics("data_processing")
+    try:
+        with metrics.phase("total"):
+            if args.chunk_rows:
+                process_data_chunked(
+                    args.input_path,
+                    args.output_dir,
+                    features,
+                    args.chunk_rows,
+                    args.format,
+                    metrics,
+                    args.panel,
+                    args.baseline_dir,
+                )
+            else:
+                process_data(
+                    args.input_path,
+                    args.output_dir,
+                    HORIZONS,
+                    args.format,
+                    cache,
+                    features,
+                    metrics,
+                    args.panel,
+                    args.interval if args.resample else None,
+                    args.session,
+                    args.baseline_dir,
+                )
+    finally:
+        metrics.save(args.output_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,392 @@
+import os
+import json
+import logging
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2
+
+# File names of the Model Monitor baseline and report
+STATISTICS_FILE = "statistics.json"
+CONSTRAINTS_FILE = "constraints.json"
+VIOLATIONS_FILE = "constraint_violations.json"
+DRIFT_SCORES_FILE = "drift_scores.json"
+
+# A feature drifts when any score exceeds its threshold. The KS threshold
+# defaults to the constraints' distribution comparison_threshold.
+DRIFT_THRESHOLDS = {"psi": 0.2, "ks": 0.1, "js": 0.1}
+
+# Distribution checks are skipped on smaller samples, where one outlier
+# alone would exceed every threshold
+MIN_DRIFT_ROWS = 30
+
+# Latest bars of a single series compared to the baseline, about a year of
+# daily bars
+DRIFT_WINDOW = 250
+
+# Smoothing of empty bins in the PSI
+EPSILON = 1e-6
+
+# Outer buckets holding less of the baseline are merged inward for the PSI
+MIN_BUCKET_SHARE = 0.05
+
+# Thresholds are raised to the scores a sample of the baseline itself reaches
+# with this probability, so small samples only drift on significant changes
+SIGNIFICANCE = 0.01
+
+
+def read_json(path, file_name):
+    """Reads `path`, or `file_name` inside `path` when it is a directory."""
+    if os.path.isdir(path):
+        path = os.path.join(path, file_name)
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class DriftBaseline:
+    """Histograms and constraints of the numerical features of a baseline.
+
+    Args:
+        names (list): Feature names, in baseline order.
+        edges (list): Bucket edges of each feature, as NumPy arrays.
+        counts (list): Baseline count of each bucket, as NumPy arrays.
+        completeness (dict): Feature name -> minimum fraction of present values.
+        comparison_threshold (float): Distribution comparison threshold.
+        autocorrelation (dict): Feature name -> lag-1 autocorrelation of the
+            baseline series.
+    """
+
+    def __init__(
+        self,
+        names,
+        edges,
+        counts,
+        completeness=None,
+        comparison_threshold=None,
+        autocorrelation=None,
+    ):
+        self.names = list(names)
+        self.edges = list(edges)
+        self.counts = list(counts)
+        self.completeness = completeness or {}
+        self.comparison_threshold = comparison_threshold
+        self.autocorrelation = autocorrelation or {}
+
+    @property
+    def positional(self):
+        """Whether the baseline was computed without a header (_c0, _c1, ...)."""
+        return all(name == f"_c{i}" for i, name in enumerate(self.names))
+
+
+def load_baseline(statistics_path, constraints_path=None):
+    """Loads the Model Monitor baseline registered with the approved model.
+
+    Only features with numerical statistics are kept; their KLL buckets
+    become the baseline histogram. The lag-1 autocorrelation written by
+    BaselineSummary is read where present.
+
+    Args:
+        statistics_path (str): statistics.json, or the directory holding it.
+        constraints_path (str, optional): constraints.json, or its directory.
+
+    Returns:
+        DriftBaseline: The baseline histograms and constraints.
+    """
+    statistics = read_json(statistics_path, STATISTICS_FILE)
+    names, edges, counts, autocorrelation = [], [], [], {}
+    for feature in statistics["features"]:
+        numerical = feature.get("numerical_statistics", {})
+        # Features without present values have no distribution
+        if "distribution" not in numerical:
+            continue
+        buckets = numerical["distribution"]["kll"]["buckets"]
+        names.append(feature["name"])
+        edges.append(
+            np.array(
+                [buckets[0]["lower_bound"]] + [b["upper_bound"] for b in buckets],
+                dtype=float,
+            )
+        )
+        counts.append(np.array([b["count"] for b in buckets], dtype=float))
+        if "lag_1_autocorrelation" in numerical:
+            autocorrelation[feature["name"]] = numerical["lag_1_autocorrelation"]
+
+    completeness, comparison_threshold = {}, None
+    if constraints_path:
+        constraints = read_json(constraints_path, CONSTRAINTS_FILE)
+        completeness = {
+            feature["name"]: feature["completeness"]
+            for feature in constraints["features"]
+            if "completeness" in feature
+        }
+        comparison = constraints.get("monitoring_config", {}).get(
+            "distribution_constraints", {}
+        )
+        if comparison.get("perform_comparison", "Enabled") == "Enabled":
+            comparison_threshold = comparison.get("comparison_threshold")
+    return DriftBaseline(
+        names, edges, counts, completeness, comparison_threshold, autocorrelation
+    )
+
+
+def drift_scores(values, edges, counts):
+    """Computes the PSI, KS and Jensen-Shannon scores of a sample against a histogram.
+
+    The sample is binned into the baseline buckets plus one overflow bin on
+    each side with a single searchsorted/bincount pass. Values outside the
+    baseline range count as drift for the JS divergence and KS statistic.
+    The PSI merges them, and the outer buckets holding less than
+    MIN_BUCKET_SHARE of the baseline, into the nearest larger bucket, since
+    a single value in a nearly empty bucket would dominate it. The KS
+    statistic is the largest gap
+    between the baseline and sample CDFs at the bucket edges, i.e. at the
+    resolution of the baseline histogram.
+
+    Args:
+        values (np.ndarray): Present (non-NaN) values of the feature.
+        edges (np.ndarray): Increasing bucket edges of the baseline.
+        counts (np.ndarray): Baseline count of each bucket.
+
+    Returns:
+        tuple: (psi, ks, js), with js the divergence in bits, in [0, 1].
+    """
+    values = np.sort(values)
+    # Bin 0 and the last bin hold the values below and above the baseline
+    bins = np.searchsorted(edges, values, side="right")
+    # Values equal to the upper edge belong to the last bucket, as in the baseline
+    bins[values == edges[-1]] = len(edges) - 1
+    observed = np.bincount(bins, minlength=len(edges) + 1) / len(values)
+    expected = np.concatenate([[0.0], counts, [0.0]]) / counts.sum()
+
+    folded_observed, folded_expected = _fold_tails(observed, expected)
+    smoothed_observed = (folded_observed + EPSILON) / (
+        1 + EPSILON * len(folded_observed)
+    )
+    smoothed_expected = (folded_expected + EPSILON) / (
+        1 + EPSILON * len(folded_expected)
+    )
+    psi = np.sum(
+        (smoothed_observed - smoothed_expected)
+        * np.log(smoothed_observed / smoothed_expected)
+    )
+
+    mixture = (observed + expected) / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        js = 0.5 * np.nansum(
+            np.where(observed > 0, observed * np.log2(observed / mixture), 0.0)
+        ) + 0.5 * np.nansum(
+            np.where(expected > 0, expected * np.log2(expected / mixture), 0.0)
+        )
+
+    # Buckets hold [lower, upper) values, so the baseline CDF is known exactly
+    # just below each edge; comparing there also holds for discrete features
+    baseline_cdf = np.concatenate([[0.0], np.cumsum(counts) / counts.sum()])
+    sample_cdf = np.searchsorted(values, edges, side="left") / len(values)
+    ks = np.abs(baseline_cdf[:-1] - sample_cdf[:-1]).max()
+    # Values above the top edge are past the baseline
+    ks = max(ks, np.mean(values > edges[-1]))
+    return float(psi), float(ks), float(js)
+
+
+def _fold_tails(observed, expected, min_share=MIN_BUCKET_SHARE):
+    """Merges the sparse outer bins of both histograms into the first dense bin."""
+    low, high = 0, len(expected) - 1
+    while low < high and expected[low] < min_share:
+        low += 1
+    while high > low and expected[high] < min_share:
+        high -= 1
+    folded = []
+    for histogram in (observed, expected):
+        inner = histogram[low : high + 1].copy()
+        inner[0] += histogram[:low].sum()
+        inner[-1] += histogram[high + 1 :].sum()
+        folded.append(inner)
+    return folded
+
+
+def effective_rows(values, autocorrelation=None):
+    """Returns the number of independent values a run of consecutive bars is worth.
+
+    Consecutive values of a smooth feature such as Trend_1000 barely
+    differ, so a window of them carries far less information than as many
+    independent draws. With lag-1 autocorrelation rho, an AR(1) series of
+    n values is worth n (1 - rho) / (1 + rho) independent ones. rho is
+    taken from the baseline, measured over the whole training history;
+    without it, it is estimated from the window with Kendall's bias
+    correction, which still underestimates it on short windows.
+
+    Args:
+        values (np.ndarray): Present values of the feature, in time order.
+        autocorrelation (float, optional): Lag-1 autocorrelation of the
+            baseline series.
+
+    Returns:
+        float: Effective sample size, between 1 and len(values).
+    """
+    n_rows = len(values)
+    rho = autocorrelation
+    if rho is None:
+        deviations = values - values.mean()
+        squares = np.dot(deviations, deviations)
+        rho = np.dot(deviations[:-1], deviations[1:]) / squares if squares else 1.0
+        rho += (1 + 3 * rho) / n_rows
+    rho = min(max(rho, 0.0), 1.0)
+    return float(np.clip(n_rows * (1 - rho) / (1 + rho), 1, n_rows))
+
+
+def noise_floor(n_rows, n_buckets, significance=SIGNIFICANCE):
+    """Returns the scores that sampling noise alone exceeds with probability `significance`.
+
+    For a sample of `n_rows` independent values drawn from the baseline
+    itself, the PSI is asymptotically chi-squared with n_buckets - 1
+    degrees of freedom over n_rows, the Jensen-Shannon divergence about
+    PSI / (8 ln 2) bits, and the KS statistic is bounded by the Kolmogorov
+    critical value. Pass the `effective_rows` of autocorrelated samples.
+    The KS and JS floors stay below their maximum of 1, so a sample wholly
+    outside the baseline range always drifts.
+
+    Args:
+        n_rows (float): Size of the current sample.
+        n_buckets (int): Number of baseline histogram buckets.
+        significance (float): False positive rate of each score.
+
+    Returns:
+        dict: Metric -> noise floor.
+    """
+    psi = chi2.ppf(1 - significance, max(n_buckets - 1, 1)) / n_rows
+    return {
+        "psi": psi,
+        "ks": min(
+            np.sqrt(-np.log(significance / 2) / 2) / np.sqrt(n_rows), 1 - EPSILON
+        ),
+        "js": min(psi / (8 * np.log(2)), 1 - EPSILON),
+    }
+
+
+def detect_drift(
+    data, baseline, thresholds=None, min_rows=MIN_DRIFT_ROWS, time_ordered=True
+):
+    """Checks a sample of features against the baseline.
+
+    Runs the missing column, completeness and baseline drift checks of
+    Model Monitor's data quality job, in process. A feature drifts when a
+    score exceeds both its threshold and its `noise_floor`, taken at the
+    `effective_rows` of the sample when its rows are consecutive bars.
+
+    Args:
+        data (pd.DataFrame): Feature values, one column per feature.
+        baseline (DriftBaseline): Baseline loaded with `load_baseline`.
+        thresholds (dict, optional): Metric -> threshold, overriding
+            DRIFT_THRESHOLDS and the baseline's comparison threshold.
+        min_rows (int): Minimum number of present values for the
+            distribution checks.
+        time_ordered (bool): Whether the rows are consecutive bars of one
+            series, rather than independent rows such as every symbol's
+            latest bar.
+
+    Returns:
+        tuple: (violations, scores): the violations in the Model Monitor
+            report schema, and the drift scores of every feature.
+    """
+    limits = dict(DRIFT_THRESHOLDS)
+    if baseline.comparison_threshold is not None:
+        limits["ks"] = baseline.comparison_threshold
+    limits.update(thresholds or {})
+    if baseline.positional:
+        # A header-less baseline names the columns by position
+        data = data.set_axis([f"_c{i}" for i in range(data.shape[1])], axis=1)
+
+    violations, scores = [], {}
+    for name, edges, counts in zip(baseline.names, baseline.edges, baseline.counts):
+        if name not in data.columns:
+            violations.append(
+                _violation(
+                    name,
+                    "missing_column_check",
+                    "There are missing columns in current dataset. "
+                    f"Number of columns in current dataset: {data.shape[1]}, "
+                    f"Number of columns in baseline constraints: {len(baseline.names)}",
+                )
+            )
+            continue
+        column = pd.to_numeric(data[name], errors="coerce").to_numpy(dtype=float)
+        present = column[~np.isnan(column)]
+
+        required = baseline.completeness.get(name)
+        observed = len(present) / len(column) if len(column) else 0.0
+        if required is not None and observed < required:
+            violations.append(
+                _violation(
+                    name,
+                    "completeness_check",
+                    f"Data completeness requirement is not met. Expected: {required:g}, "
+                    f"Observed: {observed:g}",
+                )
+            )
+
+        if len(present) < min_rows:
+            continue
+        psi, ks, js = drift_scores(present, edges, counts)
+        n_effective = (
+            effective_rows(present, baseline.autocorrelation.get(name))
+            if time_ordered
+            else len(present)
+        )
+        scores[name] = {
+            "psi": psi,
+            "ks": ks,
+            "js": js,
+            "rows": len(present),
+            "effective_rows": n_effective,
+        }
+        floor = noise_floor(n_effective, len(counts))
+        feature_limits = {
+            metric: max(limit, floor[metric]) for metric, limit in limits.items()
+        }
+        exceeded = [
+            f"{metric.upper()} {value:.4g} exceeds threshold {feature_limits[metric]:.4g}"
+            for metric, value in (("psi", psi), ("ks", ks), ("js", js))
+            if value > feature_limits[metric]
+        ]
+        if exceeded:
+            violations.append(
+                _violation(
+                    name,
+                    "baseline_drift_check",
+                    "Baseline drift: " + "; ".join(exceeded),
+                )
+            )
+
+    if scores:
+        logging.info(f"Drift checked on {len(scores)} features")
+    else:
+        logging.info(f"Fewer than {min_rows} rows; distribution checks skipped")
+    return violations, scores
+
+
+def _violation(feature_name, check_type, description):
+    return {
+        "feature_name": feature_name,
+        "constraint_check_type": check_type,
+        "description": description,
+    }
+
+
+def write_report(violations, scores, output_dir):
+    """Writes constraint_violations.json, in the Model Monitor schema, and the drift scores.
+
+    Args:
+        violations (list): Violations returned by `detect_drift`.
+        scores (dict): Drift scores returned by `detect_drift`.
+        output_dir (str): Directory of the report.
+
+    Returns:
+        str: Path of the violations report.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, VIOLATIONS_FILE)
+    with open(path, "w") as f:
+        json.dump({"violations": violations}, f, indent=2)
+    with open(os.path.join(output_dir, DRIFT_SCORES_FILE), "w") as f:
+        json.dump(scores, f, indent=2, sort_keys=True)
+    logging.info(f"Wrote {len(violations)} violations to {path}")
+    return path
@@ -1,12 +1,45 @@
 import os
+import sys
 import json
 import argparse
-import pandas as pd
-from sklearn.metrics import precision_score
+import numpy as np
+from sklearn.metrics import precision_score, roc_auc_score
 import logging
 import tarfile
 import xgboost as xgb
 
+# Shared modules are shipped to this directory by the SageMaker processing steps
+sys.path.append("/opt/ml/processing/input/lib")
+
+from artifact_io import read_frame
+from instrumentation import StageMetrics
+from model_archive import load_model_archive
+from train_model import HOLDOUT_ROWS
+
+# "tail" scores the precision of the holdout only; "windows" adds recall, F1,
+# AUC, log loss and hit rate over trailing and rolling windows
+EVALUATION_MODES = ["windows", "tail"]
+
+# Trailing windows, in rows, scored in "windows" mode; windows longer than
+# the holdout are skipped
+TRAILING_WINDOWS = [20, 100, 250, 1000]
+
+# Length of the rolling windows summarized in "windows" mode, about a month
+ROLLING_WINDOW = 20
+
+# Probability from which a row is predicted to go up
+THRESHOLD = 0.5
+
+# Probabilities are clipped to [EPSILON, 1 - EPSILON] in the log loss
+EPSILON = 1e-15
+
+# AUC written for a window holding a single class, where it is undefined;
+# numeric so JsonGet conditions still evaluate, and failing any minimum
+UNDEFINED_AUC = 0.0
+
+# Metrics computed from the cumulative counts, for any window
+WINDOW_METRICS = ["precision", "recall", "f1", "log_loss", "hit_rate"]
+
 
 def parse_args():
     """Parse command-line arguments."""
@@ -22,22 +55,48 @@ def parse_args():
     parser.add_argument(
         "--output-path", type=str, required=True, help="Path to save evaluation results"
     )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="windows",
+        choices=EVALUATION_MODES,
+        help="tail scores the holdout precision only; windows adds every metric over trailing and rolling windows.",
+    )
+    parser.add_argument(
+        "--holdout-rows",
+        type=int,
+        default=HOLDOUT_ROWS,
+        help="Most recent rows left out of training, as passed to train_model.py.",
+    )
+    parser.add_argument(
+        "--windows",
+        type=str,
+        default=",".join(str(w) for w in TRAILING_WINDOWS),
+        help="Comma-separated trailing window lengths, in rows.",
+    )
+    parser.add_argument(
+        "--rolling-window",
+        type=int,
+        default=ROLLING_WINDOW,
+        help="Length of the rolling windows, in rows; 0 disables them.",
+    )
 
     return parser.parse_args()
 
 
-def load_data(input_path):
+def load_data(input_path, columns=None):
     """Loads the raw data from the input path.
 
     Args:
-        input_path (str): Path to the input CSV file.
+        input_path (str): Path to the input CSV or Parquet file.
+        columns (list, optional): Columns to load; all columns when omitted.
 
     Returns:
         pd.DataFrame: Loaded dataframe.
     """
     logging.info(f"Loading data from {input_path}")
     try:
-        return pd.read_csv(input_path, parse_dates=True)
+        return read_frame(input_path, columns=columns)
     except FileNotFoundError:
         logging.error(f"File not found: {input_path}")
         raise
@@ -54,49 +113,216 @@ def extract_model(archive_path, extract_to):
 
 
 def load_xgboost_model(model_dir):
-    """Load an XGBoost model from a tar.gz file."""
+    """Load an XGBoost model from a tar.gz file.
 
-    archive_path = os.path.join(model_dir, "model.tar.gz")
-    extract_to = os.path.join(model_dir, "extracted")
+    The model is read from the archive in memory, and archives already
+    loaded in this process are served from a cache keyed by their content.
+    """
+    model, _ = load_model_archive(os.path.join(model_dir, "model.tar.gz"))
+    print("Model loaded successfully.")
+    return model
 
-    # Step 1: Extract the tar.gz file
-    extract_model(archive_path, extract_to)
 
-    # Step 2: Locate the model file
-    model_path = os.path.join(extract_to, "model.xgb")
-    if not os.path.exists(model_path):
-        raise FileNotFoundError(f"Model file not found: {model_path}")
+def model_features(model_dir, model):
+    """Returns the feature columns the model was trained on.
 
-    # Step 3: Load the model
-    model = xgb.Booster()
-    model.load_model(model_path)
-    print("Model loaded successfully.")
-    return model
+    Uses the features.json saved beside model.xgb, falling back to the
+    feature names stored in the booster for older artifacts.
+    """
+    _, features = load_model_archive(os.path.join(model_dir, "model.tar.gz"))
+    if features is None:
+        features = model.feature_names
+    if not features:
+        raise ValueError(f"No feature list found for the model in {model_dir}")
+    return list(features)
 
 
-def evaluate_model(data, features, model):
-    """Evaluate the model on the test dataset."""
+def cumulative_counts(target, probabilities, threshold=THRESHOLD):
+    """Returns the running sums every window metric is computed from.
 
-    x_test = data[features].iloc[-100:]
-    y_test = data["Target"].iloc[-100:]
-    preds = model.predict(xgb.DMatrix(x_test))
-    preds[preds >= 0.5] = 1
-    preds[preds < 0.5] = 0
-    preds = pd.Series(preds, index=y_test.index, name="Predictions")
-    combined = pd.concat([y_test, preds], axis=1)
-    print("printing combined dataframe")
-    print(combined)
+    Row i + 1 holds the true positives, predicted positives, actual
+    positives, correct predictions and log loss of rows 0..i, and row 0 is
+    zero, so the sums over rows [start, end) are counts[end] - counts[start].
 
-    # Rename columns for clarity
-    combined.columns = ["Target", "Predictions"]
+    Args:
+        target (np.ndarray): Actual classes, 0 or 1.
+        probabilities (np.ndarray): Predicted probabilities of class 1.
+        threshold (float): Probability from which class 1 is predicted.
 
-    # Compute evaluation metrics
-    score = precision_score(combined["Target"], combined["Predictions"])
+    Returns:
+        np.ndarray: (n + 1, 5) cumulative counts.
+    """
+    target = np.asarray(target, dtype=float)
+    probabilities = np.asarray(probabilities, dtype=float)
+    predicted = (probabilities >= threshold).astype(float)
+    clipped = np.clip(probabilities, EPSILON, 1 - EPSILON)
+    loss = -(target * np.log(clipped) + (1 - target) * np.log(1 - clipped))
+    terms = np.column_stack(
+        [
+            predicted * target,
+            predicted,
+            target,
+            (predicted == target).astype(float),
+            loss,
+        ]
+    )
+    return np.vstack([np.zeros((1, terms.shape[1])), np.cumsum(terms, axis=0)])
 
-    # Return metrics as a dictionary
+
+def window_metrics(counts, starts, ends):
+    """Computes the metrics of many windows at once from the cumulative counts.
+
+    Precision, recall and F1 are 0 where they are undefined, as with
+    scikit-learn's zero_division=0.
+
+    Args:
+        counts (np.ndarray): Output of `cumulative_counts`.
+        starts (np.ndarray): First row of each window.
+        ends (np.ndarray): Row after the last row of each window.
+
+    Returns:
+        dict: Metric -> array with one value per window.
+    """
+    sums = counts[ends] - counts[starts]
+    true_positives, predicted, actual, hits, loss = sums.T
+    rows = np.asarray(ends) - np.asarray(starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(actual > 0, true_positives / actual, 0.0)
+        f1 = np.where(
+            predicted + actual > 0, 2 * true_positives / (predicted + actual), 0.0
+        )
     return {
-        "precision": score,
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "log_loss": loss / rows,
+        "hit_rate": hits / rows,
+    }
+
+
+def auc_score(target, probabilities):
+    """Returns the ROC AUC, or UNDEFINED_AUC when the window holds a single class."""
+    if len(np.unique(target)) < 2:
+        return UNDEFINED_AUC
+    return float(roc_auc_score(target, probabilities))
+
+
+def evaluation_metrics(
+    target, probabilities, windows=TRAILING_WINDOWS, rolling_window=ROLLING_WINDOW
+):
+    """Scores one prediction vector over the whole range and many windows.
+
+    Every window metric comes from the same cumulative counts: trailing
+    windows are differences against the end of the range, and all the
+    rolling windows are the vectorized difference counts[w:] - counts[:-w].
+    The rolling windows are summarized by the mean, standard deviation,
+    minimum and maximum of each metric. AUC, which needs the ranks of the
+    probabilities, is computed over the range and the trailing windows only,
+    and is UNDEFINED_AUC where a window holds a single class.
+
+    Args:
+        target (np.ndarray): Actual classes, 0 or 1.
+        probabilities (np.ndarray): Predicted probabilities of class 1.
+        windows (list): Trailing window lengths, in rows; those longer than
+            the range are listed under "skipped_windows".
+        rolling_window (int): Length of the rolling windows; 0 disables
+            them, and a length longer than the range leaves "count" at 0.
+
+    Returns:
+        dict: The metrics of the range, with a "windows" entry holding those
+            of each trailing window under "last_<rows>", a "skipped_windows"
+            list, and a "rolling" entry holding the rolling summaries.
+    """
+    target = np.asarray(target)
+    probabilities = np.asarray(probabilities)
+    n_rows = len(target)
+    counts = cumulative_counts(target, probabilities)
+
+    lengths = sorted({w for w in windows if 0 < w <= n_rows} | {n_rows})
+    starts = n_rows - np.array(lengths)
+    trailing = window_metrics(counts, starts, np.full(len(lengths), n_rows))
+    by_length = {}
+    for i, length in enumerate(lengths):
+        scores = {name: float(values[i]) for name, values in trailing.items()}
+        scores["auc"] = auc_score(target[-length:], probabilities[-length:])
+        scores["rows"] = length
+        by_length[length] = scores
+    skipped = sorted(w for w in windows if w > n_rows)
+    if skipped:
+        logging.warning(
+            f"Windows {skipped} are longer than the {n_rows} holdout rows and are "
+            "not scored; raise --holdout-rows to score them"
+        )
+
+    metrics = dict(by_length[n_rows])
+    metrics["windows"] = {
+        f"last_{length}": by_length[length] for length in lengths if length in windows
     }
+    metrics["skipped_windows"] = skipped
+    if rolling_window > n_rows:
+        logging.warning(
+            f"Rolling window of {rolling_window} rows is longer than the "
+            f"{n_rows} holdout rows and is not scored"
+        )
+        metrics["rolling"] = {"window": rolling_window, "count": 0}
+    elif rolling_window > 0:
+        starts = np.arange(n_rows - rolling_window + 1)
+        rolling = window_metrics(counts, starts, starts + rolling_window)
+        metrics["rolling"] = {"window": rolling_window, "count": len(starts)}
+        for name, values in rolling.items():
+            metrics["rolling"][name] = {
+                "mean": float(values.mean()),
+                "std": float(values.std()),
+                "min": float(values.min()),
+                "max": float(values.max()),
+            }
+    return metrics
+
+
+def evaluate_model(
+    data,
+    features,
+    model,
+    mode="windows",
+    holdout_rows=HOLDOUT_ROWS,
+    windows=TRAILING_WINDOWS,
+    rolling_window=ROLLING_WINDOW,
+):
+    """Evaluates the model on the rows held out of training.
+
+    The holdout is predicted once; every metric is computed from that one
+    prediction vector.
+
+    Args:
+        data (pd.DataFrame): Features and target, in time order.
+        features (list): Feature columns the model consumes.
+        model (xgb.Booster): Trained model.
+        mode (str): "tail" for the holdout precision only, or "windows".
+        holdout_rows (int): Most recent rows left out of training.
+        windows (list): Trailing window lengths scored in "windows" mode.
+        rolling_window (int): Length of the rolling windows in "windows" mode.
+
+    Returns:
+        dict: Evaluation metrics; "precision" is always the holdout precision.
+    """
+    if mode not in EVALUATION_MODES:
+        raise ValueError(
+            f"Unsupported evaluation mode '{mode}'. Use one of {EVALUATION_MODES}."
+        )
+    if holdout_rows < 1:
+        raise ValueError("At least one holdout row is required.")
+
+    x_test = data[features].iloc[-holdout_rows:]
+    y_test = data["Target"].iloc[-holdout_rows:].to_numpy()
+    probabilities = model.predict(xgb.DMatrix(x_test))
+
+    if mode == "tail":
+        predictions = (probabilities >= THRESHOLD).astype(int)
+        return {
+            "precision": float(precision_score(y_test, predictions, zero_division=0))
+        }
+    return evaluation_metrics(y_test, probabilities, windows, rolling_window)
 
 
 def save_results(metrics, output_dir):
@@ -117,16 +343,35 @@ def main():
     args = parse_args()
 
     # Load data, model, and evaluate
-    data = load_data(args.input_path)
-    model = load_xgboost_model(args.model_path)
-    features = data.columns[-10:].to_list()
-    metrics = evaluate_model(data, features, model)
-
-    # Print metrics and save to output
-    print("Evaluation Metrics:")
-    for key, value in metrics.items():
-        print(f"{key}: {value:.4f}")
-    save_results(metrics, args.output_path)
+    stage_metrics = StageMetrics("evaluate_model")
+    try:
+        with stage_metrics.phase("total"):
+            with stage_metrics.phase("load_model"):
+                model = load_xgboost_model(args.model_path)
+                features = model_features(args.model_path, model)
+            with stage_metrics.phase("load_data") as phase:
+                data = load_data(args.input_path, columns=features + ["Target"])
+                phase.record(rows_out=len(data))
+            with stage_metrics.phase("evaluate") as phase:
+                metrics = evaluate_model(
+                    data,
+                    features,
+                    model,
+                    args.mode,
+                    args.holdout_rows,
+                    [int(w) for w in args.windows.split(",") if w.strip()],
+                    args.rolling_window,
+                )
+                phase.record(rows_in=min(args.holdout_rows, len(data)))
+
+            # Print the holdout metrics and save every metric to output
+            print("Evaluation Metrics:")
+            for key, value in metrics.items():
+                if isinstance(value, float):
+                    print(f"{key}: {value:.4f}")
+            save_results(metrics, args.output_path)
+    finally:
+        stage_metrics.save(args.output_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,125 @@
+import os
+import hashlib
+import logging
+import pandas as pd
+
+import feature_engine
+import feature_registry
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Modules whose source is part of every cache key
+FEATURE_MODULES = (feature_engine, feature_registry)
+
+
+def feature_code_version():
+    """Returns a digest of the feature code, so cached features expire when it changes.
+
+    feature_engine.py holds the Target definition shared by training and
+    inference processing, so a Target change expires the entries too.
+    """
+    digest = hashlib.sha256(str(feature_engine.FEATURE_VERSION).encode())
+    for module in FEATURE_MODULES:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cache_key(data, features):
+    """Builds a content-addressed key for the features of `data`.
+
+    Args:
+        data (pd.DataFrame): Input bars, before any processing.
+        features (list): Requested feature names.
+
+    Returns:
+        str: SHA-256 hex digest of the bars, the feature names and the feature code version.
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(repr(list(data.columns)).encode())
+    digest.update(repr([str(dtype) for dtype in data.dtypes]).encode())
+    digest.update(repr(list(features)).encode())
+    digest.update(feature_code_version().encode())
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """Local on-disk cache of feature matrices with size-bounded LRU eviction.
+
+    Entries are pickled dataframes named by their content-addressed key, so
+    they round-trip bit for bit. A hit refreshes the entry's modification
+    time; when the cache grows beyond `max_bytes`, the least recently used
+    entries are removed first.
+
+    Args:
+        cache_dir (str): Directory holding the cache entries.
+        max_bytes (int): Maximum total size of the cache.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pkl")
+
+    def get(self, key):
+        """Returns the cached dataframe for `key`, or None on a miss."""
+        path = self._path(key)
+        try:
+            data = pd.read_pickle(path)
+        except (FileNotFoundError, EOFError):
+            logging.info(f"Feature cache miss: {key[:12]}")
+            return None
+        os.utime(path)
+        logging.info(f"Feature cache hit: {key[:12]}")
+        return data
+
+    def put(self, key, data):
+        """Stores `data` under `key` and evicts old entries beyond the size limit."""
+        path = self._path(key)
+        tmp_path = path + ".tmp"
+        data.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits in `max_bytes`."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            logging.info(f"Evicted feature cache entry {name}")
+
+
+def cached_features(cache, data, features, compute):
+    """Returns the features of `data`, computing them only on a cache miss.
+
+    Args:
+        cache (FeatureCache): Cache to use, or None to always compute.
+        data (pd.DataFrame): Input bars; hashed before `compute` runs.
+        features (list): Requested feature names.
+        compute (callable): Builds the feature frame from `data`.
+
+    Returns:
+        pd.DataFrame: Feature frame.
+    """
+    if cache is None:
+        return compute()
+
+    key = cache_key(data, features)
+    result = cache.get(key)
+    if result is None:
+        result = compute()
+        cache.put(key, result)
+    return result
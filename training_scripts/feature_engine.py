@@ -0,0 +1,202 @@
+import logging
+import numpy as np
+import pandas as pd
+
+# Default horizons (in bars) for feature generation
+HORIZONS = [2, 5, 60, 250, 1000]
+
+# Default horizons (in bars) per bar interval, from a few bars up to weeks
+# or months of trading; a regular session has 390 1m, 78 5m, 26 15m, 13 30m
+# and 7 1h bars
+INTERVAL_HORIZONS = {
+    "1m": [5, 30, 390, 1950, 7800],
+    "5m": [3, 12, 78, 390, 1560],
+    "15m": [4, 26, 130, 520, 1560],
+    "30m": [2, 13, 65, 260, 780],
+    "1h": [2, 7, 35, 140, 700],
+    "1d": HORIZONS,
+}
+
+# Cached features expire when this module or feature_registry.py changes,
+# which covers the Target definition in `add_target`; bump to expire them
+# for any other reason
+FEATURE_VERSION = 1
+
+
+def feature_names(horizons):
+    """Returns the feature column names in the order they are generated.
+
+    Args:
+        horizons (list): List of horizons for feature generation.
+
+    Returns:
+        list: e.g. ["Close_Ratio_2", "Trend_2", "Close_Ratio_5", ...].
+    """
+    names = []
+    for horizon in horizons:
+        names.extend([f"Close_Ratio_{horizon}", f"Trend_{horizon}"])
+    return names
+
+
+def interval_horizons(interval):
+    """Returns the default horizons, in bars, for a bar interval such as "5m" or "1d"."""
+    if interval not in INTERVAL_HORIZONS:
+        raise ValueError(
+            f"No default horizons for interval '{interval}'. "
+            f"Use one of {list(INTERVAL_HORIZONS)} or pass the features explicitly."
+        )
+    return INTERVAL_HORIZONS[interval]
+
+
+def sums_are_exact(values):
+    """Checks that every partial sum of `values` is exactly representable.
+
+    All values are multiples of the smallest power of two among their
+    lowest set bits. If the sum of their magnitudes stays below 2**52 of
+    those units, any sum of any subset, in any order, is exact in float64.
+    Rolling sums from prefix sums then equal pandas' rolling sums bit for bit.
+    Prices quoted with float32 precision (as returned by yfinance) always
+    satisfy this.
+
+    Args:
+        values (np.ndarray): Float64 values.
+
+    Returns:
+        bool: True if prefix-sum differences are exact.
+    """
+    if not np.isfinite(values).all():
+        return False
+    nonzero = values[values != 0]
+    if nonzero.size == 0:
+        return True
+
+    mantissa, exponent = np.frexp(nonzero)
+    integer_mantissa = np.abs(mantissa * 2.0**53).astype(np.int64)
+    lowest_bit = integer_mantissa & -integer_mantissa
+    granularity = exponent - 53 + (np.frexp(lowest_bit.astype(np.float64))[1] - 1)
+    total = np.abs(nonzero).sum()
+    return bool(np.log2(total) - granularity.min() < 52)
+
+
+def prefix_sums(values):
+    """Returns the prefix sums of `values` with a leading zero (length n + 1)."""
+    sums = np.empty(values.size + 1, dtype=np.float64)
+    sums[0] = 0.0
+    np.cumsum(values, out=sums[1:])
+    return sums
+
+
+def close_ratio(close, horizon, close_sums=None):
+    """Returns Close divided by its rolling mean over `horizon` bars.
+
+    Args:
+        close (np.ndarray): Float64 close prices in time order.
+        horizon (int): Window length in bars.
+        close_sums (np.ndarray, optional): `prefix_sums(close)` when
+            `sums_are_exact(close)`; otherwise pandas' rolling mean is used.
+
+    Returns:
+        np.ndarray: Ratios, NaN for rows without a full window.
+    """
+    n = close.size
+    ratio = np.full(n, np.nan)
+    if horizon > n:
+        return ratio
+    if close_sums is None:
+        # Prefix-sum differences would round differently from pandas here
+        return close / pd.Series(close).rolling(horizon).mean().to_numpy()
+    window_sums = close_sums[horizon:] - close_sums[: n + 1 - horizon]
+    ratio[horizon - 1 :] = close[horizon - 1 :] / (window_sums / horizon)
+    return ratio
+
+
+def trend(target_sums, horizon):
+    """Returns the sum of Target over the `horizon` bars before each row.
+
+    Args:
+        target_sums (np.ndarray): `prefix_sums(target)`.
+        horizon (int): Window length in bars.
+
+    Returns:
+        np.ndarray: Trend values, NaN for rows without a full window.
+    """
+    n = target_sums.size - 1
+    values = np.full(n, np.nan)
+    if horizon < n:
+        values[horizon:] = target_sums[horizon:n] - target_sums[: n - horizon]
+    return values
+
+
+def exact_close_sums(close):
+    """Returns `prefix_sums(close)` if they are exact, otherwise None."""
+    if sums_are_exact(close):
+        return prefix_sums(close)
+    logging.info("Close prices are not exactly summable; using pandas rolling")
+    return None
+
+
+def compute_features(close, target, horizons):
+    """Computes Close_Ratio_h and Trend_h for every horizon in one pass.
+
+    Close_Ratio_h is Close divided by its rolling mean over h bars; Trend_h
+    is the sum of Target over the h bars before the current one. Both come
+    from a single prefix sum of each input array, so the cost is O(n) per
+    horizon regardless of h. Results are identical to
+
+        data["Close"] / data.rolling(h).mean()["Close"]
+        data.shift(1).rolling(h).sum()["Target"]
+
+    including NaN for rows without a full window.
+
+    Args:
+        close (array-like): Close prices in time order.
+        target (array-like): 0/1 targets in time order.
+        horizons (list): List of horizons for feature generation.
+
+    Returns:
+        dict: Feature name -> np.ndarray, in generation order.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    close_sums = exact_close_sums(close)
+    target_sums = prefix_sums(np.asarray(target, dtype=np.float64))
+
+    features = {}
+    for horizon in horizons:
+        features[f"Close_Ratio_{horizon}"] = close_ratio(close, horizon, close_sums)
+        features[f"Trend_{horizon}"] = trend(target_sums, horizon)
+    return features
+
+
+def add_target(data, by=None):
+    """Adds Tomorrow, the next close, and Target, whether it is above the close.
+
+    Training and inference processing both define the target here, so the
+    feature cache key, which hashes this module, changes with it.
+
+    Args:
+        data (pd.DataFrame): Bars in time order, per series when `by` is set.
+        by (str, optional): Column identifying the series of each row; the
+            next close is then that of the same series.
+
+    Returns:
+        pd.DataFrame: `data`, with the Tomorrow and Target columns added.
+    """
+    close = data["Close"]
+    data["Tomorrow"] = (close.groupby(data[by], sort=False) if by else close).shift(-1)
+    data["Target"] = (data["Tomorrow"] > close).astype(int)
+    return data
+
+
+def add_feature_columns(data, horizons):
+    """Appends all horizon features to a frame holding Close and Target columns.
+
+    Args:
+        data (pd.DataFrame): Input dataframe in time order.
+        horizons (list): List of horizons for feature generation.
+
+    Returns:
+        pd.DataFrame: `data` with the feature columns appended.
+    """
+    features = compute_features(data["Close"], data["Target"], horizons)
+    data = data.drop(columns=list(features), errors="ignore")
+    return pd.concat([data, pd.DataFrame(features, index=data.index)], axis=1)
@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import logging
+import numpy as np
+import pandas as pd
+
+from feature_engine import (
+    HORIZONS,
+    close_ratio,
+    exact_close_sums,
+    feature_names,
+    interval_horizons,
+    prefix_sums,
+    trend,
+)
+
+# Input columns every feature is ultimately derived from
+BASE_COLUMNS = ["Close", "Target"]
+
+# Features consumed by the model unless configured otherwise
+DEFAULT_FEATURES = feature_names(HORIZONS)
+
+# Feature list persisted beside model.xgb
+FEATURES_FILE = "features.json"
+
+
+class FeatureDefinition:
+    """A named feature with its dependencies and lookback.
+
+    Args:
+        name (str): Feature (or intermediate) name.
+        compute (callable): Takes a dict of already computed arrays, keyed by
+            name, and returns this feature as a NumPy array.
+        dependencies (list): Names that must be computed first.
+        lookback (int): Bars of history, including the current bar, needed
+            for a non-NaN value.
+    """
+
+    def __init__(self, name, compute, dependencies=(), lookback=1):
+        self.name = name
+        self.compute = compute
+        self.dependencies = list(dependencies)
+        self.lookback = lookback
+
+
+_DEFINITIONS = {}
+_FAMILIES = []
+
+
+def register_feature(name, dependencies=(), lookback=1):
+    """Decorator registering a feature with a fixed name."""
+
+    def decorator(compute):
+        _DEFINITIONS[name] = FeatureDefinition(name, compute, dependencies, lookback)
+        return compute
+
+    return decorator
+
+
+def register_family(pattern):
+    """Decorator registering a parametrized feature family.
+
+    The decorated builder receives the regex match of a requested name and
+    returns its FeatureDefinition, e.g. "Close_Ratio_(\\d+)" for any horizon.
+    """
+
+    def decorator(builder):
+        _FAMILIES.append((re.compile(pattern), builder))
+        return builder
+
+    return decorator
+
+
+def get_definition(name):
+    """Returns the definition of a registered feature.
+
+    Raises:
+        KeyError: If no registered feature or family matches `name`.
+    """
+    if name in _DEFINITIONS:
+        return _DEFINITIONS[name]
+    for pattern, builder in _FAMILIES:
+        match = pattern.fullmatch(name)
+        if match:
+            return builder(match)
+    raise KeyError(f"Unknown feature '{name}'.")
+
+
+def resolve(names):
+    """Returns the definitions needed for `names`, dependencies first.
+
+    Args:
+        names (list): Requested feature names.
+
+    Returns:
+        list: FeatureDefinition objects in a valid computation order.
+    """
+    ordered = {}
+
+    def visit(name, path):
+        if name in ordered or name in BASE_COLUMNS:
+            return
+        if name in path:
+            raise ValueError(f"Circular feature dependency: {' -> '.join(path)}")
+        definition = get_definition(name)
+        for dependency in definition.dependencies:
+            visit(dependency, path + [name])
+        ordered[name] = definition
+
+    for name in names:
+        visit(name, [])
+    return list(ordered.values())
+
+
+def max_lookback(names):
+    """Returns the number of bars needed to compute the latest row of `names`."""
+    return max(definition.lookback for definition in resolve(names))
+
+
+def segment_positions(symbols):
+    """Returns the position of every row within its run of equal symbols.
+
+    Args:
+        symbols (array-like): Symbol of every row, each symbol's rows contiguous.
+
+    Returns:
+        np.ndarray: 0 for the first row of each symbol, 1 for the next, ...
+    """
+    codes, _ = pd.factorize(np.asarray(symbols))
+    n = codes.size
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n else codes
+    return np.arange(n) - np.repeat(starts, np.diff(np.r_[starts, n]))
+
+
+def compute_selected(data, names, symbols=None):
+    """Computes only the requested features and their dependencies.
+
+    With `symbols`, the rows hold several series back to back (a panel)
+    and every feature is computed for all of them in one pass over the
+    concatenated arrays. Windows that reach into the previous symbol are
+    exactly the rows within a feature's lookback of a symbol's first row,
+    so those are set to NaN, as in a separate computation per symbol.
+
+    Args:
+        data (pd.DataFrame): Input dataframe in time order with Close and Target columns.
+        names (list): Requested feature names.
+        symbols (array-like, optional): Symbol of every row, each symbol's
+            rows contiguous and in time order.
+
+    Returns:
+        pd.DataFrame: The requested features, in the requested order.
+    """
+    values = {column: data[column].to_numpy() for column in BASE_COLUMNS}
+    definitions = resolve(names)
+    for definition in definitions:
+        values[definition.name] = definition.compute(values)
+
+    if symbols is not None:
+        positions = segment_positions(symbols)
+        lookbacks = {definition.name: definition.lookback for definition in definitions}
+        for name in names:
+            if name in lookbacks:
+                values[name] = np.where(
+                    positions >= lookbacks[name] - 1, values[name], np.nan
+                )
+    return pd.DataFrame({name: values[name] for name in names}, index=data.index)
+
+
+def add_selected_features(data, names, symbols=None):
+    """Appends the requested features to `data`, replacing existing columns of the same name."""
+    features = compute_selected(data, names, symbols)
+    data = data.drop(columns=names, errors="ignore")
+    return pd.concat([data, features], axis=1)
+
+
+def save_feature_list(model_dir, features):
+    """Writes the model's feature list beside model.xgb."""
+    path = os.path.join(model_dir, FEATURES_FILE)
+    with open(path, "w") as f:
+        json.dump({"features": list(features)}, f, indent=2)
+    logging.info(f"Saved feature list to {path}")
+
+
+def load_feature_list(model_dir):
+    """Reads the feature list saved beside model.xgb, or None if there is none."""
+    path = os.path.join(model_dir, FEATURES_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)["features"]
+
+
+def parse_feature_list(value, interval="1d"):
+    """Parses a comma-separated --features argument.
+
+    Without one, the ratio and trend features of the default horizons of
+    the bar `interval` are used; DEFAULT_FEATURES for daily bars.
+    """
+    if not value:
+        return feature_names(interval_horizons(interval))
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+######################### Registered features #########################
+
+
+@register_feature("close_sums", dependencies=["Close"])
+def _close_sums(values):
+    # None when prefix sums would not be exact; close_ratio then falls back to pandas
+    return exact_close_sums(np.asarray(values["Close"], dtype=np.float64))
+
+
+@register_feature("target_sums", dependencies=["Target"])
+def _target_sums(values):
+    return prefix_sums(np.asarray(values["Target"], dtype=np.float64))
+
+
+@register_family(r"Close_Ratio_(\d+)")
+def _close_ratio_family(match):
+    horizon = int(match.group(1))
+    return FeatureDefinition(
+        match.group(0),
+        lambda values: close_ratio(
+            np.asarray(values["Close"], dtype=np.float64),
+            horizon,
+            values["close_sums"],
+        ),
+        dependencies=["close_sums"],
+        lookback=horizon,
+    )
+
+
+@register_family(r"Trend_(\d+)")
+def _trend_family(match):
+    horizon = int(match.group(1))
+    return FeatureDefinition(
+        match.group(0),
+        lambda values: trend(values["target_sums"], horizon),
+        dependencies=["target_sums"],
+        # Target of the oldest bar needs the close after it
+        lookback=horizon + 1,
+    )
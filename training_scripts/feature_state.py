@@ -0,0 +1,228 @@
+import os
+import json
+import logging
+import pandas as pd
+
+from feature_engine import HORIZONS, feature_names
+
+
+class FeatureState:
+    """Serializable rolling state for next-bar feature updates.
+
+    Holds ring buffers of the last `max(horizons)` closes and targets and a
+    running window sum per horizon, so each new bar updates every
+    Close_Ratio_h and Trend_h feature in O(#horizons). Close sums use the
+    same compensated add/remove sequence as pandas' rolling mean, so the
+    features match the batch kernel in `feature_engine`. With
+    `history_rows` set, the features of the latest bars are kept too, so
+    a window of recent rows is available without a batch recompute.
+
+    Args:
+        horizons (list): List of horizons for feature generation.
+        history_rows (int): Latest feature rows kept in the state.
+    """
+
+    def __init__(self, horizons=HORIZONS, history_rows=0):
+        self.horizons = list(horizons)
+        self.history_rows = history_rows
+        # [ISO date, *feature values] of the latest bars, oldest first
+        self.history = []
+        self.capacity = max(self.horizons)
+        self.closes = [0.0] * self.capacity
+        self.targets = [0] * self.capacity
+        self.n_closes = 0
+        self.n_targets = 0
+        self.close_sums = [0.0] * len(self.horizons)
+        self.add_compensation = [0.0] * len(self.horizons)
+        self.remove_compensation = [0.0] * len(self.horizons)
+        self.trend_sums = [0] * len(self.horizons)
+        self.same_value_run = 0
+        self.last_close = None
+        self.last_date = None
+
+    @staticmethod
+    def _kahan_add(total, compensation, value):
+        y = value - compensation
+        t = total + y
+        return t, (t - total) - y
+
+    def update(self, date, close):
+        """Adds the next bar and updates the running window sums.
+
+        Args:
+            date: Timestamp of the bar.
+            close (float): Close price of the bar.
+        """
+        close = float(close)
+        slot = self.n_closes % self.capacity
+
+        if self.last_close is not None:
+            # Yesterday's target is known once today's close arrives
+            target = int(close > self.last_close)
+            target_slot = self.n_targets % self.capacity
+            for i, horizon in enumerate(self.horizons):
+                if self.n_targets >= horizon:
+                    self.trend_sums[i] -= self.targets[
+                        (self.n_targets - horizon) % self.capacity
+                    ]
+                self.trend_sums[i] += target
+            self.targets[target_slot] = target
+            self.n_targets += 1
+
+        for i, horizon in enumerate(self.horizons):
+            if self.n_closes >= horizon:
+                self.close_sums[i], self.remove_compensation[i] = self._kahan_add(
+                    self.close_sums[i],
+                    self.remove_compensation[i],
+                    -self.closes[(self.n_closes - horizon) % self.capacity],
+                )
+            self.close_sums[i], self.add_compensation[i] = self._kahan_add(
+                self.close_sums[i], self.add_compensation[i], close
+            )
+
+        self.same_value_run = self.same_value_run + 1 if close == self.last_close else 1
+        self.closes[slot] = close
+        self.n_closes += 1
+        self.last_close = close
+        self.last_date = pd.Timestamp(date)
+        if self.history_rows:
+            self.history.append([self.last_date.isoformat(), *self.features().values()])
+            del self.history[: -self.history_rows]
+
+    def features(self):
+        """Returns the features of the latest bar, NaN where history is too short.
+
+        Returns:
+            dict: Feature name -> value, in generation order.
+        """
+        values = {}
+        for i, horizon in enumerate(self.horizons):
+            ratio = trend = float("nan")
+            if self.n_closes >= horizon:
+                if self.same_value_run >= horizon:
+                    mean = self.last_close
+                else:
+                    mean = self.close_sums[i] / horizon
+                ratio = self.last_close / mean
+            if self.n_targets >= horizon:
+                trend = float(self.trend_sums[i])
+            values[f"Close_Ratio_{horizon}"] = ratio
+            values[f"Trend_{horizon}"] = trend
+        return values
+
+    def to_frame(self):
+        """Returns the latest features as a one-row dataframe."""
+        return pd.DataFrame(
+            [self.features()],
+            index=pd.Index([self.last_date], name="Date"),
+            columns=feature_names(self.horizons),
+        )
+
+    def history_frame(self):
+        """Returns the features of the latest `history_rows` bars, oldest first."""
+        columns = feature_names(self.horizons)
+        if not self.history:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name="Date"))
+        dates, *values = zip(*self.history)
+        return pd.DataFrame(
+            dict(zip(columns, values)),
+            index=pd.Index(pd.to_datetime(dates), name="Date"),
+            columns=columns,
+        )
+
+    @classmethod
+    def from_history(cls, dates, closes, horizons=HORIZONS, history_rows=0):
+        """Builds the state by replaying a full price history.
+
+        Args:
+            dates (iterable): Bar timestamps in time order.
+            closes (iterable): Close prices in time order.
+            horizons (list): List of horizons for feature generation.
+            history_rows (int): Latest feature rows kept in the state.
+
+        Returns:
+            FeatureState: State positioned after the last bar.
+        """
+        state = cls(horizons, history_rows)
+        for date, close in zip(dates, closes):
+            state.update(date, close)
+        return state
+
+    def to_dict(self):
+        """Returns a JSON-serializable representation of the state."""
+        state = dict(self.__dict__)
+        state["last_date"] = (
+            self.last_date.isoformat() if self.last_date is not None else None
+        )
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        """Restores a state produced by `to_dict`."""
+        restored = cls(state["horizons"])
+        restored.__dict__.update(state)
+        if restored.last_date is not None:
+            restored.last_date = pd.Timestamp(restored.last_date)
+        return restored
+
+    def save(self, path):
+        """Writes the state to a JSON file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+        logging.info(f"Saved feature state after {self.last_date} to {path}")
+
+    @classmethod
+    def load(cls, path):
+        """Reads a state written by `save`."""
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+
+def resume_state(path, dates, closes, horizons=HORIZONS, history_rows=0):
+    """Loads the persisted state and feeds it only the bars it has not seen.
+
+    The state is rebuilt from the full history when it is missing, uses
+    different horizons, keeps fewer than `history_rows` feature rows, or
+    no longer lines up with the given history (its last bar is absent or
+    has a revised close).
+
+    Args:
+        path (str): Path of the persisted state JSON file.
+        dates (pd.Series): Bar timestamps in time order.
+        closes (pd.Series): Close prices in time order.
+        horizons (list): List of horizons for feature generation.
+        history_rows (int): Latest feature rows the state must keep.
+
+    Returns:
+        FeatureState: Up-to-date state.
+    """
+    dates = pd.to_datetime(pd.Series(dates), utc=True).reset_index(drop=True)
+    closes = pd.Series(closes).reset_index(drop=True)
+
+    state = None
+    if os.path.exists(path):
+        state = FeatureState.load(path)
+        if (
+            state.horizons != list(horizons)
+            or state.history_rows < history_rows
+            or state.last_date is None
+        ):
+            state = None
+        else:
+            matches = dates[dates == state.last_date].index
+            if len(matches) != 1 or closes[matches[0]] != state.last_close:
+                logging.info("Feature state does not match the history, rebuilding")
+                state = None
+
+    if state is None:
+        logging.info("Building feature state from full history")
+        return FeatureState.from_history(dates, closes, horizons, history_rows)
+
+    new_bars = dates > state.last_date
+    logging.info(f"Updating feature state with {new_bars.sum()} new bars")
+    for date, close in zip(dates[new_bars], closes[new_bars]):
+        state.update(date, close)
+    return state
@@ -1,10 +1,59 @@
 # Function to load the model during inference
+import io
 import os
+import numpy as np
+import pandas as pd
 import xgboost as xgb
 
+from feature_registry import load_feature_list
+
+CSV_CONTENT_TYPE = "text/csv"
+
 
 def model_fn(model_dir):
     """Load model from the directory where it was saved during training."""
     model = xgb.Booster()
     model.load_model(os.path.join(model_dir, "model.xgb"))
+
+    # Serve exactly the columns the model was trained on
+    features = load_feature_list(model_dir)
+    if features is not None and model.feature_names not in (None, features):
+        raise ValueError(
+            f"features.json {features} does not match the model's features "
+            f"{model.feature_names}"
+        )
     return model
+
+
+def input_fn(request_body, request_content_type):
+    """Parse a CSV mini-batch, one record per line, into a single float32 matrix."""
+    if request_content_type != CSV_CONTENT_TYPE:
+        raise ValueError(f"Unsupported content type: {request_content_type}")
+    if isinstance(request_body, str):
+        request_body = request_body.encode()
+    matrix = pd.read_csv(
+        io.BytesIO(request_body), header=None, dtype=np.float32
+    ).to_numpy()
+    return np.atleast_2d(matrix)
+
+
+def predict_fn(input_data, model):
+    """Score the whole mini-batch with one vectorized predict call."""
+    if input_data.shape[1] != model.num_features():
+        raise ValueError(
+            f"Expected {model.num_features()} features, got {input_data.shape[1]}"
+        )
+    return model.inplace_predict(input_data)
+
+
+def output_fn(prediction, accept):
+    """Serialize predictions as one CSV line per input record.
+
+    Every line ends with a newline, so "Line" assembly of consecutive
+    mini-batches keeps one prediction per record.
+    """
+    if accept not in (CSV_CONTENT_TYPE, "*/*", None):
+        raise ValueError(f"Unsupported accept type: {accept}")
+    buffer = io.StringIO()
+    np.savetxt(buffer, np.asarray(prediction).reshape(-1), fmt="%.9g")
+    return buffer.getvalue(), CSV_CONTENT_TYPE
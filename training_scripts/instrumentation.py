@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import logging
+import resource
+from datetime import datetime, timezone
+
+METRICS_FILE = "metrics.json"
+
+# Set to "0" to disable instrumentation
+METRICS_ENV = "PIPELINE_METRICS"
+
+
+def _io_counters():
+    """Returns bytes read and written by this process so far, or (None, None).
+
+    Uses the rchar/wchar counters of /proc/self/io, which count every read
+    and write call (files and sockets alike) and are only available on Linux.
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(": ") for line in f.read().splitlines())
+        return int(counters["rchar"]), int(counters["wchar"])
+    except (OSError, KeyError, ValueError):
+        return None, None
+
+
+def _peak_rss_mb():
+    """Returns the peak resident memory of this process in MiB (Linux reports KiB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _delta(end, start):
+    return None if end is None or start is None else end - start
+
+
+class Phase:
+    """Context manager measuring one stage or sub-phase.
+
+    Records wall time, CPU time, bytes read and written, the peak RSS of
+    the process at its end and any row counts passed to `record`.
+    """
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.counts = {}
+
+    def record(self, **counts):
+        """Adds counters such as rows_in=... and rows_out=... to this phase."""
+        self.counts.update(counts)
+
+    def __enter__(self):
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.start_read, self.start_written = _io_counters()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        bytes_read, bytes_written = _io_counters()
+        result = {
+            "name": self.name,
+            "wall_seconds": time.perf_counter() - self.start_wall,
+            "cpu_seconds": time.process_time() - self.start_cpu,
+            "peak_rss_mb": _peak_rss_mb(),
+            "bytes_read": _delta(bytes_read, self.start_read),
+            "bytes_written": _delta(bytes_written, self.start_written),
+            "failed": exc_type is not None,
+        }
+        result.update(self.counts)
+        self.metrics.phases.append(result)
+        return False
+
+
+class _DisabledPhase:
+    """Stand-in for Phase when instrumentation is off; every call is a no-op."""
+
+    def record(self, **counts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+_DISABLED_PHASE = _DisabledPhase()
+
+
+class StageMetrics:
+    """Collects the phases of one pipeline stage and writes them to metrics.json.
+
+    Entry points wrap their work in `with metrics.phase("stage"):` and the
+    functions they call add sub-phases the same way. When disabled, either
+    explicitly or with PIPELINE_METRICS=0, `phase` returns a shared no-op
+    object and nothing is measured or written.
+
+    Args:
+        stage (str): Stage name, e.g. "data_processing".
+        enabled (bool, optional): Defaults to the PIPELINE_METRICS variable,
+            enabled unless it is "0".
+    """
+
+    def __init__(self, stage, enabled=None):
+        if enabled is None:
+            enabled = os.environ.get(METRICS_ENV, "1") != "0"
+        self.stage = stage
+        self.enabled = enabled
+        self.started = datetime.now(timezone.utc).isoformat()
+        self.phases = []
+
+    def phase(self, name):
+        """Returns a context manager measuring the phase `name`."""
+        if not self.enabled:
+            return _DISABLED_PHASE
+        return Phase(self, name)
+
+    def to_dict(self):
+        """Returns the collected metrics as a JSON-serializable dict."""
+        return {"stage": self.stage, "started": self.started, "phases": self.phases}
+
+    def save(self, output_dir):
+        """Writes metrics.json to `output_dir`; does nothing when disabled.
+
+        Returns:
+            str: Path of the written file, or None when disabled.
+        """
+        if not self.enabled:
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, METRICS_FILE)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        for phase in self.phases:
+            logging.info(
+                f"{self.stage}/{phase['name']}: {phase['wall_seconds']:.3f}s wall, "
+                f"{phase['cpu_seconds']:.3f}s CPU, {phase['peak_rss_mb']:.0f} MiB peak RSS"
+            )
+        return path
+
+
+# Default for functions called without instrumentation
+DISABLED_METRICS = StageMetrics("disabled", enabled=False)
@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+import logging
+import tarfile
+import xgboost as xgb
+
+from feature_registry import FEATURES_FILE
+
+MODEL_FILE = "model.xgb"
+
+# Loaded archives keyed by the SHA-256 of their content
+_ARCHIVE_CACHE = {}
+
+
+def archive_digest(archive_path, chunk_size=1024 * 1024):
+    """Returns the SHA-256 hex digest of the archive, read in chunks."""
+    digest = hashlib.sha256()
+    with open(archive_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_members(archive_path, names):
+    """Reads the requested files out of a tar.gz archive without extracting it.
+
+    Members are matched by base name, so "model.xgb" and "./model.xgb"
+    both count.
+
+    Args:
+        archive_path (str): Path to the tar.gz archive.
+        names (list): Base names of the files to read.
+
+    Returns:
+        dict: Base name -> bytes for the files present in the archive.
+    """
+    members = {}
+    with tarfile.open(archive_path, "r:gz") as tar:
+        for member in tar:
+            name = os.path.basename(member.name)
+            if member.isfile() and name in names and name not in members:
+                members[name] = tar.extractfile(member).read()
+    return members
+
+
+def load_model_archive(archive_path):
+    """Loads the booster and feature list from model.tar.gz in memory.
+
+    model.xgb is streamed from the archive into `Booster.load_model`
+    without touching the filesystem. Results are memoized by the content
+    hash of the archive, so loading the same artifact again skips the
+    decompression; the returned booster is shared and must not be modified.
+
+    Args:
+        archive_path (str): Path to model.tar.gz.
+
+    Returns:
+        xgb.Booster: Loaded model.
+        list: Feature names from features.json, or None if the archive has none.
+    """
+    digest = archive_digest(archive_path)
+    if digest in _ARCHIVE_CACHE:
+        logging.info(f"Using cached model for archive {digest[:12]}")
+        return _ARCHIVE_CACHE[digest]
+
+    members = read_members(archive_path, [MODEL_FILE, FEATURES_FILE])
+    if MODEL_FILE not in members:
+        raise FileNotFoundError(f"{MODEL_FILE} not found in {archive_path}")
+
+    model = xgb.Booster()
+    model.load_model(bytearray(members[MODEL_FILE]))
+    features = None
+    if FEATURES_FILE in members:
+        features = json.loads(members[FEATURES_FILE])["features"]
+
+    _ARCHIVE_CACHE[digest] = (model, features)
+    logging.info(f"Loaded model from archive {digest[:12]}")
+    return model, features
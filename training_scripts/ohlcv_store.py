@@ -0,0 +1,259 @@
+import os
+import re
+import json
+import logging
+import threading
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+MANIFEST_FILE = "manifest.json"
+
+# Daily updates refetch the bars of this many calendar days before the
+# high-water mark, so a partial bar stored during the session and late
+# corrections are replaced by the upsert
+REFETCH_DAYS = 5
+
+# Columns whose change in refetched older bars means the history was
+# re-adjusted, e.g. by auto_adjust after a dividend or split
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# Longest history Yahoo Finance serves per intraday interval
+INTRADAY_PERIODS = {
+    "1m": "7d",
+    "5m": "60d",
+    "15m": "60d",
+    "30m": "60d",
+    "1h": "730d",
+}
+INTERVALS = list(INTRADAY_PERIODS) + ["1d"]
+
+
+def symbol_filename(symbol):
+    """Returns a filesystem-safe file name for a ticker symbol (e.g. ^GSPC -> _GSPC.csv)."""
+    return re.sub(r"[^A-Za-z0-9.\-]", "_", symbol) + ".csv"
+
+
+def store_key(symbol, interval="1d"):
+    """Returns the store key of a symbol's bars; daily bars are keyed by the symbol alone."""
+    if interval == "1d":
+        return symbol
+    return f"{symbol}@{interval}"
+
+
+class OHLCVStore:
+    """Persistent local store of OHLCV history keyed by symbol.
+
+    Each symbol's bars live in their own file; intraday bars are kept
+    separately under the keys returned by `store_key`. A manifest records the
+    high-water mark (last stored bar), timezone and column layout per symbol,
+    so bars newer than the high-water mark are appended without re-reading
+    stored history. Bars that overlap stored history are upserted by
+    rewriting the symbol's file.
+
+    Args:
+        store_dir (str): Directory holding the symbol files and the manifest.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        os.makedirs(store_dir, exist_ok=True)
+        self.manifest_path = os.path.join(store_dir, MANIFEST_FILE)
+        self.manifest = self._load_manifest()
+        # Guards the manifest when several symbols are ingested concurrently
+        self._lock = threading.Lock()
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {}
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _path(self, symbol):
+        return os.path.join(self.store_dir, symbol_filename(symbol))
+
+    def symbols(self):
+        """Returns the symbols currently held in the store."""
+        return sorted(self.manifest)
+
+    def high_water_mark(self, symbol):
+        """Returns the timestamp of the last stored bar for `symbol`, or None."""
+        entry = self.manifest.get(symbol)
+        if entry is None or not os.path.exists(self._path(symbol)):
+            return None
+        return pd.Timestamp(entry["high_water_mark"])
+
+    def load(self, symbol, start=None):
+        """Loads stored bars for `symbol`, optionally from `start` onwards.
+
+        Args:
+            symbol (str): Ticker symbol.
+            start (str, optional): First date to return, e.g. "2020-01-31".
+
+        Returns:
+            pd.DataFrame: Bars indexed by Date, empty if the symbol is unknown.
+        """
+        if self.high_water_mark(symbol) is None:
+            return pd.DataFrame()
+
+        data = pd.read_csv(self._path(symbol), index_col="Date")
+        timezone = self.manifest[symbol].get("timezone")
+        if timezone:
+            index = pd.to_datetime(data.index, utc=True).tz_convert(timezone)
+        else:
+            index = pd.to_datetime(data.index)
+        data.index = index.rename("Date")
+
+        if start is not None:
+            data = data.loc[start:]
+        return data
+
+    def upsert(self, symbol, bars):
+        """Adds `bars` to the stored history of `symbol`.
+
+        Bars strictly newer than the high-water mark are appended in place;
+        any overlap with stored history replaces the stored rows.
+
+        Args:
+            symbol (str): Ticker symbol.
+            bars (pd.DataFrame): Bars indexed by Date.
+
+        Returns:
+            int: Number of bars added beyond the previous high-water mark.
+        """
+        if bars.empty:
+            return 0
+
+        bars = bars.sort_index()
+        bars = bars[~bars.index.duplicated(keep="last")]
+        bars.index = bars.index.rename("Date")
+        path = self._path(symbol)
+        entry = self.manifest.get(symbol)
+        high_water_mark = self.high_water_mark(symbol)
+
+        if high_water_mark is None:
+            bars.to_csv(path, index=True)
+            rows = len(bars)
+            new_rows = rows
+        elif bars.index[0] > high_water_mark and list(bars.columns) == entry["columns"]:
+            bars.to_csv(path, mode="a", header=False, index=True)
+            rows = entry["rows"] + len(bars)
+            new_rows = len(bars)
+        else:
+            logging.info(f"Upserting overlapping bars for {symbol}")
+            stored = self.load(symbol)
+            combined = pd.concat([stored, bars])
+            combined = combined[~combined.index.duplicated(keep="last")].sort_index()
+            tmp_path = path + ".tmp"
+            combined.to_csv(tmp_path, index=True)
+            os.replace(tmp_path, path)
+            rows = len(combined)
+            new_rows = int((bars.index > high_water_mark).sum())
+            bars = combined
+
+        timezone = getattr(bars.index, "tz", None)
+        with self._lock:
+            self.manifest[symbol] = {
+                "file": symbol_filename(symbol),
+                "high_water_mark": bars.index[-1].isoformat(),
+                "timezone": str(timezone) if timezone is not None else None,
+                "columns": list(bars.columns),
+                "rows": rows,
+            }
+            self._save_manifest()
+        return new_rows
+
+
+def history_revised(stored, fetched):
+    """Returns whether refetched bars changed the prices of stored bars.
+
+    The last stored bar is left out, since it may have been stored before
+    the session closed.
+
+    Args:
+        stored (pd.DataFrame): Stored bars indexed by Date.
+        fetched (pd.DataFrame): Refetched bars indexed by Date.
+
+    Returns:
+        bool: True if a price of a common, older bar differs.
+    """
+    common = stored.index[:-1].intersection(fetched.index)
+    columns = [c for c in PRICE_COLUMNS if c in stored and c in fetched]
+    if common.empty or not columns:
+        return False
+    return not np.allclose(
+        stored.loc[common, columns].to_numpy(dtype=float),
+        fetched.loc[common, columns].to_numpy(dtype=float),
+        rtol=1e-9,
+        equal_nan=True,
+    )
+
+
+def update_history(store, symbol, session=None, interval="1d"):
+    """Fetches the bars from shortly before the store's high-water mark and upserts them.
+
+    The first run for a symbol downloads its full history. Later runs
+    request the bars from REFETCH_DAYS before the last stored bar, so the
+    upsert replaces a partial last bar and late corrections. When the
+    refetched older bars have other prices, the history was re-adjusted
+    (auto_adjust after a dividend or split changes every earlier bar) and
+    the full history is downloaded again. Intraday bars are requested
+    from the day of the last stored bar, whose later bars may be missing,
+    within the period Yahoo Finance serves at that interval.
+
+    Args:
+        store (OHLCVStore): Store to update.
+        symbol (str): Ticker symbol, e.g. "^GSPC".
+        session: Optional HTTP session passed to yfinance.
+        interval (str): Bar interval, "1d" or a key of INTRADAY_PERIODS.
+
+    Returns:
+        int: Number of new bars stored.
+    """
+    ticker = yf.Ticker(symbol, session=session)
+    if interval != "1d":
+        return _update_intraday(store, ticker, symbol, interval)
+    high_water_mark = store.high_water_mark(symbol)
+
+    if high_water_mark is None:
+        print(f"No stored history for {symbol}, fetching full history...")
+        bars = ticker.history(period="max")
+    else:
+        start_date = (high_water_mark - timedelta(days=REFETCH_DAYS)).date()
+        print(f"Fetching {symbol} bars from {start_date}...")
+        bars = ticker.history(start=start_date.strftime("%Y-%m-%d"))
+        if history_revised(store.load(symbol, start=str(start_date)), bars):
+            print(f"Stored {symbol} prices were revised, fetching full history...")
+            bars = ticker.history(period="max")
+
+    new_rows = store.upsert(symbol, bars)
+    print(f"Stored {new_rows} new bars for {symbol}.")
+    return new_rows
+
+
+def _update_intraday(store, ticker, symbol, interval):
+    if interval not in INTRADAY_PERIODS:
+        raise ValueError(f"Unsupported interval '{interval}'. Use one of {INTERVALS}.")
+    key = store_key(symbol, interval)
+    period = INTRADAY_PERIODS[interval]
+    high_water_mark = store.high_water_mark(key)
+    oldest_available = pd.Timestamp.now(tz="UTC") - pd.Timedelta(period)
+
+    if high_water_mark is None or high_water_mark < oldest_available:
+        print(f"Fetching the last {period} of {interval} bars for {symbol}...")
+        bars = ticker.history(period=period, interval=interval)
+    else:
+        start_date = high_water_mark.date()
+        print(f"Fetching {symbol} {interval} bars from {start_date}...")
+        bars = ticker.history(start=start_date.strftime("%Y-%m-%d"), interval=interval)
+
+    new_rows = store.upsert(key, bars)
+    print(f"Stored {new_rows} new {interval} bars for {symbol}.")
+    return new_rows
@@ -0,0 +1,97 @@
+import os
+import json
+import logging
+import pandas as pd
+
+from artifact_io import find_artifact, read_frame
+from feature_engine import add_target
+from feature_registry import add_selected_features, max_lookback
+from ohlcv_store import symbol_filename
+from universe_ingestion import SUMMARY_FILE
+
+# Column identifying the series of each row in long-format panel data
+SYMBOL_COLUMN = "Symbol"
+
+
+def load_panel(input_path, columns=None):
+    """Loads long-format (symbol, date) data.
+
+    `input_path` is either one CSV or Parquet file with Symbol and Date
+    columns, or a multi-symbol ingestion output directory, whose per-symbol
+    files are listed in ingestion_summary.json.
+
+    Args:
+        input_path (str): Panel file or ingestion output directory.
+        columns (list, optional): Columns to load besides Symbol and Date.
+
+    Returns:
+        pd.DataFrame: Rows of every symbol with Symbol and Date columns.
+    """
+    if not os.path.isdir(input_path):
+        if columns is not None:
+            columns = [SYMBOL_COLUMN, "Date"] + list(columns)
+        return read_frame(input_path, columns=columns)
+
+    with open(os.path.join(input_path, SUMMARY_FILE), "r") as f:
+        symbols = sorted(json.load(f)["succeeded"])
+    if columns is not None:
+        columns = ["Date"] + list(columns)
+    frames = []
+    for symbol in symbols:
+        name = os.path.splitext(symbol_filename(symbol))[0]
+        frame = read_frame(find_artifact(input_path, name), columns=columns)
+        frame.insert(0, SYMBOL_COLUMN, symbol)
+        frames.append(frame)
+    logging.info(f"Loaded {len(frames)} symbols from {input_path}")
+    return pd.concat(frames, ignore_index=True)
+
+
+def sort_panel(panel):
+    """Orders the rows by symbol, then date, as the feature computation needs."""
+    return panel.sort_values([SYMBOL_COLUMN, "Date"], kind="stable", ignore_index=True)
+
+
+def build_panel_features(panel, features):
+    """Adds the target column and the features for every symbol of a panel.
+
+    All symbols are computed together in one vectorized pass with
+    segment-aware windows; each symbol's rows get the same values as a
+    separate single-symbol computation. The result is ordered by date, then
+    symbol, so pooled training holds out the most recent dates of every
+    symbol rather than the last symbol.
+
+    Args:
+        panel (pd.DataFrame): Long-format data with Symbol, Date and Close columns.
+        features (list): Feature names to compute.
+
+    Returns:
+        pd.DataFrame: Panel indexed by Date with Symbol, target and features.
+    """
+    panel = sort_panel(panel)
+    # The next close of the same symbol; NaN on each symbol's last row
+    panel = add_target(panel, by=SYMBOL_COLUMN)
+    symbols = panel[SYMBOL_COLUMN].to_numpy()
+    panel = add_selected_features(panel.set_index("Date"), features, symbols)
+    return panel.sort_values(["Date", SYMBOL_COLUMN], kind="stable")
+
+
+def latest_panel_rows(panel, features):
+    """Computes the features of the latest bar of every symbol.
+
+    Only the bars within the longest lookback of each symbol are used.
+
+    Args:
+        panel (pd.DataFrame): Long-format data with Symbol, Date and Close columns.
+        features (list): Feature names consumed by the model, in model order.
+
+    Returns:
+        pd.DataFrame: One row per symbol with complete features, Symbol first.
+    """
+    panel = sort_panel(panel)
+    panel = panel.groupby(SYMBOL_COLUMN, sort=False).tail(max_lookback(features))
+    panel = panel.reset_index(drop=True)
+    # Target is only an input of Trend features, which never use the latest bar's
+    panel = add_target(panel, by=SYMBOL_COLUMN)
+    data = add_selected_features(panel, features, panel[SYMBOL_COLUMN].to_numpy())
+    latest = data.groupby(SYMBOL_COLUMN, sort=False).tail(1)
+    return latest[[SYMBOL_COLUMN] + features].dropna().reset_index(drop=True)
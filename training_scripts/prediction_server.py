@@ -0,0 +1,258 @@
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+from inference import input_fn, model_fn
+
+
+def setup_logging():
+    """Sets up logging configuration."""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+
+
+class LatencyStats:
+    """Thread-safe request latency and throughput counters.
+
+    Args:
+        max_samples (int): Most recent latencies kept for the percentiles.
+    """
+
+    def __init__(self, max_samples=100000):
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears all counters and restarts the throughput clock."""
+        with self.lock:
+            self.latencies = []
+            self.requests = 0
+            self.batches = 0
+            self.started = time.perf_counter()
+
+    def record_batch(self, latencies):
+        """Records the per-request latencies, in seconds, of one micro-batch."""
+        with self.lock:
+            self.latencies.extend(latencies)
+            if len(self.latencies) > self.max_samples:
+                del self.latencies[: len(self.latencies) - self.max_samples]
+            self.requests += len(latencies)
+            self.batches += 1
+
+    def summary(self):
+        """Returns request count, p50/p99 latency in ms, throughput and mean batch size."""
+        with self.lock:
+            elapsed = time.perf_counter() - self.started
+            latencies = np.array(self.latencies) * 1000
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": (
+                    self.requests / self.batches if self.batches else 0.0
+                ),
+                "p50_ms": (
+                    float(np.percentile(latencies, 50)) if latencies.size else 0.0
+                ),
+                "p99_ms": (
+                    float(np.percentile(latencies, 99)) if latencies.size else 0.0
+                ),
+                "throughput_rps": self.requests / elapsed if elapsed > 0 else 0.0,
+            }
+
+
+class MicroBatcher:
+    """Gathers concurrent single-row requests into vectorized predictions.
+
+    A background thread takes the first queued row, then keeps collecting
+    rows until `max_batch_size` is reached or `max_latency_ms` has passed
+    since that first row, and scores the whole batch with one predict call.
+
+    Args:
+        model (xgb.Booster): Loaded model, shared by all requests.
+        max_batch_size (int): Upper bound on rows per predict call.
+        max_latency_ms (float): Longest time a row waits for its batch to fill.
+        stats (LatencyStats, optional): Collector for latency measurements.
+    """
+
+    def __init__(self, model, max_batch_size=64, max_latency_ms=5.0, stats=None):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000
+        self.stats = stats or LatencyStats()
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, row):
+        """Queues one feature row and returns a Future of its probability."""
+        row = np.asarray(row, dtype=np.float32)
+        # Reject malformed rows here so they cannot fail a whole batch
+        if row.shape != (self.model.num_features(),):
+            raise ValueError(
+                f"Expected {self.model.num_features()} features, got shape {row.shape}"
+            )
+        future = Future()
+        self.requests.put((row, future, time.perf_counter()))
+        return future
+
+    def predict(self, rows):
+        """Scores several rows, each as its own request, and waits for the results."""
+        futures = [self.submit(row) for row in rows]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Stops the batching thread after the queued requests are served."""
+        self.requests.put(None)
+        self.thread.join()
+
+    def _collect(self):
+        """Blocks for the first request, then gathers a batch within the latency window."""
+        first = self.requests.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_latency
+        while len(batch) < self.max_batch_size:
+            timeout = max(deadline - time.perf_counter(), 0)
+            try:
+                item = self.requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                # Serve what was gathered, then stop
+                self.requests.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            rows, futures, submitted = zip(*batch)
+            try:
+                predictions = self.model.inplace_predict(np.vstack(rows))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            done = time.perf_counter()
+            for future, prediction in zip(futures, predictions):
+                future.set_result(float(prediction))
+            self.stats.record_batch([done - start for start in submitted])
+
+
+def make_handler(batcher):
+    """Builds the HTTP handler serving /ping, /invocations and /metrics."""
+
+    class PredictionHandler(BaseHTTPRequestHandler):
+        def _reply(self, status, body, content_type):
+            payload = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            if self.path == "/ping":
+                self._reply(200, "", "text/plain")
+            elif self.path == "/metrics":
+                self._reply(
+                    200, json.dumps(batcher.stats.summary()), "application/json"
+                )
+            else:
+                self._reply(404, "Not found", "text/plain")
+
+        def do_POST(self):
+            if self.path != "/invocations":
+                self._reply(404, "Not found", "text/plain")
+                return
+            # Same CSV rows, without header, as the batch transform input
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                rows = input_fn(body, "text/csv")
+                predictions = batcher.predict(rows)
+            except Exception as e:
+                self._reply(400, str(e), "text/plain")
+                return
+            self._reply(200, "\n".join(str(p) for p in predictions), "text/csv")
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the latency being measured
+            pass
+
+    return PredictionHandler
+
+
+def report_stats(stats, interval):
+    """Logs the latency and throughput summary every `interval` seconds."""
+    while True:
+        time.sleep(interval)
+        logging.info(f"Serving stats: {stats.summary()}")
+
+
+def main():
+    """Main function to load the model once and serve predictions over HTTP."""
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Local micro-batching prediction server for the XGBoost model."
+    )
+    parser.add_argument(
+        "--model-dir",
+        type=str,
+        required=True,
+        help="Directory containing model.xgb and features.json.",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on.")
+    parser.add_argument(
+        "--max-batch-size",
+        type=int,
+        default=64,
+        help="Upper bound on rows per predict.",
+    )
+    parser.add_argument(
+        "--max-latency-ms",
+        type=float,
+        default=5.0,
+        help="Longest time a request waits for its micro-batch to fill.",
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=60.0,
+        help="Seconds between logged latency and throughput summaries.",
+    )
+    args = parser.parse_args()
+
+    model = model_fn(args.model_dir)
+    batcher = MicroBatcher(model, args.max_batch_size, args.max_latency_ms)
+    threading.Thread(
+        target=report_stats, args=(batcher.stats, args.report_interval), daemon=True
+    ).start()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    logging.info(f"Serving predictions on http://{args.host}:{args.port}/invocations")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        logging.info(f"Final serving stats: {batcher.stats.summary()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+# Exchange hours in exchange-local time; None keeps every bar
+SESSIONS = {
+    "regular": ("09:30", "16:00"),
+    "extended": ("04:00", "20:00"),
+    "all": None,
+}
+
+# How each yfinance column is aggregated into a larger bar; other columns keep the last value
+AGGREGATIONS = {
+    "Open": "first",
+    "High": "max",
+    "Low": "min",
+    "Close": "last",
+    "Volume": "sum",
+    "Dividends": "sum",
+    "Stock Splits": "max",
+}
+
+# Bar intervals as named by yfinance and the feature horizons -> bar sizes
+INTERVAL_SIZES = {
+    "1m": "1min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "1h": "1h",
+    "1d": "1D",
+}
+
+_REDUCERS = {"max": np.maximum, "min": np.minimum, "sum": np.add}
+
+ONE_DAY = pd.Timedelta(days=1)
+
+# Timezone of bars read back from CSV, where dates are strings with UTC offsets
+EXCHANGE_TIMEZONE = "America/New_York"
+
+
+def compact_bars(bars):
+    """Stores prices as float32 and volumes as int64.
+
+    Yahoo Finance quotes have float32 precision, so this halves the size of
+    the price columns without changing any value. Missing volumes, which
+    Yahoo intraday bars contain, are stored as 0.
+    """
+    bars = bars.copy()
+    for column in bars.columns:
+        if column == "Volume":
+            bars[column] = bars[column].fillna(0).astype(np.int64)
+        elif pd.api.types.is_float_dtype(bars[column]):
+            bars[column] = bars[column].astype(np.float32)
+    return bars
+
+
+def _wall_clock(index):
+    """Returns exchange wall-clock nanoseconds, so session hours stay fixed across DST changes."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.asi8
+
+
+def _session_bounds(session):
+    if SESSIONS[session] is None:
+        return None
+    return [pd.Timedelta(time + ":00").value for time in SESSIONS[session]]
+
+
+def bar_labels(wall, bar_size, session="regular"):
+    """Returns the start of the resampled bar each timestamp falls into.
+
+    Intraday bar sizes are anchored at the session open, so 1h bars of the
+    regular session start at 09:30, 10:30, ... A bar size of N days groups
+    N consecutive sessions and is labeled with the first session's date.
+
+    Args:
+        wall (np.ndarray): Wall-clock timestamps in nanoseconds, in time order.
+        bar_size (pd.Timedelta): Size of the resampled bars.
+        session (str): Key of SESSIONS whose open anchors intraday bars.
+
+    Returns:
+        np.ndarray: Wall-clock label of every timestamp, in nanoseconds.
+    """
+    day_ns = ONE_DAY.value
+    day = wall // day_ns * day_ns
+    if bar_size >= ONE_DAY:
+        if bar_size % ONE_DAY:
+            raise ValueError(f"Bar sizes above one day must be whole days: {bar_size}")
+        # Consecutive trading days, numbered from 0, grouped N at a time
+        new_day = np.r_[True, day[1:] != day[:-1]]
+        first_day = np.flatnonzero(new_day)
+        group = (np.cumsum(new_day) - 1) // (bar_size // ONE_DAY)
+        return day[first_day][group * (bar_size // ONE_DAY)]
+    bounds = _session_bounds(session)
+    anchor = bounds[0] if bounds else 0
+    size = bar_size.value
+    return day + anchor + (wall - day - anchor) // size * size
+
+
+def session_mask(wall, session="regular"):
+    """Flags the wall-clock timestamps, in nanoseconds, within the session's hours."""
+    bounds = _session_bounds(session)
+    if bounds is None:
+        return np.ones(len(wall), dtype=bool)
+    time_of_day = wall % ONE_DAY.value
+    return (time_of_day >= bounds[0]) & (time_of_day < bounds[1])
+
+
+def resample_bars(bars, bar_size, session="regular", groups=None):
+    """Aggregates time-ordered bars into bars of `bar_size` within a trading session.
+
+    Bars outside the session are dropped, then every run of bars sharing a
+    label is reduced with one vectorized call per column (first/last by
+    position, max/min/sum with `ufunc.reduceat`), so the cost is O(n)
+    whatever the number of groups. Labels are computed on int64
+    nanoseconds, and resampled bars are labeled with their start, like
+    yfinance's.
+
+    Args:
+        bars (pd.DataFrame): Bars indexed by a DatetimeIndex in time order.
+        bar_size (str or pd.Timedelta): e.g. "7min", "1D", or a key of
+            INTERVAL_SIZES such as "5m".
+        session (str): Key of SESSIONS, e.g. "regular" or "all".
+        groups (array-like, optional): Series of every row, e.g. the symbols
+            of a panel sorted by symbol and date; bars never span two series.
+
+    Returns:
+        pd.DataFrame: Resampled bars with the same columns, indexed by bar start.
+    """
+    if session not in SESSIONS:
+        raise ValueError(f"Unknown session '{session}'. Use one of {sorted(SESSIONS)}.")
+    bar_size = pd.Timedelta(INTERVAL_SIZES.get(bar_size, bar_size))
+    if bar_size <= pd.Timedelta(0):
+        raise ValueError("The bar size must be positive.")
+
+    wall = _wall_clock(bars.index)
+    in_session = session_mask(wall, session)
+    if not in_session.all():
+        bars, wall = bars[in_session], wall[in_session]
+        if groups is not None:
+            groups = np.asarray(groups)[in_session]
+    if bars.empty:
+        return bars
+    labels = bar_labels(wall, bar_size, session)
+    new_bar = labels[1:] != labels[:-1]
+    if groups is not None:
+        codes, _ = pd.factorize(np.asarray(groups))
+        new_bar |= codes[1:] != codes[:-1]
+    starts = np.flatnonzero(np.r_[True, new_bar])
+    ends = np.r_[starts[1:], len(bars)]
+
+    resampled = {}
+    for column in bars.columns:
+        values = bars[column].to_numpy()
+        how = AGGREGATIONS.get(column, "last")
+        if how == "first":
+            resampled[column] = values[starts]
+        elif how == "last":
+            resampled[column] = values[ends - 1]
+        else:
+            resampled[column] = _REDUCERS[how].reduceat(values, starts)
+
+    index = pd.DatetimeIndex(labels[starts], name=bars.index.name)
+    if bars.index.tz is not None:
+        index = index.tz_localize(bars.index.tz)
+    return pd.DataFrame(resampled, index=index)
+
+
+def resample_frame(data, bar_size, session="regular", by=None):
+    """Resamples ingested data with a Date column, as read from an artifact.
+
+    Args:
+        data (pd.DataFrame): Bars with a Date column of timestamps or
+            ISO strings with UTC offsets.
+        bar_size (str or pd.Timedelta): Size of the resampled bars.
+        session (str): Key of SESSIONS.
+        by (str, optional): Column identifying the series of a panel, whose
+            rows must be sorted by that column, then date.
+
+    Returns:
+        pd.DataFrame: Resampled bars with a Date column.
+    """
+    dates = data["Date"]
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        # Offsets differ across DST changes; convert through UTC
+        dates = pd.to_datetime(dates, utc=True)
+        dates = dates.dt.tz_convert(EXCHANGE_TIMEZONE)
+    bars = data.drop(columns="Date").set_index(pd.DatetimeIndex(dates, name="Date"))
+    groups = None if by is None else bars[by].to_numpy()
+    return resample_bars(bars, bar_size, session, groups).reset_index()
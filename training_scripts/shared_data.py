@@ -0,0 +1,49 @@
+import os
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+
+# Read-only views of the shared dataset, opened once per worker process
+_ARRAYS = {}
+
+
+@contextmanager
+def shared_arrays(data, features):
+    """Writes the feature matrix and target once for a process pool to share.
+
+    The arrays are saved as .npy files in a temporary directory that is
+    removed on exit. Workers map them with `open_shared` instead of
+    receiving a pickled copy per task.
+
+    Args:
+        data (pd.DataFrame): Data containing features and target.
+        features (list): List of feature column names.
+
+    Yields:
+        tuple: Paths of the feature and target .npy files.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        features_path = os.path.join(tmp_dir, "features.npy")
+        target_path = os.path.join(tmp_dir, "target.npy")
+        np.save(features_path, data[features].to_numpy(dtype=np.float32))
+        np.save(target_path, data["Target"].to_numpy(dtype=np.float32))
+        yield features_path, target_path
+
+
+def open_shared(features_path, target_path, nthread):
+    """Process pool initializer mapping the shared arrays without copying them."""
+    _ARRAYS["features"] = np.load(features_path, mmap_mode="r")
+    _ARRAYS["target"] = np.load(target_path, mmap_mode="r")
+    _ARRAYS["nthread"] = nthread
+
+
+def get_shared():
+    """Returns the feature matrix, target and thread cap of the current worker."""
+    return _ARRAYS["features"], _ARRAYS["target"], _ARRAYS["nthread"]
+
+
+def split_threads(max_workers, tasks):
+    """Returns the worker count and per-worker thread cap for `tasks` tasks."""
+    cpus = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers or cpus, tasks))
+    return max_workers, max(1, cpus // max_workers)
@@ -0,0 +1,306 @@
+import os
+import json
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+
+from artifact_io import ARTIFACT_FORMATS, artifact_path, write_frame
+from ohlcv_store import symbol_filename
+from universe_ingestion import SUMMARY_FILE, read_symbols
+
+# Same column order as yfinance's Ticker.history
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+TIMEZONE = "America/New_York"
+TRADING_DAYS = 252
+MINUTES_PER_DAY = 390
+
+# Bar frequency -> bars per session
+FREQUENCIES = {"1d": 1, "1m": MINUTES_PER_DAY}
+
+# name -> (daily drift, daily volatility, weight); the chain starts in the
+# first regime and a switch enters a regime with probability proportional
+# to its weight
+DEFAULT_REGIMES = {
+    "bull": (0.0006, 0.008, 0.7),
+    "bear": (-0.0006, 0.015, 0.25),
+    "crisis": (-0.002, 0.035, 0.05),
+}
+# Probability of leaving the current regime at each session
+DEFAULT_SWITCH_PROBABILITY = 0.01
+
+
+def trading_sessions(n_sessions, start, missing_day_rate, rng):
+    """Returns `n_sessions` business days from `start`, some dropped at random.
+
+    Dropped days stand in for holidays and gaps in the vendor data.
+    """
+    # Draw extra days so that enough remain after dropping
+    candidates = pd.bdate_range(
+        start, periods=int(n_sessions / (1 - missing_day_rate)) + 10
+    )
+    kept = candidates[rng.random(len(candidates)) >= missing_day_rate]
+    return kept[:n_sessions]
+
+
+def regime_path(n_sessions, weights, switch_probability, rng):
+    """Simulates the Markov chain of regimes; returns one regime index per session.
+
+    At each switch the next regime is drawn by weight, and may be the
+    current one again.
+    """
+    switches = np.flatnonzero(rng.random(n_sessions) < switch_probability)
+    targets = rng.choice(len(weights), size=len(switches), p=weights / weights.sum())
+    path = np.zeros(n_sessions, dtype=int)
+    # Each switch sets the regime from its session until the next switch
+    for session, target in zip(switches, targets):
+        path[session:] = target
+    return path
+
+
+def generate_bars(
+    n_sessions,
+    frequency="1d",
+    start="1995-01-02",
+    seed=0,
+    start_price=1000.0,
+    regimes=None,
+    switch_probability=DEFAULT_SWITCH_PROBABILITY,
+    missing_day_rate=0.0,
+    momentum=0.0,
+):
+    """Generates OHLCV bars with the schema of yfinance's Ticker.history.
+
+    Closes follow a geometric random walk whose drift and volatility come
+    from a regime-switching Markov chain. The index is a tz-aware "Date"
+    (midnight for daily bars, 09:30-15:59 for minute bars), and prices are
+    rounded to float32 precision as Yahoo Finance quotes are.
+
+    Args:
+        n_sessions (int): Number of trading days.
+        frequency (str): "1d" or "1m".
+        start (str): First candidate trading day.
+        seed (int): Seed of the random generator; equal seeds give equal bars.
+        start_price (float): Opening price of the first bar.
+        regimes (dict, optional): Regime name -> (daily drift, daily
+            volatility, weight). Defaults to DEFAULT_REGIMES.
+        switch_probability (float): Probability of a regime change per session.
+        missing_day_rate (float): Fraction of trading days left out.
+        momentum (float): Autocorrelation of consecutive returns; a positive
+            value makes the next move partly predictable from the last ones.
+
+    Returns:
+        pd.DataFrame: Bars indexed by Date with the OHLCV_COLUMNS columns.
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(
+            f"Unsupported frequency '{frequency}'. Use one of {sorted(FREQUENCIES)}."
+        )
+    if not -1 < momentum < 1:
+        raise ValueError("The value for 'momentum' must be in (-1, 1).")
+    if not 0 <= missing_day_rate < 1:
+        raise ValueError("The value for 'missing_day_rate' must be in [0, 1).")
+    regimes = regimes or DEFAULT_REGIMES
+    rng = np.random.default_rng(seed)
+    bars_per_session = FREQUENCIES[frequency]
+
+    sessions = trading_sessions(n_sessions, start, missing_day_rate, rng)
+    drift, volatility, weights = np.array(list(regimes.values()), dtype=float).T
+    path = regime_path(len(sessions), weights, switch_probability, rng)
+    # Daily parameters are spread evenly over the bars of a session
+    bar_drift = np.repeat(drift[path] / bars_per_session, bars_per_session)
+    bar_volatility = np.repeat(
+        volatility[path] / np.sqrt(bars_per_session), bars_per_session
+    )
+    n_bars = len(bar_drift)
+
+    # AR(1) shocks, rescaled so that their variance stays that of the regime
+    shocks = lfilter([1.0], [1.0, -momentum], rng.standard_normal(n_bars))
+    returns = bar_drift + bar_volatility * shocks * np.sqrt(1 - momentum**2)
+    close = start_price * np.cumprod(1 + returns)
+    # Each bar opens near the previous close, with overnight gaps between sessions
+    previous_close = np.concatenate([[start_price], close[:-1]])
+    gap = rng.normal(0, bar_volatility / 4)
+    gap[::bars_per_session] *= 4
+    open_ = previous_close * (1 + gap)
+    wick = np.abs(rng.normal(0, bar_volatility / 2, (2, n_bars)))
+    high = np.maximum(open_, close) * (1 + wick[0])
+    low = np.minimum(open_, close) * (1 - wick[1])
+    # Volume rises with the size of the move
+    volume = rng.lognormal(np.log(2e9 / bars_per_session), 0.3, n_bars) * (
+        1 + 20 * np.abs(returns)
+    )
+
+    if bars_per_session == 1:
+        index = sessions
+    else:
+        minutes = pd.to_timedelta(np.arange(bars_per_session), unit="min")
+        index = (sessions + pd.Timedelta(hours=9, minutes=30)).repeat(
+            bars_per_session
+        ) + np.tile(minutes, len(sessions))
+    index = pd.DatetimeIndex(index, name="Date").tz_localize(TIMEZONE)
+
+    bars = pd.DataFrame(
+        {
+            "Open": open_,
+            "High": high,
+            "Low": low,
+            "Close": close,
+        },
+        index=index,
+    )
+    bars = bars.astype(np.float32).astype(np.float64)
+    bars["Volume"] = volume.astype(np.int64)
+    bars["Dividends"] = 0.0
+    bars["Stock Splits"] = 0.0
+    return bars
+
+
+def generate_market(symbols, years, frequency="1d", seed=0, **kwargs):
+    """Generates independent bars for every symbol.
+
+    Each symbol gets its own seed derived from `seed`, so adding a symbol
+    does not change the bars of the others.
+
+    Args:
+        symbols (list): Ticker symbols.
+        years (int): Years of history per symbol.
+        frequency (str): "1d" or "1m".
+        seed (int): Seed of the whole market.
+        **kwargs: Passed to `generate_bars`.
+
+    Returns:
+        dict: Symbol -> bars.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(symbols))
+    return {
+        symbol: generate_bars(
+            years * TRADING_DAYS,
+            frequency,
+            seed=symbol_seed,
+            start_price=float(100 * 10 ** (index % 2) * (1 + index % 7)),
+            **kwargs,
+        )
+        for index, (symbol, symbol_seed) in enumerate(zip(symbols, seeds))
+    }
+
+
+def write_market(market, output_dir, file_format="csv"):
+    """Writes generated bars exactly where data ingestion would.
+
+    A single symbol is written as sp500_input, like the S&P 500 fetch;
+    several symbols get one file each plus ingestion_summary.json, like the
+    multi-symbol fetch.
+
+    Args:
+        market (dict): Symbol -> bars, as returned by `generate_market`.
+        output_dir (str): Ingestion output directory.
+        file_format (str): Output format, "csv" or "parquet".
+
+    Returns:
+        list: Paths of the written files.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if len(market) == 1:
+        path = artifact_path(output_dir, "sp500_input", file_format)
+        write_frame(next(iter(market.values())), path, index=True)
+        return [path]
+
+    paths = []
+    for symbol, bars in market.items():
+        name = os.path.splitext(symbol_filename(symbol))[0]
+        paths.append(artifact_path(output_dir, name, file_format))
+        write_frame(bars, paths[-1], index=True)
+    summary = {
+        "succeeded": {symbol: len(bars) for symbol, bars in market.items()},
+        "failed": {},
+    }
+    with open(os.path.join(output_dir, SUMMARY_FILE), "w") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+    return paths
+
+
+def main():
+    """Main function to generate a synthetic market and write it as ingestion output."""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+    parser = argparse.ArgumentParser(
+        description="Generate seeded synthetic OHLCV data in the ingestion output layout."
+    )
+    parser.add_argument(
+        "--years-to-filter",
+        type=int,
+        required=True,
+        help="Years of history to generate per symbol.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default="/opt/ml/processing/output",
+        help="Directory to write the generated data to.",
+    )
+    parser.add_argument(
+        "--format",
+        type=str,
+        default="csv",
+        choices=sorted(ARTIFACT_FORMATS),
+        help="Output file format.",
+    )
+    parser.add_argument(
+        "--symbols",
+        type=str,
+        default=None,
+        help="Comma-separated tickers; a single S&P 500 series when omitted.",
+    )
+    parser.add_argument(
+        "--num-symbols",
+        type=int,
+        default=None,
+        help="Generate this many tickers named SYN0000, SYN0001, ...",
+    )
+    parser.add_argument(
+        "--frequency", type=str, default="1d", choices=sorted(FREQUENCIES)
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--missing-day-rate",
+        type=float,
+        default=0.0,
+        help="Fraction of trading days left out of the data.",
+    )
+    parser.add_argument(
+        "--switch-probability",
+        type=float,
+        default=DEFAULT_SWITCH_PROBABILITY,
+        help="Probability of a regime change per trading day.",
+    )
+    parser.add_argument(
+        "--momentum",
+        type=float,
+        default=0.0,
+        help="Autocorrelation of consecutive returns, in (-1, 1).",
+    )
+    args = parser.parse_args()
+
+    symbols = read_symbols(args.symbols)
+    if args.num_symbols:
+        symbols += [f"SYN{i:04d}" for i in range(args.num_symbols)]
+    market = generate_market(
+        symbols or ["^GSPC"],
+        args.years_to_filter,
+        args.frequency,
+        args.seed,
+        switch_probability=args.switch_probability,
+        missing_day_rate=args.missing_day_rate,
+        momentum=args.momentum,
+    )
+    paths = write_market(market, args.output_dir, args.format)
+    print(
+        f"Generated {len(market)} symbols into {len(paths)} files in {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,38 @@
 import logging
 import argparse
 import os
+import json
+import time
+import resource
 import joblib
 import pandas as pd
 import xgboost as xgb
 
+from artifact_io import find_artifact, read_frame
+from feature_registry import parse_feature_list, save_feature_list
+from instrumentation import DISABLED_METRICS, StageMetrics
+
+# Booster configuration shared by training and backtesting
+XGB_PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": "logloss",
+    "max_depth": 5,
+    "eta": 0.1,
+}
+NUM_BOOST_ROUND = 100
+
+# Winning configuration written by tune_model.py
+PARAMS_FILE = "best_params.json"
+
+# "hist" builds quantized QuantileDMatrix inputs for the histogram tree method
+TRAINING_MODES = ["standard", "hist"]
+
+# Timing, memory and early-stopping results saved beside model.xgb
+TRAINING_METRICS_FILE = "training_metrics.json"
+
+# Most recent rows left out of training; evaluate_model.py scores the model on them
+HOLDOUT_ROWS = 100
+
 
 def setup_logging():
     """Sets up logging configuration."""
@@ -13,18 +41,19 @@ def setup_logging():
     )
 
 
-def load_data(input_path):
+def load_data(input_path, columns=None):
     """Loads the raw data from the input path.
 
     Args:
-        input_path (str): Path to the input CSV file.
+        input_path (str): Path to the input CSV or Parquet file.
+        columns (list, optional): Columns to load; all columns when omitted.
 
     Returns:
         pd.DataFrame: Loaded dataframe.
     """
     logging.info(f"Loading data from {input_path}")
     try:
-        return pd.read_csv(input_path, parse_dates=True)
+        return read_frame(input_path, columns=columns)
     except FileNotFoundError:
         logging.error(f"File not found: {input_path}")
         raise
@@ -33,36 +62,196 @@ def load_data(input_path):
         raise
 
 
-def train_model(data, features, model_dir):
+def load_training_config(path, holdout_rows=None):
+    """Loads booster parameters and boosting rounds from a tuning artifact.
+
+    Args:
+        path (str): best_params.json, or a directory containing it.
+        holdout_rows (int, optional): Holdout the model will be evaluated
+            on; it must be at least the holdout the search left out.
+
+    Returns:
+        dict: XGBoost training parameters.
+        int: Number of boosting rounds.
+
+    Raises:
+        ValueError: If the search tuned on rows of the holdout.
+    """
+    if os.path.isdir(path):
+        path = os.path.join(path, PARAMS_FILE)
+    logging.info(f"Loading training configuration from {path}")
+    with open(path, "r") as f:
+        config = json.load(f)
+    tuning_holdout = config.get("holdout_rows", 0)
+    if holdout_rows is not None and holdout_rows < tuning_holdout:
+        raise ValueError(
+            f"{path} was tuned with the last {tuning_holdout} rows left out; a "
+            f"holdout of {holdout_rows} rows would be scored on tuned-on rows."
+        )
+    return dict(XGB_PARAMS, **config["params"]), int(config["num_boost_round"])
+
+
+def peak_memory_mb():
+    """Returns the peak resident memory of this process in MiB (Linux reports KiB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def build_matrices(x_train, y_train, x_val, y_val, mode, nthread, max_bin):
+    """Builds the training and optional validation matrices for `mode`.
+
+    In "hist" mode the features are quantized once into a QuantileDMatrix,
+    and the validation matrix reuses the training bin boundaries. XGBoost
+    releases before 1.7 have no QuantileDMatrix and fall back to a DMatrix,
+    which the hist tree method quantizes itself at a higher memory cost.
+
+    Returns:
+        xgb.DMatrix: Training matrix.
+        xgb.DMatrix: Validation matrix, or None without a validation set.
+    """
+    if mode == "hist" and not hasattr(xgb, "QuantileDMatrix"):
+        logging.warning(
+            f"XGBoost {xgb.__version__} has no QuantileDMatrix; hist mode uses a DMatrix"
+        )
+    if mode == "hist" and hasattr(xgb, "QuantileDMatrix"):
+        dtrain = xgb.QuantileDMatrix(
+            x_train, label=y_train, max_bin=max_bin, nthread=nthread
+        )
+        dval = None
+        if x_val is not None:
+            dval = xgb.QuantileDMatrix(x_val, label=y_val, ref=dtrain, nthread=nthread)
+        return dtrain, dval
+
+    dtrain = xgb.DMatrix(data=x_train, label=y_train, nthread=nthread)
+    dval = None
+    if x_val is not None:
+        dval = xgb.DMatrix(data=x_val, label=y_val, nthread=nthread)
+    return dtrain, dval
+
+
+def train_model(
+    data,
+    features,
+    model_dir,
+    params=XGB_PARAMS,
+    num_boost_round=NUM_BOOST_ROUND,
+    mode="standard",
+    nthread=None,
+    validation_fraction=0.0,
+    early_stopping_rounds=20,
+    max_bin=256,
+    holdout_rows=HOLDOUT_ROWS,
+    metrics=DISABLED_METRICS,
+):
     """Trains the model, performs backtesting, and saves predictions and the model.
 
+    With `validation_fraction` set, the most recent part of the training
+    rows is held out and boosting stops once its loss has not improved for
+    `early_stopping_rounds`; the saved model keeps only the trees up to the
+    best iteration. Build and training times and the peak memory are saved
+    to training_metrics.json beside the model.
+
     Args:
         data (pd.DataFrame): Input data containing features and target.
         features (list): List of feature column names.
         model_dir (str): Directory to save the trained model.
+        params (dict): XGBoost training parameters.
+        num_boost_round (int): Number of boosting rounds, or the upper bound
+            with early stopping.
+        mode (str): "standard" or "hist".
+        nthread (int, optional): Threads used by XGBoost; all cores when omitted.
+        validation_fraction (float): Fraction of the training rows, taken
+            from the end, used for early stopping; 0 disables it.
+        early_stopping_rounds (int): Patience of early stopping.
+        max_bin (int): Histogram bins per feature in "hist" mode.
+        holdout_rows (int): Most recent rows left out for evaluation.
+        metrics (StageMetrics): Collector for the matrix, boosting and save phases.
+
+    Returns:
+        dict: Training metrics.
     """
+    if mode not in TRAINING_MODES:
+        raise ValueError(
+            f"Unsupported training mode '{mode}'. Use one of {TRAINING_MODES}."
+        )
+    if not 1 <= holdout_rows < len(data):
+        raise ValueError(
+            f"holdout_rows must be between 1 and {len(data) - 1} for {len(data)} rows, "
+            f"got {holdout_rows}."
+        )
+
     # Create the model directory if it doesn't exist
     os.makedirs(model_dir, exist_ok=True)
 
-    x_train = data[features].iloc[:-100]  # all data except the last 100
-    y_train = data["Target"].iloc[:-100]
+    # All data except the most recent rows, which evaluate_model.py scores
+    x_train = data[features].iloc[:-holdout_rows]
+    y_train = data["Target"].iloc[:-holdout_rows]
 
-    params = {
-        "objective": "binary:logistic",
-        "eval_metric": "logloss",
-        "max_depth": 5,
-        "eta": 0.1,
-    }
+    # Hold out the most recent rows, never a random sample, for early stopping
+    x_val = y_val = None
+    n_val = int(len(x_train) * validation_fraction)
+    if n_val > 0:
+        x_val, y_val = x_train.iloc[-n_val:], y_train.iloc[-n_val:]
+        x_train, y_train = x_train.iloc[:-n_val], y_train.iloc[:-n_val]
 
-    # Convert training data to DMatrix
-    dtrain = xgb.DMatrix(data=x_train, label=y_train)
-    num_round = 100  # Number of boosting rounds
-    model = xgb.train(params, dtrain, num_boost_round=num_round)
+    params = dict(params)
+    if nthread:
+        params["nthread"] = nthread
+    if mode == "hist":
+        params.update(tree_method="hist", max_bin=max_bin)
+
+    start = time.perf_counter()
+    with metrics.phase("build_matrices") as phase:
+        dtrain, dval = build_matrices(
+            x_train, y_train, x_val, y_val, mode, nthread, max_bin
+        )
+        phase.record(rows_in=len(x_train) + n_val)
+    matrix_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with metrics.phase("boost"):
+        if dval is None:
+            model = xgb.train(params, dtrain, num_boost_round=num_boost_round)
+        else:
+            model = xgb.train(
+                params,
+                dtrain,
+                num_boost_round=num_boost_round,
+                evals=[(dval, "validation")],
+                early_stopping_rounds=early_stopping_rounds,
+                verbose_eval=False,
+            )
+    train_seconds = time.perf_counter() - start
+
+    training_metrics = {
+        "mode": mode,
+        "nthread": nthread or os.cpu_count(),
+        "train_rows": len(x_train),
+        "validation_rows": n_val,
+        "num_boost_round": num_boost_round,
+        "matrix_seconds": matrix_seconds,
+        "train_seconds": train_seconds,
+        "peak_memory_mb": peak_memory_mb(),
+    }
+    if dval is not None:
+        best_iteration = model.best_iteration
+        training_metrics.update(
+            best_iteration=best_iteration, best_score=model.best_score
+        )
+        # Serving predicts with every tree, so drop those past the best iteration
+        model = model[: best_iteration + 1]
+        model.set_attr(best_iteration=str(best_iteration))
+    logging.info(f"Training metrics: {training_metrics}")
 
     # Save the model
     logging.info(f"Saving trained model to {model_dir}")
-    model.save_model(os.path.join(model_dir, "model.xgb"))
+    with metrics.phase("save"):
+        model.save_model(os.path.join(model_dir, "model.xgb"))
+        # Evaluation and serving select exactly these columns
+        save_feature_list(model_dir, features)
+        with open(os.path.join(model_dir, TRAINING_METRICS_FILE), "w") as f:
+            json.dump(training_metrics, f, indent=2)
     logging.info("Model training, prediction, and saving completed successfully.")
+    return training_metrics
 
 
 def main():
@@ -79,13 +268,92 @@ def main():
         default=os.environ.get("SM_MODEL_DIR"),
         help="Directory to save model artifacts.",
     )
+    parser.add_argument(
+        "--train-dir",
+        type=str,
+        default=os.environ.get("SM_CHANNEL_TRAIN", "/opt/ml/input/data/train"),
+        help="Directory containing train.csv or train.parquet.",
+    )
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Comma-separated feature names the model consumes; defaults to all horizon features.",
+    )
+    parser.add_argument(
+        "--params-path",
+        type=str,
+        default=os.environ.get("SM_CHANNEL_PARAMS"),
+        help="best_params.json from tune_model.py, or its directory; defaults are used when omitted.",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="standard",
+        choices=TRAINING_MODES,
+        help="Training mode; hist uses QuantileDMatrix inputs and the hist tree method.",
+    )
+    parser.add_argument(
+        "--nthread",
+        type=int,
+        default=None,
+        help="Threads used by XGBoost; all cores when omitted or 0.",
+    )
+    parser.add_argument(
+        "--validation-fraction",
+        type=float,
+        default=0.0,
+        help="Most recent fraction of the training rows used for early stopping; 0 disables it.",
+    )
+    parser.add_argument(
+        "--early-stopping-rounds",
+        type=int,
+        default=20,
+        help="Rounds without validation improvement before training stops.",
+    )
+    parser.add_argument(
+        "--max-bin", type=int, default=256, help="Histogram bins per feature."
+    )
+    parser.add_argument(
+        "--holdout-rows",
+        type=int,
+        default=HOLDOUT_ROWS,
+        help="Most recent rows left out of training for evaluation.",
+    )
     args = parser.parse_args()
 
-    input_path = "/opt/ml/input/data/train/train.csv"  # Path to the input CSV file.
+    # Path to the training data, train.parquet or train.csv
+    input_path = find_artifact(args.train_dir, "train")
+
+    features = parse_feature_list(args.features)
+    params, num_boost_round = XGB_PARAMS, NUM_BOOST_ROUND
+    if args.params_path:
+        params, num_boost_round = load_training_config(
+            args.params_path, args.holdout_rows
+        )
 
-    sp500data = load_data(input_path)
-    features = sp500data.columns[-10:].to_list()
-    train_model(sp500data, features, args.model_dir)
+    metrics = StageMetrics("train_model")
+    try:
+        with metrics.phase("total"):
+            with metrics.phase("load") as phase:
+                sp500data = load_data(input_path, columns=features + ["Target"])
+                phase.record(rows_out=len(sp500data))
+            train_model(
+                sp500data,
+                features,
+                args.model_dir,
+                params,
+                num_boost_round,
+                args.mode,
+                args.nthread,
+                args.validation_fraction,
+                args.early_stopping_rounds,
+                args.max_bin,
+                args.holdout_rows,
+                metrics,
+            )
+    finally:
+        metrics.save(args.model_dir)
 
 
 if __name__ == "__main__":
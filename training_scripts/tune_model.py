@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import math
+import random
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import xgboost as xgb
+
+# Shared modules are shipped to this directory by the SageMaker processing steps
+sys.path.append("/opt/ml/processing/input/lib")
+
+from artifact_io import read_frame
+from feature_registry import parse_feature_list
+from shared_data import get_shared, open_shared, shared_arrays, split_threads
+from train_model import PARAMS_FILE, XGB_PARAMS
+
+# Candidate values sampled for each tuned booster parameter
+SEARCH_SPACE = {
+    "max_depth": [3, 4, 5, 6, 8],
+    "eta": [0.01, 0.03, 0.05, 0.1, 0.2],
+    "subsample": [0.6, 0.8, 1.0],
+    "colsample_bytree": [0.6, 0.8, 1.0],
+    "min_child_weight": [1, 5, 10],
+}
+
+TRIALS_FILE = "trials.json"
+
+# HoldoutRows of the training pipelines; train_model.py rejects a smaller
+# holdout than the search left out, which would score tuned-on rows
+TUNING_HOLDOUT_ROWS = 1000
+
+
+def setup_logging():
+    """Sets up logging configuration."""
+    logging.basicConfig(
+        format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+    )
+
+
+def sample_candidates(n_trials, seed=0):
+    """Draws distinct parameter sets from SEARCH_SPACE.
+
+    The current defaults are always the first candidate, so they compete
+    with the sampled parameter sets.
+
+    Args:
+        n_trials (int): Number of parameter sets to draw.
+        seed (int): Random seed.
+
+    Returns:
+        list: Parameter dicts overriding XGB_PARAMS.
+    """
+    rng = random.Random(seed)
+    # XGBoost's own defaults for the parameters XGB_PARAMS leaves unset
+    current = dict(
+        {"subsample": 1.0, "colsample_bytree": 1.0, "min_child_weight": 1}, **XGB_PARAMS
+    )
+    defaults = {name: current[name] for name in SEARCH_SPACE}
+    candidates = [defaults]
+    n_combinations = math.prod(len(values) for values in SEARCH_SPACE.values())
+    while len(candidates) < min(n_trials, n_combinations):
+        candidate = {name: rng.choice(values) for name, values in SEARCH_SPACE.items()}
+        if candidate not in candidates:
+            candidates.append(candidate)
+    return candidates
+
+
+def time_series_splits(n_rows, n_splits, val_size=None):
+    """Returns expanding-window train/validation splits in time order.
+
+    Validation blocks of `val_size` rows tile the end of the data; each
+    split trains on every row before its block.
+
+    Args:
+        n_rows (int): Number of rows in the dataset.
+        n_splits (int): Number of splits.
+        val_size (int, optional): Rows per validation block; defaults to
+            n_rows // (n_splits + 1).
+
+    Returns:
+        list: (train_end, val_end) row indices per split.
+    """
+    val_size = val_size or n_rows // (n_splits + 1)
+    first_train_end = n_rows - n_splits * val_size
+    if val_size < 1 or first_train_end < 1:
+        raise ValueError(
+            f"Cannot make {n_splits} splits of {val_size} rows from {n_rows} rows."
+        )
+    return [
+        (first_train_end + i * val_size, first_train_end + (i + 1) * val_size)
+        for i in range(n_splits)
+    ]
+
+
+def _run_trial(params, split, feature_names, max_rounds, early_stopping_rounds):
+    """Trains one candidate on one split with early stopping on its validation block."""
+    train_end, val_end = split
+    x, y, nthread = get_shared()
+    dtrain = xgb.DMatrix(
+        x[:train_end], label=y[:train_end], feature_names=feature_names, nthread=nthread
+    )
+    dval = xgb.DMatrix(
+        x[train_end:val_end],
+        label=y[train_end:val_end],
+        feature_names=feature_names,
+        nthread=nthread,
+    )
+    model = xgb.train(
+        dict(XGB_PARAMS, **params, nthread=nthread),
+        dtrain,
+        num_boost_round=max_rounds,
+        evals=[(dval, "validation")],
+        early_stopping_rounds=early_stopping_rounds,
+        verbose_eval=False,
+    )
+    return float(model.best_score), int(model.best_iteration)
+
+
+def search(
+    data,
+    features,
+    n_trials=20,
+    n_splits=3,
+    max_workers=None,
+    max_rounds=1000,
+    early_stopping_rounds=20,
+    keep_fraction=0.5,
+    seed=0,
+    holdout_rows=TUNING_HOLDOUT_ROWS,
+):
+    """Searches booster parameters on time-ordered validation splits.
+
+    Trials run concurrently on a process pool that memory-maps one shared
+    copy of the dataset. Splits are evaluated in order, from the smallest
+    training set to the largest; after each split only the best
+    `keep_fraction` of the remaining trials, ranked by mean validation
+    loss so far, go on to the next one. Every trial stops boosting once
+    the validation loss has not improved for `early_stopping_rounds`.
+    The most recent `holdout_rows`, which evaluate_model.py scores, are
+    left out of every split.
+
+    Args:
+        data (pd.DataFrame): Time-ordered data containing features and target.
+        features (list): List of feature column names.
+        n_trials (int): Number of candidate parameter sets.
+        n_splits (int): Number of validation splits.
+        max_workers (int, optional): Worker processes; defaults to the CPU count.
+        max_rounds (int): Upper bound on boosting rounds.
+        early_stopping_rounds (int): Patience of early stopping.
+        keep_fraction (float): Fraction of trials kept after each split.
+        seed (int): Random seed for candidate sampling.
+        holdout_rows (int): Most recent rows left out of training by
+            train_model.py.
+
+    Returns:
+        dict: The winning configuration, with "params", "num_boost_round",
+            "metric", "score" and "holdout_rows".
+        list: One record per trial with its scores and pruning status.
+    """
+    if holdout_rows < 1:
+        raise ValueError("At least one holdout row is required.")
+    # Tuning on the evaluation holdout would leak it into the parameters
+    data = data.iloc[:-holdout_rows]
+    candidates = sample_candidates(n_trials, seed)
+    splits = time_series_splits(len(data), n_splits)
+    trials = [
+        {
+            "trial": i,
+            "params": params,
+            "scores": [],
+            "best_iterations": [],
+            "pruned": False,
+        }
+        for i, params in enumerate(candidates)
+    ]
+
+    max_workers, nthread = split_threads(max_workers, len(trials))
+    logging.info(
+        f"Searching {len(trials)} trials over {len(splits)} splits on "
+        f"{max_workers} workers with {nthread} threads each"
+    )
+
+    active = list(trials)
+    with shared_arrays(data, features) as (features_path, target_path):
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=open_shared,
+            initargs=(features_path, target_path, nthread),
+        ) as executor:
+            for split_index, split in enumerate(splits):
+                results = executor.map(
+                    _run_trial,
+                    [trial["params"] for trial in active],
+                    [split] * len(active),
+                    [features] * len(active),
+                    [max_rounds] * len(active),
+                    [early_stopping_rounds] * len(active),
+                )
+                for trial, (score, best_iteration) in zip(active, results):
+                    trial["scores"].append(score)
+                    trial["best_iterations"].append(best_iteration)
+
+                active.sort(key=lambda trial: np.mean(trial["scores"]))
+                if split_index < len(splits) - 1:
+                    keep = max(1, math.ceil(len(active) * keep_fraction))
+                    for trial in active[keep:]:
+                        trial["pruned"] = True
+                    active = active[:keep]
+                    logging.info(
+                        f"Split {split_index}: kept {keep} trials, "
+                        f"best loss {np.mean(active[0]['scores']):.5f}"
+                    )
+
+    for trial in trials:
+        trial["mean_score"] = float(np.mean(trial["scores"]))
+
+    best = active[0]
+    best_config = {
+        "params": best["params"],
+        # best_iteration is zero-based
+        "num_boost_round": int(round(np.mean(best["best_iterations"]))) + 1,
+        "metric": XGB_PARAMS["eval_metric"],
+        "score": best["mean_score"],
+        "holdout_rows": holdout_rows,
+    }
+    logging.info(f"Best trial {best['trial']}: {best_config}")
+    return best_config, trials
+
+
+def save_results(best_config, trials, output_dir):
+    """Saves the winning configuration for train_model.py and the trial log."""
+    os.makedirs(output_dir, exist_ok=True)
+    config_path = os.path.join(output_dir, PARAMS_FILE)
+    with open(config_path, "w") as f:
+        json.dump(best_config, f, indent=2)
+    with open(os.path.join(output_dir, TRIALS_FILE), "w") as f:
+        json.dump(trials, f, indent=2)
+    logging.info(f"Best configuration saved to {config_path}")
+
+
+def main():
+    """Main function to load the training data, run the search and save the winner."""
+    setup_logging()
+
+    parser = argparse.ArgumentParser(
+        description="Time-series hyperparameter search for the XGBoost model."
+    )
+    parser.add_argument(
+        "--input-path", type=str, required=True, help="Path to the training data."
+    )
+    parser.add_argument(
+        "--output-path", type=str, required=True, help="Directory to save results."
+    )
+    parser.add_argument(
+        "--n-trials", type=int, default=20, help="Candidate parameter sets."
+    )
+    parser.add_argument("--n-splits", type=int, default=3, help="Validation splits.")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=None,
+        help="Worker processes; defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--max-rounds", type=int, default=1000, help="Upper bound on boosting rounds."
+    )
+    parser.add_argument(
+        "--early-stopping-rounds",
+        type=int,
+        default=20,
+        help="Rounds without validation improvement before a trial stops.",
+    )
+    parser.add_argument(
+        "--keep-fraction",
+        type=float,
+        default=0.5,
+        help="Fraction of trials kept after each split.",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--holdout-rows",
+        type=int,
+        default=TUNING_HOLDOUT_ROWS,
+        help="Most recent rows left out of the search; at least the --holdout-rows of train_model.py.",
+    )
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Comma-separated feature names; defaults to all horizon features.",
+    )
+    args = parser.parse_args()
+
+    features = parse_feature_list(args.features)
+    data = read_frame(args.input_path, columns=features + ["Target"])
+    best_config, trials = search(
+        data,
+        features,
+        args.n_trials,
+        args.n_splits,
+        args.max_workers,
+        args.max_rounds,
+        args.early_stopping_rounds,
+        args.keep_fraction,
+        args.seed,
+        args.holdout_rows,
+    )
+    save_results(best_config, trials, args.output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from curl_cffi import requests
+import yfinance as yf
+
+from artifact_io import artifact_path, write_frame
+from ohlcv_store import (
+    INTRADAY_PERIODS,
+    OHLCVStore,
+    store_key,
+    symbol_filename,
+    update_history,
+)
+from resampling import compact_bars
+
+SUMMARY_FILE = "ingestion_summary.json"
+
+
+class TokenBucket:
+    """Thread-safe token-bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; each
+    call to `acquire` blocks until a token is available.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (int, optional): Maximum burst size. Defaults to `rate`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("The value for 'rate' must be positive.")
+        self.rate = rate
+        self.capacity = max(1.0, float(capacity if capacity is not None else rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available and consumes it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def ingest_symbol(
+    symbol,
+    start_date,
+    output_dir,
+    session,
+    limiter,
+    store=None,
+    file_format="csv",
+    interval="1d",
+):
+    """Downloads one symbol and writes its filtered window to `output_dir`.
+
+    Args:
+        symbol (str): Ticker symbol.
+        start_date (str): First date of the window to write, e.g. "1995-06-01".
+        output_dir (str): Directory where the symbol's file is written.
+        session: Shared HTTP session used for the download.
+        limiter (TokenBucket): Shared rate limiter.
+        store (OHLCVStore, optional): Incremental history store.
+        file_format (str): Output format, "csv" or "parquet".
+        interval (str): Bar interval, "1d" or a key of INTRADAY_PERIODS.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        ValueError: If no data was returned for the symbol.
+    """
+    limiter.acquire()
+    if store is not None:
+        update_history(store, symbol, session=session, interval=interval)
+        data = store.load(store_key(symbol, interval), start=start_date)
+    elif interval == "1d":
+        history = yf.Ticker(symbol, session=session).history(period="max")
+        data = history.loc[start_date:]
+    else:
+        data = yf.Ticker(symbol, session=session).history(
+            period=INTRADAY_PERIODS[interval], interval=interval
+        )
+
+    if data.empty:
+        raise ValueError(f"No data returned for {symbol}.")
+
+    if interval != "1d":
+        data = compact_bars(data)
+    name = os.path.splitext(symbol_filename(symbol))[0]
+    write_frame(data, artifact_path(output_dir, name, file_format), index=True)
+    return len(data)
+
+
+def fetch_universe(
+    symbols,
+    years_to_filter,
+    output_dir,
+    store_dir=None,
+    max_workers=8,
+    requests_per_second=2.0,
+    file_format="csv",
+    interval="1d",
+):
+    """Ingests many symbols concurrently on a bounded thread pool.
+
+    All workers share one connection-pooled HTTP session and one token-bucket
+    rate limiter. Every symbol is written to its own file; failures are
+    recorded in `ingestion_summary.json` instead of aborting the job.
+
+    Args:
+        symbols (list): Ticker symbols to ingest.
+        years_to_filter (int): Number of years of historical data to keep.
+        output_dir (str): Directory where the per-symbol files are saved.
+        store_dir (str, optional): Directory of the persistent OHLCV store.
+        max_workers (int): Maximum number of concurrent downloads.
+        requests_per_second (float): Sustained download rate across all workers.
+        file_format (str): Output format, "csv" or "parquet".
+        interval (str): Bar interval, "1d" or a key of INTRADAY_PERIODS.
+
+    Returns:
+        dict: Rows written per successful symbol and errors per failed symbol.
+
+    Raises:
+        ValueError: If `years_to_filter` is not a positive integer.
+    """
+    if years_to_filter <= 0:
+        raise ValueError("The value for 'years_to_filter' must be a positive integer.")
+
+    start_date = datetime.today() - timedelta(days=int(years_to_filter) * 365)
+    start_date = start_date.strftime("%Y-%m-%d")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # curl_cffi keeps a connection-reusing curl handle per worker thread
+    session = requests.Session(impersonate="chrome")
+    limiter = TokenBucket(requests_per_second)
+    store = OHLCVStore(store_dir) if store_dir else None
+
+    summary = {"succeeded": {}, "failed": {}}
+    print(f"Ingesting {len(symbols)} symbols with {max_workers} workers...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                ingest_symbol,
+                symbol,
+                start_date,
+                output_dir,
+                session,
+                limiter,
+                store,
+                file_format,
+                interval,
+            ): symbol
+            for symbol in symbols
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                summary["succeeded"][symbol] = future.result()
+            except Exception as e:
+                logging.error(f"Failed to ingest {symbol}: {e}")
+                summary["failed"][symbol] = str(e)
+
+    with open(os.path.join(output_dir, SUMMARY_FILE), "w") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+    print(
+        f"Ingested {len(summary['succeeded'])} symbols, "
+        f"{len(summary['failed'])} failed."
+    )
+    return summary
+
+
+def read_symbols(symbols=None, symbols_file=None):
+    """Builds the symbol list from a comma-separated string and/or a file with one ticker per line."""
+    tickers = []
+    if symbols:
+        tickers.extend(s.strip() for s in symbols.split(","))
+    if symbols_file:
+        with open(symbols_file, "r") as f:
+            tickers.extend(line.strip() for line in f)
+    # Drop blanks and duplicates, keeping the given order
+    return list(dict.fromkeys(t for t in tickers if t))
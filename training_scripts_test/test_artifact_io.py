@@ -0,0 +1,89 @@
+import os
+import sys
+import pytest
+import pandas as pd
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from artifact_io import (
+    FrameWriter,
+    artifact_path,
+    find_artifact,
+    iter_frames,
+    read_columns,
+    read_frame,
+    write_frame,
+)
+
+
+@pytest.fixture
+def sample_data():
+    dates = pd.date_range(
+        start="2024-01-01", periods=5, tz="America/New_York", name="Date"
+    )
+    return pd.DataFrame(
+        {
+            "Close": [1.1, 2.2, 3.3, 4.4, 5.5],
+            "Volume": [10, 20, 30, 40, 50],
+            "Target": [1, 0, 1, 0, 1],
+        },
+        index=dates,
+    )
+
+
+def test_parquet_round_trip_keeps_types(sample_data, tmp_path):
+    path = artifact_path(str(tmp_path), "sp500_input", "parquet")
+    write_frame(sample_data, path, index=True)
+
+    loaded = read_frame(path)
+    assert str(loaded["Date"].dt.tz) == "America/New_York"
+    pd.testing.assert_frame_equal(
+        loaded.set_index("Date"), sample_data, check_freq=False
+    )
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_read_frame_projects_columns(sample_data, tmp_path, file_format):
+    path = artifact_path(str(tmp_path), "train", file_format)
+    write_frame(sample_data, path)
+
+    assert read_columns(path) == ["Close", "Volume", "Target"]
+    loaded = read_frame(path, columns=["Close", "Target"])
+    assert sorted(loaded.columns) == ["Close", "Target"]
+
+
+def test_find_artifact_prefers_parquet(sample_data, tmp_path):
+    assert find_artifact(str(tmp_path), "train").endswith("train.csv")
+
+    write_frame(sample_data, artifact_path(str(tmp_path), "train", "parquet"))
+    assert find_artifact(str(tmp_path), "train").endswith("train.parquet")
+
+
+def test_artifact_path_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match="Unsupported artifact format"):
+        artifact_path(str(tmp_path), "train", "feather")
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_chunked_write_and_read_round_trip(sample_data, tmp_path, file_format):
+    path = artifact_path(str(tmp_path), "train", file_format)
+    with FrameWriter(path) as writer:
+        writer.write(sample_data.iloc[:2])
+        writer.write(sample_data.iloc[:0])
+        writer.write(sample_data.iloc[2:])
+    assert writer.rows == 5
+
+    chunks = list(iter_frames(path, chunk_rows=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks, ignore_index=True), read_frame(path)
+    )
+
+
+def test_frame_writer_creates_a_file_without_rows(sample_data, tmp_path):
+    path = artifact_path(str(tmp_path), "train", "parquet")
+    with FrameWriter(path) as writer:
+        writer.write(sample_data.iloc[:0])
+    assert read_columns(path) == ["Close", "Volume", "Target"]
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from baseline_statistics import BaselineSummary, QuantileSketch
+from data_processing import process_data, process_data_chunked
+from drift_detector import detect_drift, load_baseline
+from synthetic_market import generate_market, write_market
+
+FEATURES = ["Close_Ratio_2", "Trend_2", "Close_Ratio_60", "Trend_60"]
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(
+        {
+            "ratio": rng.normal(1, 0.02, 20000),
+            "trend": rng.integers(0, 60, 20000),
+            "skewed": rng.lognormal(0, 1, 20000),
+        }
+    )
+    frame.loc[:499, "ratio"] = np.nan
+    return frame
+
+
+def summarize(frame, chunk_rows):
+    summary = BaselineSummary(frame.columns)
+    for start in range(0, len(frame), chunk_rows):
+        summary.update(frame.iloc[start : start + chunk_rows])
+    return summary
+
+
+def numerical(statistics, name):
+    (feature,) = [f for f in statistics["features"] if f["name"] == name]
+    return feature["numerical_statistics"]
+
+
+def test_moments_match_pandas(frame):
+    statistics = summarize(frame, 3000).statistics()
+
+    assert statistics["dataset"]["item_count"] == len(frame)
+    for name in frame.columns:
+        stats = numerical(statistics, name)
+        column = frame[name]
+        assert stats["common"]["num_present"] == column.notna().sum()
+        assert stats["common"]["num_missing"] == column.isna().sum()
+        assert stats["mean"] == pytest.approx(column.mean(), rel=1e-12)
+        assert stats["std_dev"] == pytest.approx(column.std(ddof=0), rel=1e-9)
+        assert stats["min"] == column.min()
+        assert stats["max"] == column.max()
+        counts = [b["count"] for b in stats["distribution"]["kll"]["buckets"]]
+        assert sum(counts) == stats["common"]["num_present"]
+
+
+def test_merged_partial_summaries_equal_one_pass(frame):
+    whole = summarize(frame, len(frame))
+    merged = summarize(frame.iloc[:7000], 1000)
+    merged.merge(summarize(frame.iloc[7000:], 5000))
+
+    assert merged.rows == whole.rows
+    np.testing.assert_array_equal(merged.present, whole.present)
+    np.testing.assert_allclose(merged.mean, whole.mean, rtol=1e-12)
+    np.testing.assert_allclose(merged.m2, whole.m2, rtol=1e-9)
+    np.testing.assert_array_equal(merged.minimum, whole.minimum)
+
+
+def test_sketch_quantiles_are_within_the_rank_error():
+    values = np.random.default_rng(1).lognormal(0, 1, 200000)
+    sketch = QuantileSketch(k=512)
+    for chunk in np.array_split(values, 13):
+        sketch.update(chunk)
+
+    assert sum(len(level) for level in sketch.levels) < 512 * 10
+    q = np.array([0.01, 0.1, 0.5, 0.9, 0.99])
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(q)) / len(values)
+    np.testing.assert_allclose(ranks, q, atol=0.01)
+
+
+def test_sketch_keeps_the_smallest_or_largest_odd_item():
+    kept = set()
+    for seed in range(20):
+        sketch = QuantileSketch(k=2, seed=seed)
+        sketch.update(np.array([1.0, 2.0, 3.0]))
+        kept.update(sketch.levels[0])
+    assert kept == {1.0, 3.0}
+
+
+def test_constant_feature_gets_one_bucket(frame, tmp_path):
+    frame["constant"] = 5
+    summary = summarize(frame, 5000)
+
+    kll = numerical(summary.statistics(), "constant")["distribution"]["kll"]
+    assert kll["buckets"] == [
+        {"lower_bound": 5.0, "upper_bound": 5.0, "count": float(len(frame))}
+    ]
+
+    summary.save(str(tmp_path))
+    baseline = load_baseline(str(tmp_path))
+    sample = frame.iloc[-500:].copy()
+    assert detect_drift(sample, baseline)[0] == []
+    sample["constant"] = 6
+    violations, _ = detect_drift(sample, baseline)
+    assert [v["feature_name"] for v in violations] == ["constant"]
+
+
+def test_constraints_record_types_and_completeness(frame):
+    constraints = summarize(frame, 5000).constraints()
+
+    features = {f["name"]: f for f in constraints["features"]}
+    assert features["ratio"]["completeness"] == pytest.approx(0.975)
+    assert features["ratio"]["inferred_type"] == "Fractional"
+    assert features["trend"]["inferred_type"] == "Integral"
+    assert features["skewed"]["num_constraints"]["is_non_negative"]
+    assert constraints["monitoring_config"]["distribution_constraints"][
+        "comparison_threshold"
+    ] == pytest.approx(0.1)
+
+
+def test_saved_baseline_is_read_by_the_drift_detector(frame, tmp_path):
+    summarize(frame, 5000).save(str(tmp_path))
+
+    baseline = load_baseline(str(tmp_path), str(tmp_path))
+    violations, scores = detect_drift(frame.iloc[-5000:], baseline)
+
+    assert violations == []
+    assert set(scores) == set(frame.columns)
+
+
+def test_processing_writes_the_baseline_of_features_csv(tmp_path):
+    write_market(generate_market(["^GSPC"], 2, seed=5), str(tmp_path / "input"))
+    input_path = str(tmp_path / "input" / "sp500_input.csv")
+
+    process_data(
+        input_path,
+        str(tmp_path / "full"),
+        None,
+        features=FEATURES,
+        baseline_dir=str(tmp_path / "full_baseline"),
+    )
+    process_data_chunked(
+        input_path,
+        str(tmp_path / "chunked"),
+        FEATURES,
+        chunk_rows=100,
+        baseline_dir=str(tmp_path / "chunked_baseline"),
+    )
+
+    features = pd.read_csv(tmp_path / "full" / "features.csv")
+    with open(tmp_path / "full_baseline" / "statistics.json") as f:
+        full = json.load(f)
+    with open(tmp_path / "chunked_baseline" / "statistics.json") as f:
+        chunked = json.load(f)
+    assert full["dataset"]["item_count"] == len(features)
+    for name in FEATURES:
+        stats = numerical(full, name)
+        assert stats["mean"] == pytest.approx(features[name].mean())
+        assert stats["common"] == numerical(chunked, name)["common"]
+        assert stats["std_dev"] == pytest.approx(numerical(chunked, name)["std_dev"])
+
+
+def test_autocorrelation_of_chunked_and_merged_summaries(frame):
+    merged = summarize(frame.iloc[:7000], 1000)
+    merged.merge(summarize(frame.iloc[7000:], 3000))
+    pairs = pd.concat([frame["ratio"].shift(), frame["ratio"]], axis=1).dropna()
+
+    for summary in (summarize(frame, 3000), merged):
+        rho = summary.autocorrelation()
+        assert rho[0] == pytest.approx(np.corrcoef(pairs.T.to_numpy())[0, 1])
+        assert rho[1] == pytest.approx(frame["trend"].autocorr())
+    assert "lag_1_autocorrelation" in numerical(merged.statistics(), "trend")
+
+    pooled = BaselineSummary(frame.columns, time_ordered=False)
+    pooled.update(frame)
+    assert "lag_1_autocorrelation" not in numerical(pooled.statistics(), "trend")
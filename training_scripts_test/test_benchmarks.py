@@ -0,0 +1,39 @@
+import os
+import sys
+import json
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(current_dir, "..", "benchmarks"))
+
+from run_benchmarks import append_history, find_regressions, run_scenario
+
+
+def test_find_regressions_applies_tolerance_and_noise_floor():
+    baseline = {"s": {"fast": {"seconds": 0.001}, "slow": {"seconds": 1.0}}}
+    results = {
+        "s": {
+            "fast": {"seconds": 0.004},  # 4x slower but within timer noise
+            "slow": {"seconds": 1.5},
+            "new": {"seconds": 9.0},  # not in the baseline
+        }
+    }
+    assert find_regressions(results, baseline, tolerance=0.25) == [("s", "slow", 1.0, 1.5)]
+    assert find_regressions(results, baseline, tolerance=0.6) == []
+
+
+def test_run_scenario_records_every_stage(tmp_path):
+    results = {"tiny": run_scenario("tiny", 2, 1200, repeat=1)}
+    assert set(results["tiny"]) == {
+        "add_features",
+        "inference_process",
+        "train_model",
+        "model_fn_load",
+        "evaluate_model",
+        "model_fn_predict",
+    }
+
+    history = tmp_path / "history.jsonl"
+    append_history(results, str(history))
+    records = [json.loads(line) for line in history.read_text().splitlines()]
+    assert len(records) == 6
+    assert {"timestamp", "commit", "scenario", "stage", "seconds", "peak_mb"} <= set(records[0])
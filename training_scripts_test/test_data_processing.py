@@ -16,6 +16,7 @@ from data_processing import (
     add_features,
     save_data,
     process_data,
+    process_data_chunked,
 )
 
 
@@ -97,3 +98,42 @@ def test_process_data_end_to_end(tmp_path):
 
     df = pd.read_csv(tmp_path / "train.csv")
     assert not df.empty
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 64, 1000])
+def test_chunked_processing_matches_in_memory_processing(tmp_path, chunk_rows):
+    data = pd.DataFrame(
+        {
+            "Date": pd.date_range(start="2020-01-01", periods=120).astype(str),
+            "Close": [100.0 + (i * 7) % 11 for i in range(120)],
+            "Volume": [1000 + i for i in range(120)],
+        }
+    )
+    input_path = tmp_path / "input.csv"
+    data.to_csv(input_path, index=False)
+    features = ["Close_Ratio_2", "Trend_2", "Close_Ratio_60", "Trend_60"]
+
+    process_data(str(input_path), str(tmp_path / "full"), None, features=features)
+    process_data_chunked(
+        str(input_path), str(tmp_path / "chunked"), features, chunk_rows
+    )
+
+    for name in ("train.csv", "features.csv"):
+        pd.testing.assert_frame_equal(
+            pd.read_csv(tmp_path / "chunked" / name),
+            pd.read_csv(tmp_path / "full" / name),
+        )
+
+
+def test_chunked_processing_rejects_unsorted_input(tmp_path):
+    data = pd.DataFrame(
+        {
+            "Date": ["2020-01-03", "2020-01-04", "2020-01-01", "2020-01-02"],
+            "Close": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    input_path = tmp_path / "input.csv"
+    data.to_csv(input_path, index=False)
+
+    with pytest.raises(ValueError, match="not sorted by date"):
+        process_data_chunked(str(input_path), str(tmp_path), ["Trend_2"], 2)
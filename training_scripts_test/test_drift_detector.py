@@ -0,0 +1,223 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from baseline_statistics import BaselineSummary
+from drift_detector import (
+    DRIFT_WINDOW,
+    VIOLATIONS_FILE,
+    detect_drift,
+    drift_scores,
+    effective_rows,
+    load_baseline,
+    write_report,
+)
+
+
+def baseline_statistics(frame, buckets=10):
+    """Builds a statistics.json like Model Monitor's, with equal-width KLL buckets."""
+    features = []
+    for name in frame.columns:
+        counts, edges = np.histogram(frame[name].dropna(), bins=buckets)
+        features.append(
+            {
+                "name": name,
+                "inferred_type": "Fractional",
+                "numerical_statistics": {
+                    "common": {"num_present": int(frame[name].notna().sum())},
+                    "distribution": {
+                        "kll": {
+                            "buckets": [
+                                {
+                                    "lower_bound": float(lower),
+                                    "upper_bound": float(upper),
+                                    "count": float(count),
+                                }
+                                for lower, upper, count in zip(
+                                    edges[:-1], edges[1:], counts
+                                )
+                            ]
+                        }
+                    },
+                },
+            }
+        )
+    return {"version": 0.0, "dataset": {"item_count": len(frame)}, "features": features}
+
+
+def baseline_constraints(names, comparison_threshold=0.1):
+    return {
+        "version": 0.0,
+        "features": [
+            {"name": name, "inferred_type": "Fractional", "completeness": 1.0}
+            for name in names
+        ],
+        "monitoring_config": {
+            "distribution_constraints": {
+                "perform_comparison": "Enabled",
+                "comparison_threshold": comparison_threshold,
+                "comparison_method": "Robust",
+            }
+        },
+    }
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def baseline_dir(rng, tmp_path):
+    reference = pd.DataFrame(
+        {
+            "Close_Ratio_2": rng.normal(1, 0.01, 5000),
+            "Trend_5": rng.integers(0, 6, 5000),
+        }
+    )
+    with open(tmp_path / "statistics.json", "w") as f:
+        json.dump(baseline_statistics(reference), f)
+    with open(tmp_path / "constraints.json", "w") as f:
+        json.dump(baseline_constraints(reference.columns), f)
+    return tmp_path
+
+
+def test_same_distribution_does_not_drift(rng):
+    reference = rng.normal(0, 1, 20000)
+    counts, edges = np.histogram(reference, bins=20)
+
+    psi, ks, js = drift_scores(rng.normal(0, 1, 2000), edges, counts.astype(float))
+
+    assert psi < 0.05
+    assert ks < 0.05
+    assert js < 0.01
+
+
+def test_shifted_distribution_drifts(rng):
+    reference = rng.normal(0, 1, 20000)
+    counts, edges = np.histogram(reference, bins=20)
+    sample = rng.normal(1, 1, 2000)
+
+    psi, ks, js = drift_scores(sample, edges, counts.astype(float))
+
+    assert psi > 0.5
+    assert js > 0.1
+    # Close to the exact two-sample statistic
+    assert ks == pytest.approx(stats.ks_2samp(sample, reference).statistic, abs=0.03)
+
+
+def test_values_outside_the_baseline_range_drift(rng):
+    counts, edges = np.histogram(rng.uniform(0, 1, 1000), bins=10)
+
+    psi, ks, js = drift_scores(np.full(50, 5.0), edges, counts.astype(float))
+
+    assert ks == 1.0
+    assert js == pytest.approx(1.0)
+    assert psi > 10
+
+
+def test_drift_report_matches_the_model_monitor_schema(rng, baseline_dir, tmp_path):
+    baseline = load_baseline(str(baseline_dir), str(baseline_dir / "constraints.json"))
+    current = pd.DataFrame(
+        {
+            "Close_Ratio_2": rng.normal(1.05, 0.01, 100),
+            "Trend_5": rng.integers(0, 6, 100),
+        }
+    )
+
+    violations, scores = detect_drift(current, baseline)
+    write_report(violations, scores, str(tmp_path / "report"))
+
+    with open(tmp_path / "report" / VIOLATIONS_FILE) as f:
+        report = json.load(f)
+    assert [v["feature_name"] for v in report["violations"]] == ["Close_Ratio_2"]
+    assert report["violations"][0]["constraint_check_type"] == "baseline_drift_check"
+    assert scores["Trend_5"]["ks"] < 0.1
+
+
+def test_missing_and_incomplete_columns_are_reported(rng, baseline_dir):
+    baseline = load_baseline(str(baseline_dir), str(baseline_dir))
+    current = pd.DataFrame({"Close_Ratio_2": rng.normal(1, 0.01, 100)})
+    current.iloc[:10] = np.nan
+
+    violations, _ = detect_drift(current, baseline)
+
+    checks = {v["feature_name"]: v["constraint_check_type"] for v in violations}
+    assert checks == {
+        "Close_Ratio_2": "completeness_check",
+        "Trend_5": "missing_column_check",
+    }
+
+
+def test_small_samples_skip_the_distribution_checks(rng, baseline_dir):
+    baseline = load_baseline(str(baseline_dir))
+    current = pd.DataFrame({"Close_Ratio_2": [2.0], "Trend_5": [0]})
+
+    violations, scores = detect_drift(current, baseline)
+
+    assert violations == []
+    assert scores == {}
+
+
+def test_header_less_baseline_matches_columns_by_position(rng, tmp_path):
+    reference = pd.DataFrame({"_c0": rng.normal(0, 1, 1000)})
+    with open(tmp_path / "statistics.json", "w") as f:
+        json.dump(baseline_statistics(reference), f)
+
+    baseline = load_baseline(str(tmp_path / "statistics.json"))
+    violations, scores = detect_drift(
+        pd.DataFrame({"Close_Ratio_2": rng.normal(3, 1, 100)}), baseline
+    )
+
+    assert [v["feature_name"] for v in violations] == ["_c0"]
+    assert scores["_c0"]["rows"] == 100
+
+
+def ar1(rng, n_rows, phi):
+    """Stationary AR(1) series, as smooth as a long-horizon trend feature."""
+    noise = rng.normal(0, 1, n_rows)
+    values = np.empty(n_rows)
+    values[0] = noise[0] / np.sqrt(1 - phi**2)
+    for i in range(1, n_rows):
+        values[i] = phi * values[i - 1] + noise[i]
+    return values
+
+
+def test_undrifted_autocorrelated_windows_do_not_alarm(rng, tmp_path):
+    summary = BaselineSummary(["Trend_1000"])
+    summary.update(pd.DataFrame({"Trend_1000": ar1(rng, 100000, 0.99)}))
+    summary.save(str(tmp_path))
+    baseline = load_baseline(str(tmp_path))
+    assert baseline.autocorrelation["Trend_1000"] == pytest.approx(0.99, abs=0.005)
+
+    windows = [
+        pd.DataFrame({"Trend_1000": ar1(rng, DRIFT_WINDOW, 0.99)}) for _ in range(40)
+    ]
+    alarms = [bool(detect_drift(window, baseline)[0]) for window in windows]
+    # Taking the consecutive bars as independent alarms on most windows
+    naive = [
+        bool(detect_drift(window, baseline, time_ordered=False)[0])
+        for window in windows
+    ]
+
+    assert sum(alarms) == 0
+    assert sum(naive) > 20
+    # A window beyond the baseline range still drifts
+    shifted = windows[0] + 100
+    assert detect_drift(shifted, baseline)[0]
+
+
+def test_effective_rows_of_independent_and_constant_samples(rng):
+    values = rng.normal(0, 1, 500)
+
+    assert effective_rows(values) == pytest.approx(500, rel=0.2)
+    assert effective_rows(values, autocorrelation=0.0) == 500
+    assert effective_rows(np.full(100, 3.0)) == 1
@@ -2,9 +2,19 @@ import os
 import sys
 import json
 import shutil
+import warnings
+import numpy as np
 import pandas as pd
 import pytest
 import xgboost as xgb
+from sklearn.metrics import (
+    accuracy_score,
+    f1_score,
+    log_loss,
+    precision_score,
+    recall_score,
+    roc_auc_score,
+)
 
 # Import from parent directory
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +27,9 @@ from evaluate_model import (
     extract_model,
     load_xgboost_model,
     evaluate_model,
+    UNDEFINED_AUC,
+    evaluation_metrics,
+    model_features,
     save_results,
 )
 
@@ -127,3 +140,103 @@ def test_save_results(tmp_path):
     with open(eval_path, "r") as f:
         result = json.load(f)
     assert result == metrics
+
+
+def test_model_features_falls_back_to_booster(dummy_model_and_data):
+    model_dir, df = dummy_model_and_data
+    model = load_xgboost_model(model_dir)
+    assert model_features(model_dir, model) == df.columns[:-1].to_list()
+
+
+@pytest.fixture
+def predictions():
+    rng = np.random.default_rng(0)
+    target = rng.integers(0, 2, 1200)
+    probabilities = np.clip(
+        0.5 + 0.2 * (target - 0.5) + rng.normal(0, 0.2, 1200), 0.01, 0.99
+    )
+    return target, probabilities
+
+
+def test_trailing_windows_match_sklearn(predictions):
+    target, probabilities = predictions
+
+    metrics = evaluation_metrics(target, probabilities)
+
+    assert set(metrics["windows"]) == {"last_20", "last_100", "last_250", "last_1000"}
+    for name, scores in list(metrics["windows"].items()) + [("all", metrics)]:
+        y, p = target[-scores["rows"] :], probabilities[-scores["rows"] :]
+        predicted = (p >= 0.5).astype(int)
+        assert scores["precision"] == pytest.approx(precision_score(y, predicted))
+        assert scores["recall"] == pytest.approx(recall_score(y, predicted))
+        assert scores["f1"] == pytest.approx(f1_score(y, predicted))
+        assert scores["auc"] == pytest.approx(roc_auc_score(y, p))
+        assert scores["log_loss"] == pytest.approx(log_loss(y, p))
+        assert scores["hit_rate"] == pytest.approx(accuracy_score(y, predicted))
+    assert metrics["rows"] == len(target)
+
+
+def test_rolling_windows_match_a_loop(predictions):
+    target, probabilities = predictions
+
+    rolling = evaluation_metrics(target, probabilities, rolling_window=50)["rolling"]
+
+    f1 = [
+        f1_score(target[i : i + 50], probabilities[i : i + 50] >= 0.5, zero_division=0)
+        for i in range(len(target) - 49)
+    ]
+    assert rolling["count"] == len(f1)
+    assert rolling["f1"]["mean"] == pytest.approx(np.mean(f1))
+    assert rolling["f1"]["std"] == pytest.approx(np.std(f1))
+    assert rolling["f1"]["min"] == pytest.approx(min(f1))
+    assert rolling["f1"]["max"] == pytest.approx(max(f1))
+
+
+def test_windows_longer_than_the_holdout_are_skipped():
+    metrics = evaluation_metrics(
+        np.zeros(30), np.full(30, 0.2), windows=[20, 100], rolling_window=40
+    )
+
+    assert list(metrics["windows"]) == ["last_20"]
+    assert metrics["skipped_windows"] == [100]
+    assert metrics["rolling"] == {"window": 40, "count": 0}
+    # Undefined metrics of a single-class window stay numeric for JsonGet
+    assert metrics["precision"] == 0.0
+    assert metrics["auc"] == UNDEFINED_AUC
+    assert metrics["hit_rate"] == 1.0
+
+
+def test_tail_mode_keeps_the_holdout_precision(dummy_model_and_data):
+    model_dir, df = dummy_model_and_data
+    model = load_xgboost_model(model_dir)
+    features = df.columns[:-1].to_list()
+
+    tail = evaluate_model(df, features, model, mode="tail", holdout_rows=150)
+    windows = evaluate_model(df, features, model, holdout_rows=150)
+
+    assert tail == {"precision": pytest.approx(windows["precision"])}
+    assert windows["rows"] == 150
+    assert list(windows["windows"]) == ["last_20", "last_100"]
+    json.dumps(windows)
+
+
+class ConstantModel:
+    """Booster stand-in predicting the same probability for every row."""
+
+    def __init__(self, probability):
+        self.probability = probability
+
+    def predict(self, dmatrix):
+        return np.full(dmatrix.num_row(), self.probability, dtype=np.float32)
+
+
+def test_tail_mode_without_predicted_positives_has_zero_precision(sample_dataframe):
+    features = sample_dataframe.columns[:-1].to_list()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        metrics = evaluate_model(
+            sample_dataframe, features, ConstantModel(0.1), mode="tail"
+        )
+
+    assert metrics == {"precision": 0.0}
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from feature_cache import FEATURE_MODULES, FeatureCache, cache_key
+from feature_engine import add_target
+from data_processing import process_data
+
+
+@pytest.fixture
+def raw_data():
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range(start="2020-01-01", periods=30).astype(str),
+            "Close": [100.0 + (i % 7) for i in range(30)],
+            "Volume": [1000 + i for i in range(30)],
+        }
+    )
+
+
+def test_cache_key_depends_on_bars_and_features(raw_data):
+    key = cache_key(raw_data, ["Close_Ratio_2", "Trend_5"])
+    assert key == cache_key(raw_data.copy(), ["Close_Ratio_2", "Trend_5"])
+    assert key != cache_key(raw_data, ["Close_Ratio_2"])
+
+    changed = raw_data.copy()
+    changed.loc[29, "Close"] += 0.01
+    assert key != cache_key(changed, ["Close_Ratio_2", "Trend_5"])
+
+
+def test_cache_key_covers_the_target_definition():
+    assert sys.modules[add_target.__module__] in FEATURE_MODULES
+
+
+def test_cache_evicts_least_recently_used(raw_data, tmp_path):
+    cache = FeatureCache(str(tmp_path), max_bytes=10**9)
+    for key in ["a", "b", "c"]:
+        cache.put(key, raw_data)
+        time.sleep(0.01)
+    entry_size = os.path.getsize(tmp_path / "a.pkl")
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") is not None
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_process_data_cache_hit_skips_processing(raw_data, tmp_path):
+    input_path = tmp_path / "input.csv"
+    raw_data.to_csv(input_path, index=False)
+    cache = FeatureCache(str(tmp_path / "cache"))
+
+    process_data(str(input_path), str(tmp_path / "first"), [2, 5], cache=cache)
+    with patch("data_processing.build_features") as mock_build:
+        process_data(str(input_path), str(tmp_path / "second"), [2, 5], cache=cache)
+    mock_build.assert_not_called()
+
+    for name in ["train.csv", "features.csv"]:
+        first = (tmp_path / "first" / name).read_bytes()
+        assert first == (tmp_path / "second" / name).read_bytes()
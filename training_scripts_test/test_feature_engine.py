@@ -0,0 +1,84 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from feature_engine import (
+    HORIZONS,
+    add_feature_columns,
+    feature_names,
+    sums_are_exact,
+)
+
+SAMPLE_INPUT = os.path.join(current_dir, "..", "sample_dataset", "input_data.csv")
+
+
+def reference_features(data, horizons):
+    """The original rolling-window feature code, kept as the parity reference."""
+    data = data.copy()
+    for horizon in horizons:
+        rolling_averages = data.rolling(horizon).mean()
+        data[f"Close_Ratio_{horizon}"] = data["Close"] / rolling_averages["Close"]
+        data[f"Trend_{horizon}"] = data.shift(1).rolling(horizon).sum()["Target"]
+    return data
+
+
+def with_target(close):
+    data = pd.DataFrame(
+        {"Open": close, "Close": close, "Volume": np.arange(len(close))},
+        index=pd.date_range("1990-01-01", periods=len(close), name="Date"),
+    )
+    data["Tomorrow"] = data["Close"].shift(-1)
+    data["Target"] = (data["Tomorrow"] > data["Close"]).astype(int)
+    return data
+
+
+def random_walk(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return np.cumprod(1 + rng.normal(0, 0.01, n)) * 1000
+
+
+@pytest.mark.parametrize(
+    "close",
+    [
+        # yfinance prices carry float32 precision: the prefix-sum path
+        random_walk(3000).astype(np.float32).astype(np.float64),
+        # Arbitrary float64 prices: the exactness check falls back to pandas
+        random_walk(3000, seed=1),
+    ],
+    ids=["float32_prices", "float64_prices"],
+)
+def test_features_match_reference_bit_for_bit(close):
+    data = with_target(close)
+    expected = reference_features(data, HORIZONS)
+    result = add_feature_columns(data, HORIZONS)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_features_match_reference_on_sample_dataset():
+    data = pd.read_csv(SAMPLE_INPUT, index_col="Date")
+    data["Tomorrow"] = data["Close"].shift(-1)
+    data["Target"] = (data["Tomorrow"] > data["Close"]).astype(int)
+
+    assert sums_are_exact(data["Close"].to_numpy())
+    expected = reference_features(data, HORIZONS)
+    result = add_feature_columns(data, HORIZONS)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_sums_are_exact_rejects_nan():
+    assert not sums_are_exact(np.array([1.0, np.nan, 2.0]))
+
+
+def test_feature_names_order():
+    assert feature_names([2, 5]) == [
+        "Close_Ratio_2",
+        "Trend_2",
+        "Close_Ratio_5",
+        "Trend_5",
+    ]
@@ -0,0 +1,66 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from feature_engine import HORIZONS, add_feature_columns
+from feature_registry import (
+    DEFAULT_FEATURES,
+    compute_selected,
+    load_feature_list,
+    max_lookback,
+    resolve,
+    save_feature_list,
+)
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(0)
+    close = (np.cumprod(1 + rng.normal(0, 0.01, 1200)) * 1000).astype(np.float32)
+    data = pd.DataFrame(
+        {"Close": close.astype(np.float64)},
+        index=pd.date_range("2015-01-01", periods=1200, name="Date"),
+    )
+    data["Target"] = (data["Close"].shift(-1) > data["Close"]).astype(int)
+    return data
+
+
+def test_resolve_orders_dependencies_first():
+    names = [definition.name for definition in resolve(["Trend_5", "Close_Ratio_2"])]
+    assert names == ["target_sums", "Trend_5", "close_sums", "Close_Ratio_2"]
+
+
+def test_max_lookback():
+    assert max_lookback(["Close_Ratio_60", "Trend_5"]) == 60
+    assert max_lookback(DEFAULT_FEATURES) == 1001
+
+
+def test_unknown_feature_raises():
+    with pytest.raises(KeyError, match="Unknown feature"):
+        resolve(["Momentum_5"])
+
+
+def test_default_features_match_feature_engine(sample_data):
+    expected = add_feature_columns(sample_data, HORIZONS)[DEFAULT_FEATURES]
+    result = compute_selected(sample_data, DEFAULT_FEATURES)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True)
+
+
+def test_only_requested_features_are_computed(sample_data):
+    with patch("feature_registry.exact_close_sums") as mock_close_sums:
+        result = compute_selected(sample_data, ["Trend_60", "Trend_2"])
+    mock_close_sums.assert_not_called()
+    assert list(result.columns) == ["Trend_60", "Trend_2"]
+
+
+def test_feature_list_round_trip(tmp_path):
+    assert load_feature_list(str(tmp_path)) is None
+    save_feature_list(str(tmp_path), ["Trend_2", "Close_Ratio_5"])
+    assert load_feature_list(str(tmp_path)) == ["Trend_2", "Close_Ratio_5"]
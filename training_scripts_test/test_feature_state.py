@@ -0,0 +1,95 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from feature_engine import HORIZONS, add_feature_columns, feature_names
+from feature_state import FeatureState, resume_state
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(0)
+    close = np.cumprod(1 + rng.normal(0, 0.01, 1500)) * 1000
+    return pd.DataFrame(
+        {
+            "Date": pd.date_range("2015-01-01", periods=1500, tz="UTC"),
+            # yfinance prices carry float32 precision
+            "Close": close.astype(np.float32).astype(np.float64),
+        }
+    )
+
+
+def batch_features(history):
+    data = history.set_index("Date")
+    data["Target"] = (data["Close"].shift(-1) > data["Close"]).astype(int)
+    return add_feature_columns(data, HORIZONS)[feature_names(HORIZONS)]
+
+
+def test_state_matches_batch_features_bar_by_bar(history):
+    expected = batch_features(history)
+    state = FeatureState(HORIZONS)
+    for i, (date, close) in enumerate(zip(history["Date"], history["Close"])):
+        state.update(date, close)
+        if i % 97 == 0 or i == len(history) - 1:
+            pd.testing.assert_frame_equal(
+                state.to_frame(), expected.iloc[[i]], check_exact=True
+            )
+
+
+def test_state_round_trips_through_json(history, tmp_path):
+    path = str(tmp_path / "feature_state.json")
+    state = FeatureState.from_history(history["Date"][:-5], history["Close"][:-5])
+    state.save(path)
+
+    resumed = FeatureState.load(path)
+    for date, close in zip(history["Date"][-5:], history["Close"][-5:]):
+        resumed.update(date, close)
+
+    full = FeatureState.from_history(history["Date"], history["Close"])
+    assert resumed.features() == full.features()
+    assert resumed.last_date == full.last_date
+
+
+def test_resume_state_applies_only_new_bars(history, tmp_path):
+    path = str(tmp_path / "feature_state.json")
+    FeatureState.from_history(history["Date"][:-3], history["Close"][:-3]).save(path)
+
+    state = resume_state(path, history["Date"], history["Close"])
+    assert state.n_closes == len(history)
+    assert state.last_date == history["Date"].iloc[-1]
+
+
+def test_resume_state_rebuilds_on_revised_history(history, tmp_path):
+    path = str(tmp_path / "feature_state.json")
+    FeatureState.from_history(history["Date"], history["Close"]).save(path)
+
+    revised = history.copy()
+    revised.loc[revised.index[-1], "Close"] += 1.0
+    state = resume_state(path, revised["Date"], revised["Close"])
+
+    expected = FeatureState.from_history(revised["Date"], revised["Close"])
+    assert state.features() == expected.features()
+
+
+def test_state_keeps_the_latest_feature_rows(history, tmp_path):
+    path = str(tmp_path / "feature_state.json")
+    FeatureState.from_history(history["Date"][:-3], history["Close"][:-3]).save(path)
+
+    # A state without history is rebuilt once to keep the requested rows
+    state = resume_state(path, history["Date"], history["Close"], history_rows=40)
+    state.save(path)
+    state = resume_state(path, history["Date"], history["Close"], history_rows=40)
+
+    pd.testing.assert_frame_equal(
+        state.history_frame(),
+        batch_features(history).tail(40),
+        check_exact=True,
+        check_index_type=False,
+        check_freq=False,
+    )
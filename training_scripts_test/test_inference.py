@@ -0,0 +1,55 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(parent_dir)
+
+from feature_registry import save_feature_list
+from inference import input_fn, model_fn, output_fn, predict_fn
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(100, 3)), columns=["f1", "f2", "f3"])
+    model = xgb.train({}, xgb.DMatrix(df, label=(df["f1"] > 0).astype(int)), 5)
+    model.save_model(str(tmp_path / "model.xgb"))
+    save_feature_list(str(tmp_path), ["f1", "f2", "f3"])
+    return tmp_path
+
+
+def test_model_fn_rejects_mismatched_feature_list(model_dir):
+    assert isinstance(model_fn(str(model_dir)), xgb.Booster)
+    save_feature_list(str(model_dir), ["f3", "f2", "f1"])
+    with pytest.raises(ValueError, match="does not match"):
+        model_fn(str(model_dir))
+
+
+def test_multi_record_round_trip(model_dir):
+    model = model_fn(str(model_dir))
+    rows = np.random.default_rng(1).normal(size=(1000, 3)).astype(np.float32)
+    payload = "\n".join(",".join(repr(float(v)) for v in row) for row in rows) + "\n"
+
+    matrix = input_fn(payload.encode(), "text/csv")
+    assert matrix.shape == (1000, 3)
+    body, content_type = output_fn(predict_fn(matrix, model), "text/csv")
+
+    assert content_type == "text/csv"
+    assert body.endswith("\n")
+    predictions = np.array(body.splitlines(), dtype=np.float32)
+    expected = model.predict(xgb.DMatrix(rows, feature_names=["f1", "f2", "f3"]))
+    np.testing.assert_allclose(predictions, expected, rtol=1e-6)
+
+
+def test_single_record_and_invalid_inputs(model_dir):
+    model = model_fn(str(model_dir))
+    assert input_fn("0.1,0.2,0.3", "text/csv").shape == (1, 3)
+    with pytest.raises(ValueError, match="Unsupported content type"):
+        input_fn("{}", "application/json")
+    with pytest.raises(ValueError, match="Expected 3 features"):
+        predict_fn(input_fn("0.1,0.2", "text/csv"), model)
@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from instrumentation import METRICS_ENV, METRICS_FILE, StageMetrics
+from data_processing import process_data
+
+
+def test_phases_are_recorded_and_saved(tmp_path):
+    metrics = StageMetrics("stage", enabled=True)
+    with metrics.phase("total"):
+        with metrics.phase("load") as phase:
+            phase.record(rows_out=10)
+
+    path = metrics.save(str(tmp_path))
+    assert path == os.path.join(str(tmp_path), METRICS_FILE)
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["stage"] == "stage"
+    # Inner phases finish first
+    assert [phase["name"] for phase in saved["phases"]] == ["load", "total"]
+    load = saved["phases"][0]
+    assert load["rows_out"] == 10
+    assert load["failed"] is False
+    for key in ("wall_seconds", "cpu_seconds", "peak_rss_mb"):
+        assert load[key] >= 0
+
+
+def test_failed_phase_is_flagged_and_exception_propagates():
+    metrics = StageMetrics("stage", enabled=True)
+    with pytest.raises(RuntimeError):
+        with metrics.phase("boom"):
+            raise RuntimeError("failure")
+    assert metrics.phases[0]["failed"] is True
+
+
+def test_disabled_metrics_write_nothing(tmp_path, monkeypatch):
+    monkeypatch.setenv(METRICS_ENV, "0")
+    metrics = StageMetrics("stage")
+    with metrics.phase("load") as phase:
+        phase.record(rows_out=1)
+
+    assert metrics.phases == []
+    assert metrics.save(str(tmp_path)) is None
+    assert not os.listdir(tmp_path)
+
+
+def test_process_data_records_row_counts(tmp_path):
+    data = pd.DataFrame(
+        {
+            "Date": pd.date_range(start="2020-01-01", periods=30).astype(str),
+            "Close": [100.0 + (i % 7) for i in range(30)],
+        }
+    )
+    input_path = tmp_path / "input.csv"
+    data.to_csv(input_path, index=False)
+
+    metrics = StageMetrics("data_processing", enabled=True)
+    process_data(
+        str(input_path),
+        str(tmp_path / "out"),
+        [2, 5],
+        features=["Close_Ratio_2", "Trend_5"],
+        metrics=metrics,
+    )
+
+    phases = {phase["name"]: phase for phase in metrics.phases}
+    assert list(phases) == ["load", "features", "clean", "save"]
+    assert phases["load"]["rows_out"] == 30
+    assert phases["clean"]["rows_in"] == 30
+    assert phases["clean"]["rows_out"] < 30
@@ -0,0 +1,133 @@
+import os
+import sys
+import time
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(current_dir, ".."))
+
+from local_pipeline import ConditionNotMet, LocalPipeline, Output, Step
+
+
+def write_value(output_dir, value):
+    with open(os.path.join(output_dir, "value.txt"), "w") as f:
+        f.write(value)
+
+
+def concat(output_dir, *paths):
+    values = [open(os.path.join(path, "value.txt")).read() for path in paths]
+    write_value(output_dir, "".join(values))
+
+
+def copy_file(output_dir, path):
+    write_value(output_dir, open(path).read())
+
+
+def sleep_and_stamp(output_dir, seconds):
+    start = time.time()
+    time.sleep(float(seconds))
+    with open(os.path.join(output_dir, "span.txt"), "w") as f:
+        f.write(f"{start},{time.time()}")
+
+
+def fail(output_dir):
+    raise RuntimeError("boom")
+
+
+def stop(output_dir):
+    raise ConditionNotMet("precision too low")
+
+
+def graph(value):
+    return [
+        Step("a", function=write_value, args=[value]),
+        Step("b", function=write_value, args=["b"]),
+        Step("c", function=concat, args=[Output("a"), Output("b")]),
+    ]
+
+
+def test_steps_are_cached_by_content_hash(tmp_path):
+    assert LocalPipeline(graph("a"), str(tmp_path)).run() == {
+        "a": "ran",
+        "b": "ran",
+        "c": "ran",
+    }
+    pipeline = LocalPipeline(graph("a"), str(tmp_path))
+    assert set(pipeline.run().values()) == {"cached"}
+
+    # Changing an argument re-runs the step and everything downstream of it
+    pipeline = LocalPipeline(graph("x"), str(tmp_path))
+    assert pipeline.run() == {"a": "ran", "b": "cached", "c": "ran"}
+    assert open(os.path.join(pipeline.output_dir("c"), "value.txt")).read() == "xb"
+
+
+def test_input_file_content_is_part_of_the_key(tmp_path):
+    input_path = tmp_path / "input.txt"
+    input_path.write_text("1")
+    steps = [Step("read", function=write_value, args=["v"], inputs=[str(input_path)])]
+
+    assert LocalPipeline(steps, str(tmp_path / "work")).run() == {"read": "ran"}
+    assert LocalPipeline(steps, str(tmp_path / "work")).run() == {"read": "cached"}
+    input_path.write_text("2")
+    assert LocalPipeline(steps, str(tmp_path / "work")).run() == {"read": "ran"}
+
+
+def test_dependents_of_uncached_steps_are_keyed_on_their_output(tmp_path):
+    source = tmp_path / "source.txt"
+    steps = [
+        # Like a fetch, the producer reads data its key does not cover
+        Step("fetch", function=copy_file, args=[str(source)], cache=False),
+        Step("features", function=concat, args=[Output("fetch")]),
+    ]
+
+    source.write_text("0")
+    assert LocalPipeline(steps, str(tmp_path / "work")).run() == {
+        "fetch": "ran",
+        "features": "ran",
+    }
+    source.write_text("1")
+    pipeline = LocalPipeline(steps, str(tmp_path / "work"))
+    assert pipeline.run() == {"fetch": "ran", "features": "ran"}
+    assert (
+        open(os.path.join(pipeline.output_dir("features"), "value.txt")).read() == "1"
+    )
+
+    # The same output again reuses the dependents
+    pipeline = LocalPipeline(steps, str(tmp_path / "work"))
+    assert pipeline.run() == {"fetch": "ran", "features": "cached"}
+
+
+def test_independent_steps_run_in_parallel(tmp_path):
+    steps = [
+        Step("left", function=sleep_and_stamp, args=[0.3]),
+        Step("right", function=sleep_and_stamp, args=[0.3]),
+    ]
+    pipeline = LocalPipeline(steps, str(tmp_path), max_workers=2)
+    pipeline.run()
+
+    spans = []
+    for name in ["left", "right"]:
+        with open(os.path.join(pipeline.output_dir(name), "span.txt")) as f:
+            spans.append([float(v) for v in f.read().split(",")])
+    assert spans[0][0] < spans[1][1] and spans[1][0] < spans[0][1]
+
+
+def test_failures_and_conditions_skip_dependents(tmp_path):
+    steps = [
+        Step("broken", function=fail),
+        Step("after_broken", function=write_value, args=["x"], depends_on=["broken"]),
+        Step("condition", function=stop),
+        Step("register", function=write_value, args=["y"], depends_on=["condition"]),
+    ]
+    status = LocalPipeline(steps, str(tmp_path)).run()
+    assert status == {
+        "broken": "failed",
+        "after_broken": "skipped",
+        "condition": "stopped",
+        "register": "skipped",
+    }
+
+
+def test_unknown_dependency_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="unknown step"):
+        LocalPipeline([Step("a", function=fail, depends_on=["missing"])], str(tmp_path))
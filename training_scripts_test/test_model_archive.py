@@ -0,0 +1,60 @@
+import os
+import sys
+import io
+import json
+import tarfile
+import pandas as pd
+import pytest
+import xgboost as xgb
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(parent_dir)
+
+from model_archive import load_model_archive
+
+
+def add_bytes(tar, name, data):
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+
+
+@pytest.fixture
+def archive(tmp_path):
+    df = pd.DataFrame({"f1": range(50), "f2": range(50, 100)})
+    model = xgb.train({}, xgb.DMatrix(df, label=[i % 2 for i in range(50)]), 2)
+    archive_path = tmp_path / "model.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as tar:
+        add_bytes(tar, "./model.xgb", bytes(model.save_raw(raw_format="ubj")))
+        add_bytes(tar, "features.json", json.dumps({"features": ["f2", "f1"]}).encode())
+    return archive_path
+
+
+def test_load_model_archive_in_memory(archive, tmp_path):
+    model, features = load_model_archive(str(archive))
+
+    assert model.num_boosted_rounds() == 2
+    assert features == ["f2", "f1"]
+    # Nothing is extracted next to the archive
+    assert os.listdir(tmp_path) == ["model.tar.gz"]
+
+
+def test_load_model_archive_is_memoized_by_content(archive, tmp_path):
+    first, _ = load_model_archive(str(archive))
+    copy = tmp_path / "copy.tar.gz"
+    copy.write_bytes(archive.read_bytes())
+
+    with patch("model_archive.read_members") as mock_read:
+        second, _ = load_model_archive(str(copy))
+    mock_read.assert_not_called()
+    assert second is first
+
+
+def test_load_model_archive_without_model(tmp_path):
+    archive_path = tmp_path / "empty.tar.gz"
+    with tarfile.open(archive_path, "w:gz") as tar:
+        add_bytes(tar, "features.json", b'{"features": []}')
+    with pytest.raises(FileNotFoundError, match="model.xgb"):
+        load_model_archive(str(archive_path))
@@ -0,0 +1,109 @@
+import os
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from ohlcv_store import OHLCVStore, update_history
+
+
+def make_bars(start, periods):
+    dates = pd.date_range(
+        start=start, periods=periods, freq="D", tz="America/New_York", name="Date"
+    )
+    return pd.DataFrame(
+        {
+            "Open": [100.0 + i for i in range(periods)],
+            "Close": [101.0 + i for i in range(periods)],
+            "Volume": [1000 + i for i in range(periods)],
+        },
+        index=dates,
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path / "store"))
+
+
+def test_upsert_appends_and_tracks_high_water_mark(store):
+    assert store.high_water_mark("^GSPC") is None
+
+    assert store.upsert("^GSPC", make_bars("2024-01-01", 5)) == 5
+    assert store.upsert("^GSPC", make_bars("2024-01-06", 3)) == 3
+
+    loaded = store.load("^GSPC")
+    assert len(loaded) == 8
+    assert loaded.index.is_monotonic_increasing
+    assert str(loaded.index.tz) == "America/New_York"
+    assert store.high_water_mark("^GSPC") == loaded.index[-1]
+
+    # The manifest survives a reopen of the store
+    reopened = OHLCVStore(store.store_dir)
+    assert reopened.high_water_mark("^GSPC") == loaded.index[-1]
+
+
+def test_upsert_replaces_overlapping_bars(store):
+    store.upsert("^GSPC", make_bars("2024-01-01", 5))
+    revised = make_bars("2024-01-05", 2)
+    revised["Close"] = 0.0
+
+    assert store.upsert("^GSPC", revised) == 1
+
+    loaded = store.load("^GSPC")
+    assert len(loaded) == 6
+    assert (loaded["Close"].iloc[-2:] == 0.0).all()
+
+
+def test_load_filters_from_start(store):
+    store.upsert("^GSPC", make_bars("2024-01-01", 10))
+    window = store.load("^GSPC", start="2024-01-08")
+    assert len(window) == 3
+
+
+def test_update_history_refetches_before_high_water_mark(store):
+    store.upsert("^GSPC", make_bars("2024-01-01", 5))
+
+    ticker = MagicMock()
+    ticker.history.return_value = make_bars("2024-01-01", 7)
+    with patch("ohlcv_store.yf.Ticker", return_value=ticker):
+        assert update_history(store, "^GSPC") == 2
+
+    ticker.history.assert_called_once_with(start="2023-12-31")
+    assert len(store.load("^GSPC")) == 7
+
+
+def test_update_history_replaces_partial_last_bar(store):
+    partial = make_bars("2024-01-01", 5)
+    partial.iloc[-1, partial.columns.get_loc("Close")] = 99.0
+    store.upsert("^GSPC", partial)
+
+    ticker = MagicMock()
+    ticker.history.return_value = make_bars("2024-01-01", 6)
+    with patch("ohlcv_store.yf.Ticker", return_value=ticker):
+        assert update_history(store, "^GSPC") == 1
+
+    ticker.history.assert_called_once_with(start="2023-12-31")
+    stored = store.load("^GSPC")
+    assert stored["Close"].tolist() == make_bars("2024-01-01", 6)["Close"].tolist()
+
+
+def test_update_history_refetches_full_history_after_revision(store):
+    store.upsert("^GSPC", make_bars("2023-12-20", 17))
+
+    adjusted = make_bars("2023-12-20", 18)
+    adjusted[["Open", "Close"]] *= 0.98
+    ticker = MagicMock()
+    ticker.history.side_effect = [adjusted.loc["2023-12-31":], adjusted]
+    with patch("ohlcv_store.yf.Ticker", return_value=ticker):
+        assert update_history(store, "^GSPC") == 1
+
+    assert ticker.history.call_args_list[1] == ((), {"period": "max"})
+    stored = store.load("^GSPC")
+    assert len(stored) == 18
+    np.testing.assert_allclose(stored["Close"], adjusted["Close"])
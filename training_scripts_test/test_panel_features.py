@@ -0,0 +1,123 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+import panel_features
+from panel_features import (
+    SYMBOL_COLUMN,
+    build_panel_features,
+    latest_panel_rows,
+    load_panel,
+)
+from data_processing import build_features, process_data, process_data_chunked
+from feature_registry import DEFAULT_FEATURES, max_lookback, segment_positions
+from synthetic_market import generate_market, write_market
+
+FEATURES = ["Close_Ratio_2", "Trend_2", "Close_Ratio_60", "Trend_60"]
+
+
+@pytest.fixture
+def market():
+    # Different lengths, so symbol boundaries do not line up with dates
+    bars = generate_market(["AAA", "BBB", "CCC"], 1, seed=3, missing_day_rate=0.1)
+    bars["BBB"] = bars["BBB"].iloc[40:]
+    return bars
+
+
+def long_format(market):
+    frames = [bars.reset_index().assign(Symbol=s) for s, bars in market.items()]
+    # Shuffled rows; the panel code sorts them itself
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=0)
+
+
+def test_segment_positions_restart_for_each_symbol():
+    positions = segment_positions(["A", "A", "A", "B", "C", "C"])
+    np.testing.assert_array_equal(positions, [0, 1, 2, 0, 0, 1])
+
+
+def test_panel_features_match_single_symbol_features(market):
+    panel = build_panel_features(long_format(market), FEATURES)
+
+    for symbol, bars in market.items():
+        expected = build_features(bars.reset_index(), FEATURES)
+        actual = panel[panel[SYMBOL_COLUMN] == symbol].drop(columns=SYMBOL_COLUMN)
+        pd.testing.assert_frame_equal(actual, expected[actual.columns])
+
+
+def test_panel_is_ordered_by_date_then_symbol(market):
+    panel = build_panel_features(long_format(market), FEATURES)
+    keys = list(zip(panel.index, panel[SYMBOL_COLUMN]))
+    assert keys == sorted(keys)
+
+
+def test_latest_panel_rows_use_the_shared_target_definition(market):
+    with patch.object(
+        panel_features, "add_target", wraps=panel_features.add_target
+    ) as add_target:
+        latest_panel_rows(long_format(market), FEATURES)
+
+    assert add_target.call_args.kwargs == {"by": SYMBOL_COLUMN}
+
+
+def test_latest_panel_rows_match_single_symbol_inference(market):
+    latest = latest_panel_rows(long_format(market), list(DEFAULT_FEATURES[:6]))
+
+    assert list(latest[SYMBOL_COLUMN]) == ["AAA", "BBB", "CCC"]
+    for symbol, bars in market.items():
+        window = build_features(
+            bars.reset_index().tail(max_lookback(DEFAULT_FEATURES[:6])),
+            list(DEFAULT_FEATURES[:6]),
+        )
+        expected = window[list(DEFAULT_FEATURES[:6])].dropna().tail(1).to_numpy()
+        actual = latest[latest[SYMBOL_COLUMN] == symbol][DEFAULT_FEATURES[:6]]
+        np.testing.assert_array_equal(actual.to_numpy(), expected)
+
+
+def test_panel_processing_of_an_ingestion_directory(market, tmp_path):
+    write_market(market, str(tmp_path / "input"))
+    assert set(load_panel(str(tmp_path / "input"))[SYMBOL_COLUMN]) == set(market)
+
+    process_data(
+        str(tmp_path / "input"),
+        str(tmp_path / "output"),
+        None,
+        features=FEATURES,
+        panel=True,
+    )
+    train = pd.read_csv(tmp_path / "output" / "train.csv")
+    assert set(train[SYMBOL_COLUMN]) == set(market)
+    assert not train[FEATURES + ["Target"]].isna().any().any()
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 50])
+def test_chunked_panel_processing_writes_the_same_rows(market, tmp_path, chunk_rows):
+    panel = long_format(market).sort_values(["Date", SYMBOL_COLUMN])
+    panel.to_csv(tmp_path / "panel.csv", index=False)
+
+    process_data(
+        str(tmp_path / "panel.csv"),
+        str(tmp_path / "full"),
+        None,
+        features=FEATURES,
+        panel=True,
+    )
+    process_data_chunked(
+        str(tmp_path / "panel.csv"),
+        str(tmp_path / "chunked"),
+        FEATURES,
+        chunk_rows=chunk_rows,
+        panel=True,
+    )
+
+    # Same rows in the same date order, so the holdout is the most recent dates
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "chunked" / "train.csv"),
+        pd.read_csv(tmp_path / "full" / "train.csv"),
+    )
@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import threading
+import urllib.request
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(parent_dir)
+
+from http.server import ThreadingHTTPServer
+from prediction_server import MicroBatcher, make_handler
+from train_model import train_model
+
+
+@pytest.fixture
+def model_and_rows(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(300, 3)), columns=["f1", "f2", "f3"])
+    df["Target"] = (df["f1"] > 0).astype(int)
+    train_model(df, ["f1", "f2", "f3"], str(tmp_path))
+    model = xgb.Booster()
+    model.load_model(str(tmp_path / "model.xgb"))
+    return model, df[["f1", "f2", "f3"]].to_numpy(dtype=np.float32)
+
+
+def test_micro_batches_match_direct_predictions(model_and_rows):
+    model, rows = model_and_rows
+    batcher = MicroBatcher(model, max_batch_size=16, max_latency_ms=50)
+    try:
+        predictions = batcher.predict(rows[:64])
+    finally:
+        batcher.close()
+
+    expected = model.predict(xgb.DMatrix(rows[:64], feature_names=model.feature_names))
+    np.testing.assert_allclose(predictions, expected, rtol=1e-6)
+    stats = batcher.stats.summary()
+    assert stats["requests"] == 64
+    # Queued rows are served in batches bounded by max_batch_size
+    assert 1 < stats["mean_batch_size"] <= 16
+    assert stats["p99_ms"] >= stats["p50_ms"] > 0
+
+
+def test_http_invocations(model_and_rows):
+    model, rows = model_and_rows
+    batcher = MicroBatcher(model)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(batcher))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        body = "\n".join(",".join(str(v) for v in row) for row in rows[:3]).encode()
+        with urllib.request.urlopen(f"{url}/invocations", data=body) as response:
+            predictions = [float(line) for line in response.read().decode().splitlines()]
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            metrics = json.load(response)
+    finally:
+        server.shutdown()
+        server.server_close()
+        batcher.close()
+
+    assert len(predictions) == 3
+    assert metrics["requests"] == 3
+
+
+def test_submit_rejects_wrong_width(model_and_rows):
+    model, _ = model_and_rows
+    batcher = MicroBatcher(model)
+    try:
+        with pytest.raises(ValueError, match="Expected 3 features"):
+            batcher.submit([1.0, 2.0])
+    finally:
+        batcher.close()
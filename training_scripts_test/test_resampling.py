@@ -0,0 +1,130 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from resampling import AGGREGATIONS, compact_bars, resample_bars, resample_frame
+from feature_engine import HORIZONS, interval_horizons
+from feature_registry import parse_feature_list
+from synthetic_market import MINUTES_PER_DAY, generate_bars
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+@pytest.fixture
+def minute_bars():
+    return generate_bars(5, frequency="1m", seed=2)
+
+
+def pandas_resample(bars, rule, offset=None):
+    aggregations = {column: AGGREGATIONS[column] for column in PRICE_COLUMNS}
+    return bars.resample(rule, offset=offset).agg(aggregations).dropna()
+
+
+@pytest.mark.parametrize("rule,offset", [("1h", "30min"), ("15min", None)])
+def test_resampling_matches_pandas(minute_bars, rule, offset):
+    expected = pandas_resample(minute_bars, rule, offset)
+    actual = resample_bars(minute_bars[PRICE_COLUMNS], rule)
+    pd.testing.assert_frame_equal(actual, expected, check_freq=False)
+
+
+def test_hourly_bars_start_at_the_session_open(minute_bars):
+    hourly = resample_bars(minute_bars, "1h")
+    # 09:30-10:30, ..., 14:30-15:30 and the half hour to the close
+    assert len(hourly) == 5 * 7
+    assert hourly.index[0].strftime("%H:%M") == "09:30"
+    assert hourly.index[6].strftime("%H:%M") == "15:30"
+
+
+def test_bars_outside_the_session_are_dropped(minute_bars):
+    # Move the first session to 04:30-10:59, mostly before the regular open
+    early = minute_bars.index[:MINUTES_PER_DAY] - pd.Timedelta(hours=5)
+    bars = minute_bars.set_axis(early.append(minute_bars.index[MINUTES_PER_DAY:]))
+
+    regular = resample_bars(bars, "1D", "regular")
+    extended = resample_bars(bars, "1D", "extended")
+    assert len(regular) == len(extended) == 5
+    assert regular["Volume"].iloc[0] < extended["Volume"].iloc[0]
+    assert extended["Volume"].sum() == minute_bars["Volume"].sum()
+
+
+def test_daily_bars_aggregate_each_session(minute_bars):
+    daily = resample_bars(minute_bars, "1d")
+    session = minute_bars.iloc[:MINUTES_PER_DAY]
+    assert daily["Open"].iloc[0] == session["Open"].iloc[0]
+    assert daily["High"].iloc[0] == session["High"].max()
+    assert daily["Low"].iloc[0] == session["Low"].min()
+    assert daily["Close"].iloc[0] == session["Close"].iloc[-1]
+    assert daily["Volume"].iloc[0] == session["Volume"].sum()
+    assert daily.index[0] == session.index[0].normalize()
+
+
+def test_multi_day_bars_group_trading_sessions():
+    daily = generate_bars(10, seed=1)
+    weekly = resample_bars(daily, "5D", "all")
+    assert len(weekly) == 2
+    assert weekly.index[1] == daily.index[5]
+    assert weekly["Close"].iloc[1] == daily["Close"].iloc[-1]
+
+
+def test_bars_never_span_two_symbols(minute_bars):
+    # Two symbols trading the same minutes, one after the other
+    panel = pd.concat([minute_bars, minute_bars * 2]).reset_index()
+    panel["Symbol"] = np.repeat(["AAA", "BBB"], len(minute_bars))
+
+    resampled = resample_frame(panel, "1h", by="Symbol")
+    alone = resample_bars(minute_bars, "1h")
+    assert list(resampled["Symbol"]) == ["AAA"] * len(alone) + ["BBB"] * len(alone)
+    np.testing.assert_array_equal(
+        resampled["Close"].to_numpy()[: len(alone)], alone["Close"].to_numpy()
+    )
+
+
+def test_string_dates_are_parsed_across_dst_changes():
+    bars = generate_bars(2, frequency="1m", start="2024-03-08")
+    data = bars.reset_index()
+    data["Date"] = data["Date"].astype(str)
+
+    resampled = resample_frame(data, "1h")
+    assert [date.strftime("%H:%M") for date in resampled["Date"][::7]] == [
+        "09:30",
+        "09:30",
+    ]
+
+
+def test_compact_bars_keeps_quoted_values():
+    bars = generate_bars(20, seed=3)
+    compact = compact_bars(bars)
+    assert compact["Close"].dtype == np.float32
+    assert compact["Volume"].dtype == np.int64
+    np.testing.assert_array_equal(compact["Close"].astype(float), bars["Close"])
+
+
+def test_compact_bars_stores_missing_volumes_as_zero():
+    bars = generate_bars(5, seed=3)
+    bars["Volume"] = bars["Volume"].astype(float)
+    bars.iloc[2, bars.columns.get_loc("Volume")] = np.nan
+
+    compact = compact_bars(bars)
+    assert compact["Volume"].dtype == np.int64
+    assert compact["Volume"].iloc[2] == 0
+    assert compact["Volume"].iloc[3] == bars["Volume"].iloc[3]
+
+
+def test_invalid_arguments_are_rejected(minute_bars):
+    with pytest.raises(ValueError):
+        resample_bars(minute_bars, "1h", "overnight")
+    with pytest.raises(ValueError):
+        resample_bars(minute_bars, "36h")
+
+
+def test_horizons_depend_on_the_interval():
+    assert interval_horizons("1d") == HORIZONS
+    assert parse_feature_list(None, "1h")[0] == "Close_Ratio_2"
+    with pytest.raises(ValueError):
+        interval_horizons("2h")
@@ -0,0 +1,86 @@
+import os
+import sys
+import json
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from synthetic_market import (
+    MINUTES_PER_DAY,
+    OHLCV_COLUMNS,
+    generate_bars,
+    generate_market,
+    write_market,
+)
+from artifact_io import read_frame
+from data_processing import load_data
+
+
+def test_bars_have_the_yfinance_schema():
+    bars = generate_bars(50, seed=1)
+    assert list(bars.columns) == OHLCV_COLUMNS
+    assert bars.index.name == "Date"
+    assert str(bars.index.tz) == "America/New_York"
+    assert len(bars) == 50
+    assert (bars["High"] >= bars[["Open", "Close"]].max(axis=1)).all()
+    assert (bars["Low"] <= bars[["Open", "Close"]].min(axis=1)).all()
+    assert (bars["Volume"] > 0).all()
+
+
+def test_bars_are_reproducible_per_seed():
+    pd.testing.assert_frame_equal(generate_bars(30, seed=4), generate_bars(30, seed=4))
+    assert not generate_bars(30, seed=4).equals(generate_bars(30, seed=5))
+
+
+def test_minute_bars_cover_each_session():
+    bars = generate_bars(3, frequency="1m")
+    assert len(bars) == 3 * MINUTES_PER_DAY
+    assert bars.index[0].strftime("%H:%M") == "09:30"
+    assert bars.index[MINUTES_PER_DAY - 1].strftime("%H:%M") == "15:59"
+
+
+def test_missing_days_leave_gaps():
+    bars = generate_bars(200, seed=2, missing_day_rate=0.2)
+    assert len(bars) == 200
+    gaps = bars.index.to_series().diff().dt.days.dropna()
+    # Weekends alone never span more than three days
+    assert (gaps > 3).any()
+
+
+def test_regimes_change_volatility():
+    calm = {"calm": (0.0, 0.001, 1.0)}
+    wild = {"wild": (0.0, 0.05, 1.0)}
+    calm_returns = generate_bars(500, regimes=calm)["Close"].pct_change()
+    wild_returns = generate_bars(500, regimes=wild)["Close"].pct_change()
+    assert wild_returns.std() > 10 * calm_returns.std()
+
+
+def test_invalid_frequency_is_rejected():
+    with pytest.raises(ValueError):
+        generate_bars(10, frequency="1h")
+
+
+def test_single_symbol_is_written_as_ingestion_output(tmp_path):
+    write_market(generate_market(["^GSPC"], 1), str(tmp_path))
+    assert os.listdir(tmp_path) == ["sp500_input.csv"]
+
+    # Readable by the training processing step like the fetched data
+    data = load_data(str(tmp_path / "sp500_input.csv"))
+    assert len(data) == 252
+    assert "Close" in data.columns
+
+
+def test_many_symbols_are_written_like_the_universe_fetch(tmp_path):
+    market = generate_market(["AAA", "BBB"], 1, seed=7)
+    write_market(market, str(tmp_path), "parquet")
+
+    with open(tmp_path / "ingestion_summary.json") as f:
+        summary = json.load(f)
+    assert summary == {"failed": {}, "succeeded": {"AAA": 252, "BBB": 252}}
+    assert len(read_frame(str(tmp_path / "AAA.parquet"))) == 252
+    # Symbols are generated independently of each other
+    alone = generate_market(["AAA", "CCC"], 1, seed=7)["AAA"]
+    pd.testing.assert_frame_equal(alone, market["AAA"])
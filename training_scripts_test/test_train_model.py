@@ -1,6 +1,8 @@
 import os
 import sys
+import json
 import pytest
+import numpy as np
 import pandas as pd
 import xgboost as xgb
 
@@ -50,3 +52,54 @@ def test_load_data(tmp_path):
 
     loaded_df = load_data(str(dummy_csv))
     pd.testing.assert_frame_equal(df, loaded_df)
+
+
+def test_train_model_saves_feature_list(sample_data, tmp_path):
+    """Test that the feature list is persisted beside model.xgb."""
+    model_dir = tmp_path / "model"
+    train_model(sample_data, ["f3", "f1"], str(model_dir))
+
+    with open(model_dir / "features.json") as f:
+        assert json.load(f) == {"features": ["f3", "f1"]}
+
+
+def test_train_model_hist_mode_with_early_stopping(tmp_path):
+    """Test that hist mode stops early and keeps only the trees up to the best iteration."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(600, 2)), columns=["f1", "f2"])
+    df["Target"] = (rng.random(600) > 0.5).astype(int)
+    model_dir = tmp_path / "model"
+
+    metrics = train_model(
+        df,
+        ["f1", "f2"],
+        str(model_dir),
+        num_boost_round=500,
+        mode="hist",
+        nthread=1,
+        validation_fraction=0.2,
+        early_stopping_rounds=5,
+    )
+
+    assert metrics["validation_rows"] == 100
+    assert metrics["best_iteration"] < 500
+    model = xgb.Booster()
+    model.load_model(str(model_dir / "model.xgb"))
+    assert model.num_boosted_rounds() == metrics["best_iteration"] + 1
+    with open(model_dir / "training_metrics.json") as f:
+        saved = json.load(f)
+    assert saved["mode"] == "hist"
+    assert saved["peak_memory_mb"] > 0
+
+
+def test_train_model_rejects_unknown_mode(sample_data, tmp_path):
+    with pytest.raises(ValueError, match="Unsupported training mode"):
+        train_model(sample_data, ["f1"], str(tmp_path), mode="gpu")
+
+
+@pytest.mark.parametrize("holdout_rows", [0, -5, 10**6])
+def test_train_model_rejects_a_holdout_leaving_no_training_rows(
+    sample_data, tmp_path, holdout_rows
+):
+    with pytest.raises(ValueError, match="holdout_rows"):
+        train_model(sample_data, ["f1"], str(tmp_path), holdout_rows=holdout_rows)
@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(parent_dir)
+
+from train_model import XGB_PARAMS, load_training_config
+import tune_model
+from tune_model import sample_candidates, save_results, search, time_series_splits
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(400, 3)), columns=["f1", "f2", "f3"])
+    df["Target"] = (df["f1"] + rng.normal(scale=0.5, size=400) > 0).astype(int)
+    return df
+
+
+def test_sample_candidates_starts_with_defaults():
+    candidates = sample_candidates(5, seed=1)
+    assert len(candidates) == 5
+    assert candidates[0]["max_depth"] == XGB_PARAMS["max_depth"]
+    assert candidates[0]["eta"] == XGB_PARAMS["eta"]
+    assert len({json.dumps(c, sort_keys=True) for c in candidates}) == 5
+
+
+def test_time_series_splits_tile_the_tail():
+    assert time_series_splits(100, 3) == [(25, 50), (50, 75), (75, 100)]
+    with pytest.raises(ValueError):
+        time_series_splits(10, 3, val_size=5)
+
+
+def test_search_prunes_and_writes_consumable_config(sample_data, tmp_path):
+    best_config, trials = search(
+        sample_data,
+        ["f1", "f2", "f3"],
+        n_trials=4,
+        n_splits=3,
+        max_workers=2,
+        max_rounds=50,
+        early_stopping_rounds=5,
+        holdout_rows=100,
+    )
+
+    # 4 trials -> 2 after the first split -> 1 after the second
+    assert [len(t["scores"]) for t in trials].count(3) == 1
+    assert sum(t["pruned"] for t in trials) == 3
+    assert 1 <= best_config["num_boost_round"] <= 50
+
+    save_results(best_config, trials, str(tmp_path))
+    params, num_boost_round = load_training_config(str(tmp_path))
+    assert params["objective"] == "binary:logistic"
+    assert params["max_depth"] == best_config["params"]["max_depth"]
+    assert num_boost_round == best_config["num_boost_round"]
+
+
+def test_training_rejects_a_smaller_holdout_than_the_search(tmp_path):
+    best_config = {"params": {}, "num_boost_round": 10, "holdout_rows": 1000}
+    save_results(best_config, [], str(tmp_path))
+
+    assert load_training_config(str(tmp_path), 1000)[1] == 10
+    with pytest.raises(ValueError, match="tuned"):
+        load_training_config(str(tmp_path), 100)
+
+
+def test_search_leaves_out_the_evaluation_holdout(sample_data, monkeypatch):
+    n_rows = []
+
+    def splits(rows, n_splits):
+        n_rows.append(rows)
+        return time_series_splits(rows, n_splits)
+
+    monkeypatch.setattr(tune_model, "time_series_splits", splits)
+    search(
+        sample_data,
+        ["f1", "f2", "f3"],
+        n_trials=1,
+        n_splits=2,
+        max_workers=1,
+        max_rounds=5,
+        holdout_rows=150,
+    )
+
+    assert n_rows == [len(sample_data) - 150]
+    with pytest.raises(ValueError):
+        search(sample_data, ["f1"], n_trials=1, holdout_rows=0)
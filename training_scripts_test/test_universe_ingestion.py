@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import time
+import pytest
+import pandas as pd
+from unittest.mock import patch, MagicMock
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.join(current_dir, "..", "training_scripts")
+sys.path.append(os.path.abspath(parent_dir))
+
+from universe_ingestion import TokenBucket, fetch_universe, read_symbols
+
+
+def fake_ticker(symbol, session=None):
+    ticker = MagicMock()
+    if symbol == "BAD":
+        ticker.history.side_effect = RuntimeError("download failed")
+    else:
+        dates = pd.date_range(end=pd.Timestamp.today(), periods=30, name="Date")
+        ticker.history.return_value = pd.DataFrame(
+            {"Close": range(30), "Volume": range(30)}, index=dates
+        )
+    return ticker
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # First token is free, the remaining four need ~0.05s each
+    assert time.monotonic() - start >= 0.15
+
+
+def test_token_bucket_rejects_invalid_rate():
+    with pytest.raises(ValueError, match="must be positive"):
+        TokenBucket(rate=0)
+
+
+@patch("universe_ingestion.yf.Ticker", side_effect=fake_ticker)
+def test_fetch_universe_isolates_failures(mock_ticker, tmp_path):
+    summary = fetch_universe(
+        ["AAPL", "BAD", "MSFT"],
+        years_to_filter=1,
+        output_dir=str(tmp_path),
+        max_workers=2,
+        requests_per_second=100,
+    )
+
+    assert set(summary["succeeded"]) == {"AAPL", "MSFT"}
+    assert set(summary["failed"]) == {"BAD"}
+    assert (tmp_path / "AAPL.csv").exists()
+    assert (tmp_path / "MSFT.csv").exists()
+    assert not (tmp_path / "BAD.csv").exists()
+
+    # All workers share one session
+    sessions = {id(call.kwargs["session"]) for call in mock_ticker.call_args_list}
+    assert len(sessions) == 1
+
+    with open(tmp_path / "ingestion_summary.json") as f:
+        assert json.load(f) == summary
+
+
+def test_read_symbols_merges_and_deduplicates(tmp_path):
+    symbols_file = tmp_path / "symbols.txt"
+    symbols_file.write_text("MSFT\n\nGOOG\n")
+    assert read_symbols("AAPL, MSFT", str(symbols_file)) == ["AAPL", "MSFT", "GOOG"]